@@ -0,0 +1,119 @@
+import os
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import business
+import clocks
+import events
+import shop_tools
+from scheduler import ShopScheduler
+from worker import Worker
+
+# everything needed to build a replica of a shop in another process. <tools> are the names of ShopTool classes,
+# e.g. ('Lathe', 'Lathe', 'WorkBench'), so the whole thing pickles as a handful of strings
+ShopConfig = namedtuple('ShopConfig', 'tools num_workers release_during_passive', defaults=(True,))
+
+# what a single replica reports back about its share of the order book
+PartitionResult = namedtuple('PartitionResult', 'orders_completed items makespan worker_busy tool_busy cpu_seconds')
+
+# the merged results of every replica. Each replica runs its share of orders side by side with the others, so the
+# makespan is the longest of them. Utilisation is busy time over the time every replica of the worker or tool was
+# around for
+BatchReport = namedtuple('BatchReport', 'orders_completed items makespan worker_utilisation tool_utilisation '
+                                        'partitions processes wall_seconds')
+
+
+def build_shop(config):
+    """Build a silent WoodShop on a VirtualClock from the ShopConfig <config>, with all of its tools bought"""
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    for tool in build_equipment(config):
+        shop.buy_equipment(tool)
+    for i in range(config.num_workers):
+        shop.hire_worker(Worker(f'Worker {i + 1}'))
+    return shop
+
+
+def build_equipment(config):
+    """Make a fresh ShopTool for every name in config.tools"""
+    equipment = []
+    for name in config.tools:
+        tool = getattr(shop_tools, name, None)
+        if not isinstance(tool, type) or not issubclass(tool, shop_tools.ShopTool):
+            raise InvalidShopConfigError(f'{name} is not a ShopTool')
+        equipment.append(tool())
+    return equipment
+
+
+def run_partition(config, orders):
+    """Build a replica of the shop described by <config> and schedule <orders> on it. Runs in a worker process"""
+    start = time.process_time()
+    shop = build_shop(config)
+    scheduler = ShopScheduler(shop, release_during_passive=config.release_during_passive)
+    scheduler.add_orders(orders)
+    report = scheduler.run()
+    return PartitionResult(
+        report.orders_completed,
+        Counter(order.blueprint.name for order in scheduler.orders if order.is_finished),
+        report.makespan,
+        {name: share * report.makespan for name, share in report.worker_utilisation.items()},
+        {name: share * report.makespan for name, share in report.tool_utilisation.items()},
+        time.process_time() - start
+    )
+
+
+def partition_orders(orders, partitions):
+    """Deal <orders> out into <partitions> lists like cards, so each gets about the same mix of items"""
+    return [list(orders[i::partitions]) for i in range(partitions)]
+
+
+def merge_results(results, processes, wall_seconds):
+    """Combine the PartitionResults of every replica into one BatchReport"""
+    items = Counter()
+    worker_busy = Counter()
+    tool_busy = Counter()
+    for result in results:
+        items.update(result.items)
+        worker_busy.update(result.worker_busy)
+        tool_busy.update(result.tool_busy)
+    available = sum(result.makespan for result in results)
+    return BatchReport(
+        sum(result.orders_completed for result in results),
+        items,
+        max((result.makespan for result in results), default=0),
+        {name: busy / available if available else 0 for name, busy in worker_busy.items()},
+        {name: busy / available if available else 0 for name, busy in tool_busy.items()},
+        len(results),
+        processes,
+        wall_seconds
+    )
+
+
+def run_batch(config, orders, processes=None, partitions=None):
+    """Simulate the order book <orders>, item names like 'chair', on <partitions> replicas of the shop described by
+    <config>, spread over a pool of <processes> worker processes. Returns a BatchReport.
+    <processes> defaults to one per CPU and <partitions> to one per process. With one process everything runs
+    right here, with no pool at all"""
+    processes = processes or os.cpu_count() or 1
+    partitions = partitions or processes
+    chunks = partition_orders(list(orders), partitions)
+
+    start = time.perf_counter()
+    if processes == 1:
+        results = [run_partition(config, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(run_partition, [config] * partitions, chunks))
+    return merge_results(results, processes, time.perf_counter() - start)
+
+
+class InvalidShopConfigError(Exception):
+    pass
+
+
+if __name__ == '__main__':
+    config = ShopConfig(('Lathe', 'Lathe', 'WorkBench', 'Sander', 'Jointer', 'Planer', 'TableSaw'), 2)
+    report = run_batch(config, ['chair', 'table', 'desk', 'cutting board'] * 1000, partitions=4)
+    print(f'{report.orders_completed} orders on {report.partitions} shops in {report.processes} processes, '
+          f'{report.wall_seconds:.2f} seconds')
+    print(f'Makespan {report.makespan:.1f} seconds, {dict(report.items)}')
+    print('Tools:', {name: round(share, 3) for name, share in report.tool_utilisation.items()})
@@ -0,0 +1,687 @@
+"""Benchmarks for the hot paths of the WoodShop. Run this file directly to run all of them:
+
+    python benchmarks.py
+
+Each bench_ function returns a dict of its measurements so they can be compared from one run to the next.
+Everything runs on a VirtualClock, so none of the time spent waiting on steps and tools counts, just the Python.
+To catch regressions, save a baseline once and compare later runs against it:
+
+    python benchmarks.py --quick --save-baseline
+    python benchmarks.py --quick --output results.json
+
+The second run exits with an error if any timing got more than --tolerance slower than the baseline. A quick run
+is only ever compared with a quick baseline and a full run with a full one."""
+import argparse
+import asyncio
+import io
+import json
+import platform
+import re
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from collections import namedtuple
+import batch_runner
+import business
+import clocks
+import crafting_steps
+import events
+import shop_tools
+from blueprints import WoodObjectEncyclopedia
+from checkpoints import CheckpointLog
+from order_batcher import OrderBatcher
+from part_batch import PartBatch
+from profiling import profile
+from tool_pool import CheapestSetupStrategy, LeastLoadedStrategy, RoundRobinStrategy
+from sequencing import FifoPolicy, GreedyPolicy, LocalSearchPolicy, changeovers, plan_cost
+from scheduler import ShopScheduler
+from wood_objects import Board, Drawer, PLANED
+from worker import Worker
+
+
+def bench_get_blueprint(item_name='chair', calls=100_000, batches=10, cached=True):
+    """Call get_blueprint() <calls> times in <batches> equal batches, timing each batch and tracking how much memory
+    is left allocated afterwards. Every batch should take about as long as the first and the memory held shouldn't
+    grow, no matter how many blueprints have been made before.
+    With <cached> False, build_blueprint() is called instead so every call constructs a new Blueprint"""
+    if cached:
+        get_blueprint = WoodObjectEncyclopedia.get_blueprint
+    else:
+        get_blueprint = WoodObjectEncyclopedia.build_blueprint
+    batch_size = calls // batches
+    batch_times = []
+    memory = []
+
+    tracemalloc.start()
+    for b in range(batches):
+        start = time.perf_counter()
+        for i in range(batch_size):
+            blueprint = get_blueprint(item_name)
+        batch_times.append(time.perf_counter() - start)
+        memory.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+
+    return {
+        'item': item_name,
+        'cached': cached,
+        'calls': batch_size * batches,
+        'steps': len(blueprint.steps),
+        'assembly_time': blueprint.assembly_time,
+        'first_batch_us_per_call': batch_times[0] / batch_size * 1e6,
+        'last_batch_us_per_call': batch_times[-1] / batch_size * 1e6,
+        'time_growth': batch_times[-1] / batch_times[0],
+        'first_batch_bytes': memory[0],
+        'last_batch_bytes': memory[-1],
+        'memory_growth': memory[-1] - memory[0],
+    }
+
+
+def per_call(func, number, repeat=5):
+    """Return the best of <repeat> timings of calling <func> <number> times, in seconds per call"""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def bench_blueprint_items(calls=20_000):
+    """Time get_blueprint() and build_blueprint() for every item in the WoodObjectEncyclopedia"""
+    results = {}
+    for item in WoodObjectEncyclopedia.item_names():
+        key = item.replace(' ', '_')
+        results[f'{key}_get_us_per_call'] = per_call(lambda: WoodObjectEncyclopedia.get_blueprint(item), calls) * 1e6
+        results[f'{key}_build_us_per_call'] = per_call(
+            lambda: WoodObjectEncyclopedia.build_blueprint(item), calls // 10) * 1e6
+    return results
+
+
+def bench_step_acceptance(calls=200_000):
+    """Time ShopTool._is_step_acceptable() for a step the tool takes, and accepts() for one it doesn't"""
+    bench = shop_tools.WorkBench()
+    fastening, turning = crafting_steps.FasteningStep(), crafting_steps.TurningStep()
+    return {
+        'accepted_us_per_call': per_call(lambda: bench._is_step_acceptable(fastening), calls) * 1e6,
+        'rejected_us_per_call': per_call(lambda: bench.accepts(turning), calls) * 1e6,
+    }
+
+
+def bench_assembly_time(calls=100_000):
+    """Time Blueprint._calculate_assembly_time() for the blueprint with the most steps"""
+    blueprint = max((WoodObjectEncyclopedia.get_blueprint(item) for item in WoodObjectEncyclopedia.item_names()),
+                    key=lambda b: len(b.steps))
+    return {
+        'item': blueprint.name,
+        'steps': len(blueprint.steps),
+        'us_per_call': per_call(blueprint._calculate_assembly_time, calls) * 1e6,
+    }
+
+
+def bench_craft(items=('chair', 'table', 'desk'), crafts=1000):
+    """Craft each of <items> <crafts> times from start to finish in a silent shop with every tool in its catalog"""
+    results = {}
+    for item in items:
+        shop = build_shop([], 1)
+        for model in shop.catalog.models():
+            shop.order_equipment(model)
+        worker = shop.workers[0]
+        worker.learn_blueprint(item)
+        start = time.perf_counter()
+        for i in range(crafts):
+            worker.craft(item)
+        results[f'{item}_us_per_craft'] = (time.perf_counter() - start) / crafts * 1e6
+        results[f'{item}_simulated_seconds'] = worker.last_craft_time
+    return results
+
+
+def bench_profiling(crafts=1000):
+    """Time crafting chairs in a silent shop, then again with a Profiler listening, to see what profiling costs"""
+    shop = build_shop([shop_tools.Lathe], 1)
+    worker = shop.workers[0]
+    worker.learn_blueprint('chair')
+    start = time.perf_counter()
+    for i in range(crafts):
+        worker.craft('chair')
+    disabled = time.perf_counter() - start
+    with profile(shop.events) as profiler:
+        start = time.perf_counter()
+        for i in range(crafts):
+            worker.craft('chair')
+        enabled = time.perf_counter() - start
+    return {
+        'disabled_us_per_craft': disabled / crafts * 1e6,
+        'enabled_us_per_craft': enabled / crafts * 1e6,
+        'overhead': enabled / disabled - 1,
+        'phases_timed': sum(h.count for h in profiler.tool_phases.values()) +
+                        sum(h.count for h in profiler.step_phases.values()),
+    }
+
+
+def bench_order_batching(order_books=((('chair', 10),), (('chair', 10), ('table', 5), ('desk', 5)))):
+    """Plan each of <order_books> with the OrderBatcher and compare its setups and makespan with crafting every unit
+    on its own. Also times how long planning takes"""
+    shop = build_shop([], 1)
+    for model in ('lathe', 'sander', 'work bench', 'planer', 'jointer', 'table saw'):
+        shop.order_equipment(model)
+    batcher = OrderBatcher(shop.workers[0])
+    results = {}
+    for i, orders in enumerate(order_books):
+        start = time.perf_counter()
+        report = batcher.compare(orders)
+        key = f'book_{i + 1}_{report.units}_units'
+        results[f'{key}_plan_ms'] = (time.perf_counter() - start) * 1000
+        results[f'{key}_setups'] = f'{sum(report.unbatched_setups.values())} -> {sum(report.setups.values())}'
+        results[f'{key}_makespan'] = f'{report.unbatched_makespan:.1f} -> {report.makespan:.1f}'
+        results[f'{key}_setup_reduction'] = report.setup_reduction
+        results[f'{key}_makespan_reduction'] = report.makespan_reduction
+    return results
+
+
+def bench_sequencing(orders=(('cushioned chair', 4), ('desk', 3), ('table', 3), ('bed', 2), ('cutting board', 4),
+                                ('chair', 4), ('drawer', 3), ('sofa', 2))):
+    """Sequence the same order book with FIFO, the GreedyPolicy and the LocalSearchPolicy, and compare how many
+    sessions each needs, how long its plan takes to work through and how long it took to come up with"""
+    shop = build_shop([], 1)
+    for model in ('lathe', 'sander', 'work bench', 'planer', 'jointer', 'table saw', 'padder'):
+        shop.order_equipment(model)
+    results = {}
+    for name, policy in (('fifo', FifoPolicy()), ('greedy', GreedyPolicy()), ('local_search', LocalSearchPolicy())):
+        batcher = OrderBatcher(shop.workers[0], policy)
+        jobs = batcher.expand(orders)
+        start = time.perf_counter()
+        plan = batcher.plan(jobs)
+        results[f'{name}_plan_ms'] = (time.perf_counter() - start) * 1000
+        results[f'{name}_sessions'] = sum(changeovers(plan).values())
+        results[f'{name}_makespan'] = plan_cost(plan)
+    results['greedy_vs_fifo'] = 1 - results['greedy_makespan'] / results['fifo_makespan']
+    results['local_search_vs_fifo'] = 1 - results['local_search_makespan'] / results['fifo_makespan']
+    return results
+
+
+def bench_blueprint_allocations(item_name='chair', builds=1000):
+    """Build <builds> brand new Blueprints for <item_name>, keeping them all, and count with tracemalloc how many
+    memory blocks and bytes each one takes, and how many distinct Step objects they share between them"""
+    WoodObjectEncyclopedia.build_blueprint(item_name)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    blueprints = [WoodObjectEncyclopedia.build_blueprint(item_name) for i in range(builds)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = [stat for stat in after.compare_to(before, 'filename') if stat.count_diff > 0]
+    records = blueprints[0].new_records()
+    return {
+        'item': item_name,
+        'builds': builds,
+        'steps_per_blueprint': len(blueprints[0].steps),
+        'blocks_per_build': sum(stat.count_diff for stat in allocated) / builds,
+        'bytes_per_build': sum(stat.size_diff for stat in allocated) / builds,
+        'distinct_step_objects': len({id(step) for blueprint in blueprints for step in blueprint.steps}),
+        'bytes_per_step_record': sys.getsizeof(records[0]),
+    }
+
+
+# in a fresh interpreter: how long importing blueprints takes, then how long until every blueprint is built too,
+# which is what importing it used to cost when the encyclopedia built them all up front
+_EAGER_IMPORT = """
+import time
+start = time.perf_counter()
+import blueprints
+lazy = time.perf_counter() - start
+for item in blueprints.WoodObjectEncyclopedia.item_names():
+    blueprints.WoodObjectEncyclopedia.get_blueprint(item)
+print(lazy * 1000, (time.perf_counter() - start) * 1000)
+"""
+
+
+def bench_import_time(modules=('blueprints', 'worker', 'business'), runs=5):
+    """Import each of <modules> in a fresh interpreter with python -X importtime and report the best of <runs>
+    cumulative import times, in milliseconds. An uncached get_blueprint() of every item is timed too, as building
+    blueprints is the work that used to be done on import, and so is importing blueprints against importing it and
+    building every blueprint straight away, like it used to"""
+    results = {}
+    here = os.path.dirname(os.path.abspath(__file__))
+    lazy, eager = [], []
+    for i in range(runs):
+        finished = subprocess.run([sys.executable, '-c', _EAGER_IMPORT], cwd=here, capture_output=True, text=True,
+                                  check=True)
+        lazy_ms, eager_ms = map(float, finished.stdout.split())
+        lazy.append(lazy_ms)
+        eager.append(eager_ms)
+    results['lazy_blueprints_import_ms'] = min(lazy)
+    results['eager_blueprints_import_ms'] = min(eager)
+    results['import_saving'] = 1 - min(lazy) / min(eager)
+
+    for module in modules:
+        times = []
+        for i in range(runs):
+            finished = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                      cwd=here, capture_output=True, text=True, check=True)
+            for line in finished.stderr.splitlines():
+                fields = line.split('|')
+                if len(fields) == 3 and fields[2].strip() == module:
+                    times.append(int(fields[1]) / 1000)
+        results[f'{module}_import_ms'] = min(times)
+
+    WoodObjectEncyclopedia.clear_cache()
+    start = time.perf_counter()
+    for item in WoodObjectEncyclopedia.item_names():
+        WoodObjectEncyclopedia.get_blueprint(item)
+    results['first_get_blueprint_ms_per_item'] = (time.perf_counter() - start) * 1000 / len(
+        WoodObjectEncyclopedia.item_names())
+    return results
+
+
+def build_shop(tools, num_workers, bus=None):
+    """Set up a silent WoodShop on a VirtualClock with one of each of <tools>, which are ShopTool classes,
+    and <num_workers> Workers. Pass an EventBus as <bus> to hear what goes on"""
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=bus or events.EventBus(events.NullSink()))
+    for tool in tools:
+        shop.buy_equipment(tool())
+    for i in range(num_workers):
+        shop.hire_worker(Worker(f'Worker {i + 1}'))
+    return shop
+
+
+def bench_shop_catalog(machines=500):
+    """Stand up a WoodShop with <machines> tools spread over every model in its catalog, in a single
+    order_equipment() call per model, and report how long it takes"""
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    models = shop.catalog.models()
+    start = time.perf_counter()
+    bought = 0
+    for i, model in enumerate(models):
+        bought += len(shop.order_equipment(model, machines // len(models) + (i < machines % len(models))))
+    seconds = time.perf_counter() - start
+    return {
+        'machines': bought,
+        'models': len(models),
+        'seconds': seconds,
+        'us_per_machine': seconds / bought * 1e6,
+    }
+
+
+def bench_event_sinks(crafts=2000):
+    """Craft <crafts> chairs with each kind of sink listening, to see what reporting costs in the crafting hot path"""
+    sinks = {
+        'null': lambda: events.NullSink(),
+        'ring_buffer': lambda: events.RingBufferSink(),
+        'console': lambda: events.ConsoleSink(stream=io.StringIO()),
+    }
+    results = {'crafts': crafts}
+    for name, sink in sinks.items():
+        shop = build_shop([shop_tools.Lathe], 1, bus=events.EventBus(sink()))
+        worker = shop.workers[0]
+        worker.learn_blueprint('chair')
+        start = time.perf_counter()
+        for i in range(crafts):
+            worker.craft('chair')
+        results[f'{name}_us_per_craft'] = (time.perf_counter() - start) / crafts * 1e6
+    results['simulated_seconds_per_craft'] = worker.last_craft_time
+    return results
+
+
+def bench_glue_drying(orders=('chair', 'cutting board', 'table', 'drawer') * 5, num_workers=2):
+    """Schedule the same mix of <orders> twice, once with workers waiting around for glue to dry and once with them
+    getting on with other orders in the meantime, and compare how long the whole lot takes"""
+    tools = [shop_tools.Lathe, shop_tools.Lathe, shop_tools.WorkBench, shop_tools.WorkBench,
+             shop_tools.Jointer, shop_tools.Planer, shop_tools.Sander]
+    makespans = {}
+    for release in (False, True):
+        shop = build_shop([], num_workers)
+        scheduler = ShopScheduler(shop, equipment=[tool() for tool in tools], release_during_passive=release)
+        scheduler.add_orders(orders)
+        makespans[release] = scheduler.run().makespan
+
+    return {
+        'orders': len(orders),
+        'workers': num_workers,
+        'blocking_makespan': makespans[False],
+        'non_blocking_makespan': makespans[True],
+        'blocking_orders_per_hour': len(orders) * 3600 / makespans[False],
+        'non_blocking_orders_per_hour': len(orders) * 3600 / makespans[True],
+        'speedup': makespans[False] / makespans[True],
+    }
+
+
+def bench_tool_pool(chairs=10, num_workers=2, lathe_counts=(1, 2)):
+    """Have <num_workers> workers craft <chairs> chairs each side by side, in shops with each of <lathe_counts>
+    lathes and each tool selection strategy, and see how fast legs come off the lathes"""
+    async def keep_crafting(worker):
+        for i in range(chairs):
+            await worker.craft_async('chair')
+
+    async def craft_all(shop):
+        await asyncio.gather(*(keep_crafting(worker) for worker in shop.workers))
+
+    results = {}
+    for strategy in (LeastLoadedStrategy, RoundRobinStrategy, CheapestSetupStrategy):
+        label = strategy.__name__[:-len('Strategy')]
+        for lathes in lathe_counts:
+            shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()),
+                                     tool_selection=strategy())
+            shop.order_equipment('lathe', lathes)
+            for i in range(num_workers):
+                worker = Worker(f'Worker {i + 1}')
+                shop.hire_worker(worker)
+                worker.learn_blueprint('chair')
+            asyncio.run(craft_all(shop))
+            results[f'{label}_{lathes}_lathes_legs_per_minute'] = chairs * num_workers * 4 * 60 / shop.clock.now()
+        results[f'{label}_speedup'] = (results[f'{label}_{lathe_counts[-1]}_lathes_legs_per_minute'] /
+                                       results[f'{label}_{lathe_counts[0]}_lathes_legs_per_minute'])
+
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    shop.order_equipment('lathe', 8)
+    step = crafting_steps.TurningStep()
+    results['lookup_us_per_call'] = per_call(lambda: shop.lookup_tool_by_step(step), 20_000) * 1e6
+    return results
+
+
+class _ListDrawer:
+    """How the Drawer stored things before it was indexed, kept here so the two can be compared"""
+    def __init__(self):
+        self._stored_items = []
+
+    def store_item(self, item):
+        self._stored_items.append(item)
+
+    def retrieve_item(self, item):
+        return self._stored_items.pop(self._stored_items.index(item))
+
+
+def bench_drawer_storage(sizes=(100, 1000, 10_000, 100_000, 1_000_000), list_limit=10_000):
+    """Fill a Drawer with <size> Boards and take them all out again newest first, then fill it again and take them
+    out oldest first by type, for each of <sizes>.
+    The old list backed drawer is timed alongside for sizes up to <list_limit>, past which it takes far too long.
+    The indexed drawer should take about the same time per item no matter how full it is"""
+    results = {}
+    for size in sizes:
+        items = [Board() for i in range(size)]
+        drawers = {'indexed': Drawer(None)}
+        if size <= list_limit:
+            drawers['list'] = _ListDrawer()
+        for name, drawer in drawers.items():
+            start = time.perf_counter()
+            for item in items:
+                drawer.store_item(item)
+            stored = time.perf_counter() - start
+            # the old drawer searched from the front, so the newest things are the slowest to find
+            start = time.perf_counter()
+            for item in reversed(items):
+                drawer.retrieve_item(item)
+            retrieved = time.perf_counter() - start
+            results[f'{name}_{size}_store_us_per_item'] = stored / size * 1e6
+            results[f'{name}_{size}_retrieve_us_per_item'] = retrieved / size * 1e6
+
+        # a parts bin is emptied oldest first, one of a type at a time, which is the worst case for a plain dict
+        drawer = Drawer(None)
+        drawer.store_items(items)
+        start = time.perf_counter()
+        for item in items:
+            drawer.retrieve_type(Board)
+        results[f'indexed_{size}_retrieve_type_us_per_item'] = (time.perf_counter() - start) / size * 1e6
+    return results
+
+
+class _DictBoard:
+    """How every Board was stored before WoodObjects had slots, kept here so the two can be compared"""
+    def __init__(self):
+        self.name = 'Board'
+        self.is_planed = False
+        self.is_jointed = False
+        self.is_routed = False
+        self.is_sanded = False
+
+
+def bench_part_memory(parts=1_000_000):
+    """Make <parts> Boards, half of them planed, and measure the memory they take up per part and per million,
+    for the slotted Board and for the old dict backed one"""
+    results = {'parts': parts}
+    for name, board in (('dict', _DictBoard), ('slots', Board)):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        boards = [board() for i in range(parts)]
+        for b in boards[::2]:
+            b.is_planed = True
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del boards
+        results[f'{name}_bytes_per_part'] = used / parts
+        results[f'{name}_mb_per_million'] = used / parts * 1_000_000 / 2 ** 20
+    results['saving'] = 1 - results['slots_bytes_per_part'] / results['dict_bytes_per_part']
+    return results
+
+
+def bench_part_batch(parts=1_000_000, backend=None):
+    """Plane <parts> Boards and count how many are planed but not sanded, once part by part and once as a PartBatch
+    using <backend>, which defaults to NumPy if it's installed. Also times adding <parts> to a batch one by one"""
+    boards = [Board() for i in range(parts)]
+    planing = crafting_steps.PlaningStep()
+
+    start = time.perf_counter()
+    for board in boards:
+        board.set_planed()
+    objects_apply = time.perf_counter() - start
+    start = time.perf_counter()
+    objects_count = sum(1 for board in boards if board.is_planed and not board.is_sanded)
+    objects_query = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = PartBatch.from_parts(boards, backend)
+    convert = time.perf_counter() - start
+    start = time.perf_counter()
+    batch.apply_step(planing)
+    batch_apply = time.perf_counter() - start
+    start = time.perf_counter()
+    batch_count = batch.count(Board, is_planed=True, is_sanded=False)
+    batch_query = time.perf_counter() - start
+
+    # parts added one at a time, like they're made, and then looked at once
+    appended = PartBatch(backend)
+    start = time.perf_counter()
+    for i in range(parts):
+        appended.append(Board, PLANED)
+    appended.count(Board, is_planed=True)
+    append = time.perf_counter() - start
+
+    assert batch_count == objects_count
+    return {
+        'parts': parts,
+        'backend': batch.backend,
+        'objects_apply_us_per_part': objects_apply / parts * 1e6,
+        'batch_apply_us_per_part': batch_apply / parts * 1e6,
+        'objects_query_us_per_part': objects_query / parts * 1e6,
+        'batch_query_us_per_part': batch_query / parts * 1e6,
+        'from_parts_us_per_part': convert / parts * 1e6,
+        'append_us_per_part': append / parts * 1e6,
+        'apply_speedup': objects_apply / batch_apply,
+        'query_speedup': objects_query / batch_query,
+    }
+
+
+def bench_checkpoint_cost(crafts=2000, durable_crafts=100):
+    """Craft chairs with and without a CheckpointLog and work out what checkpointing costs per step, both just
+    flushed to the operating system and, for <durable_crafts> of them, synced to disk.
+    The cost is compared with the real time of the quickest step checkpointed, which is what it has to stay small
+    next to"""
+    directory = tempfile.mkdtemp()
+    steps = [step for step in WoodObjectEncyclopedia.get_blueprint('chair').steps if step.step_type == 'generation']
+    quickest_step = min(step.active_time for step in steps)
+    timings = {}
+    for name, number, log in (('none', crafts, None),
+                              ('flushed', crafts, CheckpointLog(os.path.join(directory, 'flushed.jsonl'))),
+                              ('durable', durable_crafts,
+                               CheckpointLog(os.path.join(directory, 'durable.jsonl'), durable=True))):
+        shop = build_shop([shop_tools.Lathe], 0)
+        worker = Worker('Worker 1', checkpoint=log)
+        shop.hire_worker(worker)
+        worker.learn_blueprint('chair')
+        start = time.perf_counter()
+        for i in range(number):
+            worker.craft('chair')
+        timings[name] = (time.perf_counter() - start) / (number * len(steps))
+        if log:
+            timings[f'{name}_bytes'] = os.path.getsize(log.path) / number
+            log.close()
+
+    flushed = timings['flushed'] - timings['none']
+    durable = timings['durable'] - timings['none']
+    return {
+        'crafts': crafts,
+        'flushed_us_per_step': flushed * 1e6,
+        'durable_us_per_step': durable * 1e6,
+        'bytes_per_craft': timings['flushed_bytes'],
+        'quickest_step_simulated_seconds': quickest_step,
+        'flushed_fraction_of_step': flushed / quickest_step,
+        'durable_fraction_of_step': durable / quickest_step,
+    }
+
+
+def bench_batch_scaling(orders=('chair', 'table', 'desk', 'cutting board') * 5000, process_counts=(1, 2, 4, 8)):
+    """Run the same order book on the same number of shop replicas with more and more processes. With a core for
+    every process the wall time should drop almost in proportion, and the simulated results shouldn't change at all"""
+    config = batch_runner.ShopConfig(('Lathe', 'Lathe', 'WorkBench', 'Sander', 'Jointer', 'Planer', 'TableSaw'), 2)
+    partitions = max(process_counts)
+    results = {'orders': len(orders), 'partitions': partitions, 'cpus': os.cpu_count()}
+    baseline = None
+    for processes in process_counts:
+        report = batch_runner.run_batch(config, orders, processes, partitions)
+        baseline = baseline or report
+        assert report.items == baseline.items and report.makespan == baseline.makespan
+        results[f'{processes}_process_us_per_order'] = report.wall_seconds / len(orders) * 1e6
+        results[f'{processes}_process_speedup'] = baseline.wall_seconds / report.wall_seconds
+    results['simulated_makespan'] = baseline.makespan
+    return results
+
+
+# where the baseline is kept unless --baseline says otherwise
+BASELINE_PATH = 'benchmark_baseline.json'
+
+# every benchmark in the suite, with the arguments for a full run and for a --quick one
+BENCHMARKS = {
+    'blueprint_items': (bench_blueprint_items, {}, {'calls': 2000}),
+    'get_blueprint': (bench_get_blueprint, {}, {'calls': 10_000}),
+    'blueprint_allocations': (bench_blueprint_allocations, {}, {'builds': 200}),
+    'assembly_time': (bench_assembly_time, {}, {'calls': 10_000}),
+    'step_acceptance': (bench_step_acceptance, {}, {'calls': 20_000}),
+    'craft': (bench_craft, {}, {'crafts': 100}),
+    'profiling': (bench_profiling, {}, {'crafts': 100}),
+    'order_batching': (bench_order_batching, {}, {}),
+    'sequencing': (bench_sequencing, {}, {}),
+    'tool_pool': (bench_tool_pool, {}, {'chairs': 3}),
+    'event_sinks': (bench_event_sinks, {}, {'crafts': 200}),
+    'shop_catalog': (bench_shop_catalog, {}, {}),
+    'glue_drying': (bench_glue_drying, {}, {}),
+    'drawer_storage': (bench_drawer_storage, {}, {'sizes': (100, 1000, 10_000)}),
+    'part_memory': (bench_part_memory, {}, {'parts': 100_000}),
+    'part_batch': (bench_part_batch, {}, {'parts': 100_000}),
+    'checkpoint_cost': (bench_checkpoint_cost, {}, {'crafts': 200, 'durable_crafts': 20}),
+    'import_time': (bench_import_time, {}, {'runs': 2}),
+    'batch_scaling': (bench_batch_scaling, {}, {'orders': ('chair', 'table') * 500, 'process_counts': (1, 2)}),
+}
+
+# a measurement is a timing, where lower is better, if its name has seconds, ms or us in it, unless it's time on a
+# VirtualClock, which is marked simulated. Simulated time only changes when the model does, so it's no regression
+TIMING = re.compile(r'(^|_)(seconds|ms|us)(_|$)')
+SIMULATED = re.compile(r'(^|_)simulated(_|$)')
+
+# a timing which got slower than the baseline by more than the tolerance
+Regression = namedtuple('Regression', 'benchmark measurement baseline result change')
+
+
+def is_timing(measurement):
+    """Returns true if <measurement> is a real timing, which is worse when it goes up"""
+    return bool(TIMING.search(measurement)) and not SIMULATED.search(measurement)
+
+
+def run_benchmarks(names=None, quick=False, report=None):
+    """Run the benchmarks in <names>, or all of them, on a VirtualClock with nothing listening to the events.
+    Returns a dict of benchmark name: measurements. <report> is called with each name and result as it finishes"""
+    previous_clock = clocks.set_default_clock(clocks.VirtualClock())
+    previous_bus = events.set_event_bus(events.EventBus(events.NullSink()))
+    results = {}
+    try:
+        for name in names or BENCHMARKS:
+            bench, full, fast = BENCHMARKS[name]
+            results[name] = bench(**(fast if quick else full))
+            if report:
+                report(name, results[name])
+    finally:
+        clocks.set_default_clock(previous_clock)
+        events.set_event_bus(previous_bus)
+    return results
+
+
+def save_results(results, path, quick=False):
+    """Write <results> to <path> as JSON, along with enough about the machine to know what they're comparable to"""
+    document = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'quick': quick,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, sort_keys=True, default=str)
+
+
+def load_results(path):
+    """Return everything save_results() wrote to <path>: the results along with what they were run on"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Return a Regression for every timing in <results> which is more than <tolerance> slower than the same one in
+    <baseline>. Measurements missing from either side are skipped"""
+    regressions = []
+    for name, measurements in results.items():
+        for measurement, value in measurements.items():
+            before = baseline.get(name, {}).get(measurement)
+            if not is_timing(measurement) or not isinstance(value, (int, float)) or not before:
+                continue
+            change = value / before - 1
+            if change > tolerance:
+                regressions.append(Regression(name, measurement, before, value, change))
+    return regressions
+
+
+def show(name, results):
+    print(name)
+    for key, value in results.items():
+        if isinstance(value, float):
+            value = f'{value:.6g}'
+        print(f'    {key}: {value}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths of the WoodShop')
+    parser.add_argument('names', nargs='*', choices=[[]] + list(BENCHMARKS), metavar='benchmark',
+                        help=f'which benchmarks to run, out of {", ".join(BENCHMARKS)}. Defaults to all of them')
+    parser.add_argument('--quick', action='store_true', help='run smaller versions of every benchmark')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='the JSON file of results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results to the baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='how much slower than the baseline a timing can be, e.g. 0.2 for 20%%')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.names, args.quick, report=show)
+    if args.output:
+        save_results(results, args.output, args.quick)
+    if args.save_baseline:
+        save_results(results, args.baseline, args.quick)
+    elif os.path.exists(args.baseline):
+        baseline = load_results(args.baseline)
+        if baseline.get('quick') != args.quick:
+            # a quick run works on far less than a full one, so their timings can't be set side by side
+            print(f'Not comparing against {args.baseline}: it was a {"quick" if baseline.get("quick") else "full"} '
+                  f'run and this was a {"quick" if args.quick else "full"} one')
+            sys.exit(0)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        for r in regressions:
+            print(f'REGRESSION {r.benchmark}.{r.measurement}: {r.baseline:.6g} -> {r.result:.6g} ({r.change:+.0%})')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions against {args.baseline}')
@@ -1,8 +1,9 @@
-from collections import namedtuple
+from collections import Counter, namedtuple
+from functools import lru_cache
 import crafting_steps as cs
-from wood_objects import RoundLeg, SquareLeg, Board
 
 DEFAULT_NUM_LEGS = 4
+BLUEPRINT_CACHE_SIZE = 256
 
 
 class Blueprint:
@@ -12,21 +13,32 @@ class Blueprint:
             steps
             req_tools -- the ShopTools necessary to successfully complete the blueprint
             req_parts -- the FurnitureComponents necessary to successfully complete the blueprint
+            tool_set -- req_tools as a frozenset, for quick membership checks
+            part_counts -- how many of each FurnitureComponent req_parts calls for
+            assembly_time
+            dependencies -- for each step, the positions in steps of the steps which have to be finished first
 
         Defines the following methods:
             _calculate_assembly_time()
+            _calculate_dependencies()
+            _calculate_requirements()
             _calculate_turning_steps()
+            new_records()
             show_remaining_steps()
 
     """
 
     def __init__(self, name, design, **kwargs):
         self.name = name
+        # the Design is a template shared by every blueprint of this kind, so it's never changed.
+        # Anything a particular blueprint adds, like its turning steps, goes into a new tuple of its own
         self.steps = design.steps
         self.req_tools = design.req_tools
         self.req_parts = design.req_parts
         self._calculate_turning_steps()
         self._calculate_assembly_time()
+        self._calculate_requirements()
+        self._calculate_dependencies()
 
     def _calculate_assembly_time(self):
         """Add together all the times of each of the steps to arrive at the total length of time to fully complete"""
@@ -34,17 +46,48 @@ class Blueprint:
         for step in self.steps:
             self.assembly_time += step.time_to_complete
 
+    def _calculate_dependencies(self):
+        """Work out which steps have to wait on which, based on what kind of step they are.
+        GenerationSteps make new parts out of nothing, so they can all start straight away.
+        AlterationSteps work on one set of parts, one after another. If the blueprint starts from req_parts they work
+        on those and don't need to wait for anything, otherwise they wait for all the generated parts.
+        AssemblySteps are done one after another, and the first one waits for every part to be made and altered"""
+        generation = [i for i, step in enumerate(self.steps) if step.step_type == 'generation']
+        alteration = [i for i, step in enumerate(self.steps) if step.step_type == 'alteration']
+        dependencies = [() for step in self.steps]
+
+        previous = () if self.req_parts else tuple(generation)
+        for i in alteration:
+            dependencies[i] = previous
+            previous = (i,)
+
+        previous = tuple(generation) + tuple(alteration[-1:])
+        for i, step in enumerate(self.steps):
+            if step.step_type == 'assembly':
+                dependencies[i] = previous
+                previous = (i,)
+
+        self.dependencies = tuple(dependencies)
+
+    def _calculate_requirements(self):
+        """Work out the set of tools and the count of each part needed, once, so nobody has to walk the lists again"""
+        self.tool_set = frozenset(self.req_tools)
+        self.part_counts = Counter(self.req_parts)
+
     def _calculate_turning_steps(self):
         """Based on the number of legs, calculate how many turning steps are necessary.
         Won't break if passed a negative number of steps, but it doesn't make a lot of sense"""
         if hasattr(self, 'num_legs'):
-            for i in range(self.num_legs):
-                self.steps.insert(0, cs.TurningStep())
+            self.steps = (cs.TurningStep(),) * self.num_legs + self.steps
+
+    def new_records(self):
+        """Return a fresh StepRecord for each of our steps, to keep track of working through them once"""
+        return tuple(cs.StepRecord(step) for step in self.steps)
 
-    def show_remaining_steps(self):
-        """Print out the steps left to be completed"""
+    def show_remaining_steps(self, records):
+        """Print out the steps left to be completed in <records>, which come from new_records()"""
         print('Steps left to complete: ')
-        for s in (filter(lambda e: not e.is_completed, self.steps)):
+        for s in (filter(lambda e: not e.is_completed, records)):
             print(s, end=', ')
 
 
@@ -115,84 +158,132 @@ class UnknownItemError(KeyError):
         super().__init__(f'An object of name "{item_name}" does not exist in the Encyclopedia')
 
 
+class InvalidDesignError(Exception):
+    """Used when an item in the WoodObjectEncyclopedia names a Blueprint, Step, or part which doesn't exist"""
+    def __init__(self, item_name, missing):
+        super().__init__(f'The design for "{item_name}" refers to something that does not exist: {missing}')
+
+
 class WoodObjectEncyclopedia:
     """This class stores all the information about creating furniture
-    This information takes the form of a namedtuple called Furniture
-    which stores the class--called constructor--the steps to craft, and required tools for assembly
+    Every item is written down as plain data in __catalogue, just names, and only turned into a Design, a
+    namedtuple holding the class--called constructor--the steps to craft, and required tools for assembly,
+    the first time a blueprint for it is asked for. Importing the encyclopedia doesn't make a single Step or touch
+    wood_objects, however many items it lists.
 
         Defines the following attributes:
             __name
             Design, a namedtuple
-            __item_dict
+            __catalogue -- item name: (Blueprint class, step names, tool names, part names)
+            __designs -- the Designs compiled so far
 
         Defines the following methods:
-            get_item(), a static method
+            get_blueprint(), a static method
+            build_blueprint(), a static method
+            register_design(), a static method
+            item_names(), a static method
+            cache_info(), a static method
+            clear_cache(), a static method
+            __get_design(), a static method
+            __compile_blueprint(), a static method
     """
     __name = 'Encyclopedia of Wood'
     Design = namedtuple('Design', 'constructor steps req_tools req_parts')
 
+    # Steps are named without the 'Step', so 'Sanding' is a crafting_steps.SandingStep, and parts are the names of
+    # wood_objects classes.
     # chairs, desks, and tables, even though they require the Lathe, get passed neither TurningSteps nor Legs as those
     # are handled by the Blueprint parent class based on the number of legs passed to the constructor
-    __item_dict = {
-        'chair': Design(
-            ChairBlueprint,
-            [cs.SandingStep(), cs.GluingStep(), cs.FasteningStep()],
-            ['Lathe', 'Sander'],
-            [Board, Board, Board, Board]
-        ),
-        'cushioned chair': Design(
-            CushionedChairBlueprint,
-            [cs.SandingStep(), cs.GluingStep(), cs.FasteningStep(), cs.PaddingStep()],
-            ['Lathe', 'Sander', 'Padder'],
-            [Board, Board, Board, Board]
-        ),
-        'desk': Design(
-            DeskBlueprint,
-            [cs.CuttingStep(), cs.PlaningStep(), cs.JointingStep(), cs.SandingStep(), cs.FasteningStep()],
-            ['Lathe', 'Planer', 'Jointer', 'Sander'],
-            [Board, Board]
-        ),
-        'table': Design(
-            TableBlueprint,
-            [cs.TurningStep(), cs.JointingStep(), cs.PlaningStep(),
-             cs.GluingStep(), cs.FasteningStep(), cs.SandingStep()],
-            ['Lathe', 'Jointer', 'Planer', 'Sander'],
-            []
-        ),
-        'drawer': Design(
-            DrawerBlueprint,
-            [cs.JointingStep(), cs.PlaningStep(), cs.SandingStep, cs.GluingStep()],
-            ['Sander', 'Jointer', 'Planer'],
-            []
-        ),
-        'bed': Design(
-            BedBlueprint,
-            [cs.JointingStep(), cs.PlaningStep(), cs.PaddingStep(), cs.FasteningStep()],
-            ['Jointer', 'Planer', 'Padder'],
-            []
-        ),
-        'sofa': Design(
-            SofaBlueprint,
-            [cs.JointingStep(), cs.PlaningStep(), cs.PaddingStep(), cs.FasteningStep()],
-            ['Jointer', 'Planer', 'Padder'],
-            []
-        ),
-        'cutting board': Design(
-            CuttingBoardBlueprint,
-            [cs.JointingStep(), cs.PlaningStep(), cs.SandingStep(), cs.GluingStep()],
-            ['Sander', 'Jointer', 'Planer'],
-            []
-        )
+    __catalogue = {
+        'chair': ('ChairBlueprint', ('Sanding', 'Gluing', 'Fastening'), ('Lathe', 'Sander'), ('Board',) * 4),
+        'cushioned chair': ('CushionedChairBlueprint', ('Sanding', 'Gluing', 'Fastening', 'Padding'),
+                            ('Lathe', 'Sander', 'Padder'), ('Board',) * 4),
+        'desk': ('DeskBlueprint', ('Cutting', 'Planing', 'Jointing', 'Sanding', 'Fastening'),
+                 ('Lathe', 'Planer', 'Jointer', 'Sander'), ('Board',) * 2),
+        'table': ('TableBlueprint', ('Turning', 'Jointing', 'Planing', 'Gluing', 'Fastening', 'Sanding'),
+                  ('Lathe', 'Jointer', 'Planer', 'Sander'), ()),
+        'drawer': ('DrawerBlueprint', ('Jointing', 'Planing', 'Sanding', 'Gluing'), ('Sander', 'Jointer', 'Planer'), ()),
+        'bed': ('BedBlueprint', ('Jointing', 'Planing', 'Padding', 'Fastening'), ('Jointer', 'Planer', 'Padder'), ()),
+        'sofa': ('SofaBlueprint', ('Jointing', 'Planing', 'Padding', 'Fastening'), ('Jointer', 'Planer', 'Padder'), ()),
+        'cutting board': ('CuttingBoardBlueprint', ('Jointing', 'Planing', 'Sanding', 'Gluing'),
+                          ('Sander', 'Jointer', 'Planer'), ()),
     }
+    __designs = {}
 
     @staticmethod
-    def get_blueprint(item_name):
-        """Return a concrete implementation of a Blueprint based on <item_name>"""
-        design = WoodObjectEncyclopedia.__item_dict.get(item_name)
+    def register_design(item_name, constructor, steps, req_tools, req_parts=()):
+        """Add <item_name> to the encyclopedia, or replace it. Everything is given by name just like the rest of
+        the catalogue, e.g. register_design('stool', 'ChairBlueprint', ('Sanding', 'Fastening'), ('Lathe',)),
+        and nothing is looked up until a blueprint for it is asked for"""
+        WoodObjectEncyclopedia.__catalogue[item_name] = (constructor, tuple(steps), tuple(req_tools), tuple(req_parts))
+        WoodObjectEncyclopedia.__designs.pop(item_name, None)
+        WoodObjectEncyclopedia.clear_cache()
 
-        if not design:
+    @staticmethod
+    def item_names():
+        return tuple(WoodObjectEncyclopedia.__catalogue)
+
+    @staticmethod
+    def __get_design(item_name):
+        """Return the Design for <item_name>, compiling it from the catalogue the first time it's asked for"""
+        design = WoodObjectEncyclopedia.__designs.get(item_name)
+        if design is not None:
+            return design
+        entry = WoodObjectEncyclopedia.__catalogue.get(item_name)
+        if entry is None:
             raise UnknownItemError(item_name)
-        return design.constructor(design)
+
+        constructor, step_names, req_tools, part_names = entry
+        # only imported once a blueprint is built, so importing the encyclopedia doesn't pay for it
+        import wood_objects
+        try:
+            design = WoodObjectEncyclopedia.Design(
+                globals()[constructor],
+                tuple(getattr(cs, f'{name}Step')() for name in step_names),
+                req_tools,
+                tuple(getattr(wood_objects, name) for name in part_names)
+            )
+        except (KeyError, AttributeError) as e:
+            raise InvalidDesignError(item_name, e) from e
+        WoodObjectEncyclopedia.__designs[item_name] = design
+        return design
+
+    @staticmethod
+    def build_blueprint(item_name, **kwargs):
+        """Construct a brand new Blueprint based on <item_name>, skipping the cache.
+        Any <kwargs>, like num_legs, are passed on to the Blueprint"""
+        design = WoodObjectEncyclopedia.__get_design(item_name)
+        return design.constructor(design, **kwargs)
+
+    @staticmethod
+    @lru_cache(maxsize=BLUEPRINT_CACHE_SIZE)
+    def __compile_blueprint(item_name, construction_kwargs):
+        """Build the blueprint for <item_name> once and hand back the same one for every identical request.
+        <construction_kwargs> is a sorted tuple of (name, value) pairs so it can be part of the cache key"""
+        return WoodObjectEncyclopedia.build_blueprint(item_name, **dict(construction_kwargs))
+
+    @staticmethod
+    def get_blueprint(item_name, **kwargs):
+        """Return a concrete implementation of a Blueprint based on <item_name>.
+        Any <kwargs>, like num_legs, are passed on to the Blueprint.
+        Blueprints are compiled once per item and kwargs and then shared, with the least recently used ones
+        dropped when there are more than BLUEPRINT_CACHE_SIZE of them"""
+        construction_kwargs = tuple(sorted(kwargs.items()))
+        try:
+            hash(construction_kwargs)
+        except TypeError:
+            # something in kwargs can't be hashed, so it can't be cached either
+            return WoodObjectEncyclopedia.build_blueprint(item_name, **kwargs)
+        return WoodObjectEncyclopedia.__compile_blueprint(item_name, construction_kwargs)
+
+    @staticmethod
+    def cache_info():
+        """Return the hits, misses, maxsize and current size of the blueprint cache"""
+        return WoodObjectEncyclopedia.__compile_blueprint.cache_info()
+
+    @staticmethod
+    def clear_cache():
+        WoodObjectEncyclopedia.__compile_blueprint.cache_clear()
 
 
 if __name__ == '__main__':
@@ -1,4 +1,8 @@
+import clocks
+import events
+from inventory_manager import InventoryManager
 from shop_tools import ShopCatalog
+from tool_pool import LeastLoadedStrategy, ToolPool
 
 
 class Business:
@@ -6,21 +10,62 @@ class Business:
     A class which does a thing
         Defines the following attributes:
             name
-            equipment
+            equipment -- tool name: the ToolPool of every tool of that name we own
             workers
+            inventory -- the InventoryManager every worker we hire puts their parts in and takes them from
+            tool_selection -- the SelectionStrategy which picks a tool when more than one can do a step.
+                              Defaults to a LeastLoadedStrategy
+            __clock
+            __events
+            __tools_by_step -- which of our tools can perform each kind of Step, kept up to date by buy_equipment()
 
         Defines the following properties:
+            clock -- shared with every tool bought and every worker hired. Falls back to the default clock
+            events -- the EventBus, likewise shared. Falls back to the default bus
 
         Defines the following methods:
+            buy_equipment()
+            hire_worker()
+            tools()
+            tool_runs()
+            lookup_tool_by_step()
+            lookup_tools_by_step()
     """
 
-    def __init__(self, name):
+    def __init__(self, name, clock=None, events=None, tool_selection=None):
         self.name = name
         self.owner = ''
         self.equipment = {}
         self.workers = []
+        self.inventory = InventoryManager()
+        self.tool_selection = tool_selection or LeastLoadedStrategy()
+        self.__clock = clock
+        self.__events = events
+        self.__tools_by_step = {}
         self.__owner_possessive = ''
-        self.__set_possesive(self.owner)
+        self.__set_possessive(self.owner)
+
+    @property
+    def clock(self):
+        return self.__clock or clocks.get_default_clock()
+
+    @clock.setter
+    def clock(self, clock):
+        """Swap the clock for the business and everything in it, e.g. to simulate a day in the shop"""
+        self.__clock = clock
+        for equipment in self.tools():
+            equipment.clock = clock
+
+    @property
+    def events(self):
+        return self.__events or events.get_event_bus()
+
+    @events.setter
+    def events(self, bus):
+        """Swap the EventBus for the business and everything in it, e.g. to run silently"""
+        self.__events = bus
+        for equipment in self.tools():
+            equipment.events = bus
 
     def __set_possessive(self, word):
         if word.endswith('s'):
@@ -41,36 +86,81 @@ class Business:
         self.owner = owner
 
     def buy_equipment(self, equipment):
-        # self.equipment.append(equipment)
-        self.equipment.update({equipment.name: equipment})
-        print(f'{self.name} is now the proud owner of a {equipment.name}')
+        """Add <equipment> to the pool of tools of its name, so a second lathe works alongside the first"""
+        if self.__clock:
+            equipment.clock = self.__clock
+        if self.__events:
+            equipment.events = self.__events
+        pool = self.equipment.get(equipment.name)
+        if pool is None:
+            pool = self.equipment[equipment.name] = ToolPool(equipment.name)
+        pool.add(equipment)
+        for step_class in equipment.acceptable_steps:
+            self.__tools_by_step.setdefault(step_class, []).append(equipment)
+        self.events.publish(events.EquipmentBought(self.name, equipment.name), self.clock.now())
 
     def hire_worker(self, worker):
         self.workers.append(worker)
         worker.assign_to_business(self)
 
+    def tools(self):
+        """Yield every tool we own"""
+        for pool in self.equipment.values():
+            yield from pool
+
+    def tool_runs(self, records):
+        """Split <records>, StepRecords in the order they're to be done, into runs which can each be done on one
+        tool, and yield each tool with its run as a list. A run stays on the tool it started on for as long as that
+        tool can do the next step, so our tool_selection is only asked when it has to move to another one.
+        The tool is None if we have nothing which can do the steps of the run"""
+        tool = None
+        run = []
+        for record in records:
+            if tool is None or not tool.accepts(record.step):
+                if run:
+                    yield tool, run
+                tool = self.lookup_tool_by_step(record.step)
+                run = []
+            run.append(record)
+        if run:
+            yield tool, run
+
+    def lookup_tools_by_step(self, step):
+        """Return every tool we own which can perform <step>, or an empty list if we have none.
+        The list is our own index, so look but don't touch"""
+        tools = self.__tools_by_step.get(type(step))
+        if tools is None:
+            # <step> might be a subclass of a kind of step a tool knows about
+            tools = []
+            for step_class in type(step).__mro__[1:]:
+                tools.extend(self.__tools_by_step.get(step_class, []))
+        return tools
+
     def lookup_tool_by_step(self, step):
-        return self.equipment.get(step.name)
+        """Return the tool our tool_selection picks to perform <step>, one nobody is using if there is one.
+        Returns None if we have none"""
+        return self.tool_selection.select(self.lookup_tools_by_step(step), step)
 
 
 class WoodShop(Business):
     """
     A class which does a thing
         Defines the following attributes:
-            catalog
+            catalog -- the ShopCatalog we buy our tools from
 
         Defines the following properties:
 
         Defines the following methods:
-            lookup_tool_by_step()
+            order_equipment()
     """
-    def __init__(self):
+    def __init__(self, clock=None, events=None, tool_selection=None):
         self.name = 'Woodshop'
         self.catalog = ShopCatalog()
-        super().__init__(self.name)
-
-    def lookup_tool_by_step(self, step):
-        if step.name == 'Turning':
-            return self.equipment.get('lathe')
-        if step.name == 'Drilling':
-            pass
+        super().__init__(self.name, clock, events, tool_selection)
+
+    def order_equipment(self, model, quantity=1, **overrides):
+        """Buy <quantity> of <model> from our catalog, e.g. order_equipment('lathe', 20), and return them"""
+        tools = self.catalog.build(model, quantity, **overrides)
+        for tool in tools:
+            self.buy_equipment(tool)
+        return tools
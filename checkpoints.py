@@ -0,0 +1,198 @@
+import json
+import os
+import wood_objects
+from blueprints import WoodObjectEncyclopedia
+from jobs import Job, reserve_job_ids
+
+# every line of a checkpoint is a short JSON list starting with one of these
+JOB_STARTED = 'S'   # [S, job_id, worker, item, num_legs]
+STEP_DONE = 'D'     # [D, job_id, position of the step in the blueprint]
+PART_MADE = 'P'     # [P, job_id, part class, flags]
+JOB_FINISHED = 'F'  # [F, job_id]
+
+
+class CheckpointLog:
+    """
+    An append-only log of the progress of every Job a Worker takes on, so a craft which dies half way through can be
+    picked up from its last completed step instead of starting over. Nothing is ever rewritten, each step done or
+    part made is one short line tacked on the end, and a line cut short by a crash is simply ignored on reading.
+    Each line is written straight through to the operating system, so it survives the process dying.
+    With <durable> True it's also synced to disk, so it survives the machine dying, at a much higher cost.
+        Defines the following attributes:
+            path
+            durable
+            __file
+
+        Defines the following methods:
+            job_started()
+            step_done()
+            part_made()
+            job_finished()
+            read()
+            partial_jobs()
+            compact()
+            close()
+            _write()
+    """
+    def __init__(self, path, durable=False):
+        self.path = path
+        self.durable = durable
+        self.__file = open(path, 'a', encoding='utf-8')
+        # job ids start from 1 again in every process, so carry on from the log instead of reusing them
+        highest = max((line[1] for line in self.read()), default=None)
+        if highest is not None:
+            reserve_job_ids(highest)
+
+    def _write(self, line):
+        self.__file.write(json.dumps(line, separators=(',', ':')) + '\n')
+        self.__file.flush()
+        if self.durable:
+            os.fsync(self.__file.fileno())
+
+    def job_started(self, job, worker_name):
+        self._write([JOB_STARTED, job.job_id, worker_name, job.blueprint.name,
+                     getattr(job.blueprint, 'num_legs', None)])
+
+    def step_done(self, job, position):
+        self._write([STEP_DONE, job.job_id, position])
+
+    def part_made(self, job, part):
+        self._write([PART_MADE, job.job_id, type(part).__name__, part._flags])
+
+    def job_finished(self, job):
+        self._write([JOB_FINISHED, job.job_id])
+
+    def read(self):
+        """Yield every complete line of the log as a list"""
+        self.__file.flush()
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # the process died part way through writing this one
+                    continue
+
+    def partial_jobs(self, worker_name=None):
+        """Rebuild every Job in the log which was started and never finished, with the steps it had done marked as
+        completed and the parts it had made. Returns a dict of worker name: [Job], oldest first, or just the list
+        for <worker_name> if it's given"""
+        jobs = {}
+        owners = {}
+        highest = None
+        for line in self.read():
+            kind, job_id = line[0], line[1]
+            highest = job_id if highest is None else max(highest, job_id)
+            if kind == JOB_STARTED:
+                item, num_legs = line[3], line[4]
+                kwargs = {'num_legs': num_legs} if num_legs is not None else {}
+                jobs[job_id] = Job(WoodObjectEncyclopedia.get_blueprint(item, **kwargs), job_id)
+                owners[job_id] = line[2]
+            elif job_id not in jobs:
+                continue
+            elif kind == STEP_DONE:
+                jobs[job_id].records[line[2]].set_completed()
+            elif kind == PART_MADE:
+                part = getattr(wood_objects, line[2])()
+                part._flags = line[3]
+                jobs[job_id].parts.append(part)
+            elif kind == JOB_FINISHED:
+                del jobs[job_id]
+                del owners[job_id]
+
+        if highest is not None:
+            reserve_job_ids(highest)
+        by_worker = {}
+        for job_id, job in jobs.items():
+            by_worker.setdefault(owners[job_id], []).append(job)
+        if worker_name is not None:
+            return by_worker.get(worker_name, [])
+        return by_worker
+
+    def compact(self):
+        """Rewrite the log with only the jobs which are still unfinished, so it doesn't grow forever.
+        Every job is dropped from its S line to its matching F line, so a job which reused the id of a finished
+        one, like in a log written before ids were carried on from it, is kept.
+        It's written to a new file first and swapped in, so a crash part way through loses nothing"""
+        lines = list(self.read())
+        kept = []
+        unfinished = {}
+        for position, line in enumerate(lines):
+            kind, job_id = line[0], line[1]
+            if kind == JOB_STARTED:
+                # like partial_jobs(), a second S for the same id replaces the first
+                unfinished[job_id] = [position]
+            elif job_id not in unfinished:
+                continue
+            elif kind == JOB_FINISHED:
+                del unfinished[job_id]
+            else:
+                unfinished[job_id].append(position)
+        for positions in unfinished.values():
+            kept.extend(positions)
+
+        compacted = f'{self.path}.compacting'
+        with open(compacted, 'w', encoding='utf-8') as f:
+            for position in sorted(kept):
+                f.write(json.dumps(lines[position], separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.__file.close()
+        os.replace(compacted, self.path)
+        self.__file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        if not self.__file.closed:
+            self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == '__main__':
+    import tempfile
+    import business
+    import clocks
+    import events
+    import shop_tools
+    from worker import Worker
+
+    path = os.path.join(tempfile.mkdtemp(), 'checkpoints.jsonl')
+    quiet = events.EventBus(events.NullSink())
+
+    class PowerCut(Exception):
+        pass
+
+    class FlakyLathe(shop_tools.Lathe):
+        """A lathe on a dodgy circuit which loses power after turning two legs"""
+        uses_left = 2
+
+        def use(self, step):
+            if not self.uses_left:
+                raise PowerCut('The power went out!')
+            self.uses_left -= 1
+            return super().use(step)
+
+    # the first worker gets half way through a chair before the power goes
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=quiet)
+    shop.buy_equipment(FlakyLathe())
+    worker = Worker('Miles Head', checkpoint=CheckpointLog(path))
+    shop.hire_worker(worker)
+    worker.learn_blueprint('chair')
+    try:
+        worker.craft('chair')
+    except PowerCut as e:
+        print(e)
+    worker.checkpoint.close()
+
+    # and after a restart picks up where they left off
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=quiet)
+    shop.buy_equipment(shop_tools.Lathe())
+    with CheckpointLog(path) as log:
+        worker = Worker('Miles Head', checkpoint=log)
+        shop.hire_worker(worker)
+        print('Picking up', worker.restore_jobs())
+        print(f'Finished them in {worker.resume_jobs():.1f} seconds, {len(worker.partial_jobs)} left')
@@ -0,0 +1,177 @@
+import heapq
+import time
+from events import get_event_bus
+
+# how many turns of the event loop a VirtualClock gives its other tasks to catch up before it moves time forward
+SETTLE_ROUNDS = 3
+
+
+class Clock:
+    """Base class for all clocks. Steps, ShopTools, Workers and Businesses ask their clock to wait instead of
+    calling time.sleep() themselves, so the same crafting code can run in real time or in simulated time.
+        Defines the following methods:
+            now() -- the current time in seconds
+            sleep() -- wait for a number of seconds
+            sleep_async() -- wait for a number of seconds without blocking the event loop
+            run() -- wait out each of the waits yielded by a generator
+            run_async()
+            elapsed_since()
+    """
+    def now(self):
+        raise NotImplementedError
+
+    def sleep(self, seconds):
+        raise NotImplementedError
+
+    async def sleep_async(self, seconds):
+        raise NotImplementedError
+
+    def run(self, waits, events=None):
+        """Sleep through every wait, in seconds, yielded by the generator <waits> and return whatever it returns.
+        This is how Steps and ShopTools share one description of their work between the blocking and async APIs.
+        Anything else yielded is an event record, which is published on the EventBus <events>, or the default one,
+        stamped with the time it happened"""
+        events = events or get_event_bus()
+        try:
+            while True:
+                wait = next(waits)
+                if isinstance(wait, tuple):
+                    if events.enabled:
+                        events.publish(wait, self.now())
+                else:
+                    self.sleep(wait)
+        except StopIteration as finished:
+            return finished.value
+
+    async def run_async(self, waits, events=None):
+        """Just like run() but awaits each wait, so other tasks carry on in the meantime"""
+        events = events or get_event_bus()
+        try:
+            while True:
+                wait = next(waits)
+                if isinstance(wait, tuple):
+                    if events.enabled:
+                        events.publish(wait, self.now())
+                else:
+                    await self.sleep_async(wait)
+        except StopIteration as finished:
+            return finished.value
+
+    def elapsed_since(self, start):
+        """Return how many seconds have passed since <start>, which should come from now()"""
+        return self.now() - start
+
+
+class RealClock(Clock):
+    """A clock which follows the wall clock and really waits when asked to sleep"""
+    def now(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    async def sleep_async(self, seconds):
+        import asyncio
+        await asyncio.sleep(max(seconds, 0))
+
+
+class VirtualClock(Clock):
+    """A discrete-event clock. Sleeping doesn't wait at all, it just moves simulated time forward,
+    so thousands of crafts can be run in the blink of an eye while still adding up to the right durations.
+    Async sleepers share the clock: time only moves forward once every task has settled into a sleep,
+    and then only as far as the earliest one to wake up, so crafts running side by side overlap properly.
+    Awaiting anything other than the clock in between sleeps can let time jump ahead of a task.
+        Defines the following attributes:
+            __now
+            __sleepers -- a heap of (wake up time, ticket, future) for everything waiting in sleep_async()
+            __tickets
+            __waking
+
+        Defines the following methods:
+            advance_to()
+            _wake_next()
+    """
+    def __init__(self, start=0):
+        self.__now = start
+        self.__sleepers = []
+        self.__tickets = 0
+        self.__waking = False
+
+    def now(self):
+        return self.__now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.__now += seconds
+
+    async def sleep_async(self, seconds):
+        # asyncio is slow to import and only needed by the async API, so it's imported the first time it's used
+        import asyncio
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        loop = asyncio.get_running_loop()
+        wake_up = loop.create_future()
+        heapq.heappush(self.__sleepers, (self.__now + seconds, self.__tickets, wake_up))
+        self.__tickets += 1
+        if not self.__waking:
+            self.__waking = True
+            loop.call_soon(self._wake_next, loop, SETTLE_ROUNDS)
+        await wake_up
+
+    def _wake_next(self, loop, rounds):
+        """Give every other task <rounds> turns of the event loop to get to its next sleep, then move time forward
+        to the earliest wake up time and wake everyone due then"""
+        if rounds:
+            loop.call_soon(self._wake_next, loop, rounds - 1)
+            return
+        moment = self.__sleepers[0][0]
+        self.advance_to(moment)
+        while self.__sleepers and self.__sleepers[0][0] <= moment:
+            wake_up = heapq.heappop(self.__sleepers)[2]
+            if not wake_up.done():
+                wake_up.set_result(None)
+        if self.__sleepers:
+            loop.call_soon(self._wake_next, loop, SETTLE_ROUNDS)
+        else:
+            self.__waking = False
+
+    def advance_to(self, moment):
+        """Jump forward to <moment>. Simulated time never runs backwards, so an earlier moment is ignored"""
+        if moment > self.__now:
+            self.__now = moment
+
+    def __repr__(self):
+        return f'VirtualClock(now={self.__now})'
+
+
+class InvalidClockError(Exception):
+    """Raised when something other than a Clock is set as the default clock"""
+    pass
+
+
+_default_clock = RealClock()
+
+
+def get_default_clock():
+    """Return the clock used by anything which wasn't handed one of its own"""
+    return _default_clock
+
+
+def set_default_clock(clock):
+    """Replace the default clock, e.g. with a VirtualClock to run a whole simulation without waiting.
+    Returns the clock which was replaced so it can be put back afterwards"""
+    global _default_clock
+    if not isinstance(clock, Clock):
+        raise InvalidClockError(f'{clock!r} is not a Clock')
+    previous = _default_clock
+    _default_clock = clock
+    return previous
+
+
+if __name__ == '__main__':
+    clock = VirtualClock()
+    clock.sleep(3)
+    clock.sleep(.5)
+    print(clock, clock.elapsed_since(0))
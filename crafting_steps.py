@@ -1,178 +1,268 @@
-import time
+import clocks
+import events
 
 
 class Step:
     """The base class for all steps.
+    Everything about a kind of step, its name, type, how long it takes and what it makes, is fixed, so each kind of
+    step is a flyweight: TurningStep() hands back the same object every time and a blueprint with four legs holds
+    the one TurningStep four times. Treat steps as read only.
+    Which tools can perform a step is up to the acceptable_steps of each ShopTool, and nothing else.
+    Anything which changes as a step is worked through, like whether it's been completed, lives in a StepRecord.
         Defines the following attributes:
             name
             step_type
+            time_to_complete
             INITIATION_TIME
-            __is_completed
+            produces -- the name of the WoodObject the step makes, if it makes one. Only the name, so importing the
+                        steps doesn't import wood_objects as well
+            clock -- the Clock to wait on when perform() isn't handed one. Falls back to the default clock
+            __flyweights -- the one shared instance of each kind of step
+
+        Defines the following properties:
+            active_time -- how long the hands-on part of perform() takes
+            passive_time -- how long the work has to be left alone afterwards, e.g. for glue to dry
+            duration -- how long perform() takes, start to finish
 
         Defines the following methods:
+            waits()
             perform()
+            perform_async()
     """
-    def __init__(self, name, step_type, **kwargs):
-        self.name = name
-        self.step_type = step_type
-        self.INITIATION_TIME = 2
-        self.__is_completed = False
-
-    def perform(self):
+    name = ''
+    step_type = ''
+    time_to_complete = 0
+    INITIATION_TIME = 2
+    produces = None
+    clock = None
+    WAITING_MESSAGE = ''
+    SET_MESSAGE = ''
+    __flyweights = {}
+
+    def __new__(cls, name=None, step_type=None, clock=None):
+        if clock is not None:
+            # a step with a clock of its own can't be shared
+            return super().__new__(cls)
+        key = (cls, name, step_type)
+        step = Step.__flyweights.get(key)
+        if step is None:
+            step = Step.__flyweights[key] = super().__new__(cls)
+        return step
+
+    def __init__(self, name=None, step_type=None, clock=None):
+        if name is not None:
+            self.name = name
+        if step_type is not None:
+            self.step_type = step_type
+        if clock is not None:
+            self.clock = clock
+
+    def _get_clock(self, clock):
+        """Work out which clock to wait on. One passed in by the caller wins, then our own, then the default"""
+        return clock or self.clock or clocks.get_default_clock()
+
+    def waits(self, record=None):
+        """Describe the work of performing the step as a generator which yields how long to wait, in seconds, at
+        each point, along with event records saying what is going on. Nothing actually happens until a clock runs
+        it, which is what lets perform(), perform_async() and the ShopTools all share it.
+        The StepRecord <record>, if there is one, is marked completed once the hands-on part is over.
+        Returns the part the step made, or None if it doesn't make one"""
+        yield events.StepStarted(self.name, self.step_type)
+        yield self.INITIATION_TIME
+        yield events.StepInitiated(self.name, self.step_type)
+        yield self.time_to_complete
+        if record is not None:
+            record.set_completed()
+        yield events.StepCompleted(self.name, self.step_type)
+        yield from self._setting_waits()
+        return self._make_part()
+
+    def _make_part(self):
+        """Return a new one of whatever the step produces, or None if it doesn't produce anything"""
+        if self.produces is None:
+            return None
+        # wood_objects is only needed once something is made, so importing the steps doesn't pay for it
+        import wood_objects
+        return getattr(wood_objects, self.produces)()
+
+    def _setting_waits(self):
+        """The waits for the passive_time after the hands-on work is done. Yields nothing for most steps"""
+        if not self.passive_time:
+            return
+        yield events.StepSetting(self.name, self.passive_time, self.WAITING_MESSAGE)
+        yield self.passive_time
+        yield events.StepSet(self.name, self.SET_MESSAGE)
+
+    def perform(self, clock=None, bus=None, record=None):
         """Complete the step. This method is inherited by all sub classes.
-        It returns nothing, just prints out that the step is being performed"""
-        print(f'Initiating {self.name.lower()}....', end='')
-        # for i in range(1, self.INITIATION_TIME):
-        #     print(i, end='...')
-        #     time.sleep(1)
-        # print()
-        time.sleep(self.INITIATION_TIME)
-        print('DONE')
-        print(self.name.title(), end='...')
-        for i in range(1, self.time_to_complete+1):
-            print(i, end='...')
-            time.sleep(1)
-
-        print(f'{self.name} completed!')
-        self.set_completed()
+        It reports what it is doing on the EventBus <bus> and returns the time, according to <clock>, at which
+        the work is ready to carry on with.
+        <clock> and <bus> usually belong to the ShopTool performing the step.
+        Some steps, like gluing, leave the work to set up once they're done, which perform() waits out. The
+        ShopScheduler is what lets a worker get on with something else in the meantime"""
+        clock = self._get_clock(clock)
+        clock.run(self.waits(record), bus)
+        return clock.now()
+
+    async def perform_async(self, clock=None, bus=None, record=None):
+        """Just like perform() but awaits <clock> rather than sleeping, so it doesn't block the event loop"""
+        clock = self._get_clock(clock)
+        await clock.run_async(self.waits(record), bus)
+        return clock.now()
 
     @property
-    def is_completed(self):
-        return self.__is_completed
+    def active_time(self):
+        return self.INITIATION_TIME + self.time_to_complete
 
-    def set_completed(self):
-        self.__is_completed = True
+    @property
+    def passive_time(self):
+        return 0
+
+    @property
+    def duration(self):
+        return self.active_time + self.passive_time
 
     def __repr__(self):
         return self.name
 
 
+class StepRecord:
+    """A single performance of a Step, holding the little that changes while it's worked through so the Step itself
+    can be shared.
+        Defines the following attributes:
+            step
+            is_completed
+
+        Defines the following methods:
+            set_completed()
+            waits()
+            perform()
+            perform_async()
+    """
+    __slots__ = ('step', 'is_completed')
+
+    def __init__(self, step):
+        self.step = step
+        self.is_completed = False
+
+    def set_completed(self):
+        self.is_completed = True
+
+    def waits(self):
+        return self.step.waits(self)
+
+    def perform(self, clock=None, bus=None):
+        return self.step.perform(clock, bus, self)
+
+    async def perform_async(self, clock=None, bus=None):
+        return await self.step.perform_async(clock, bus, self)
+
+    def __repr__(self):
+        return f'{self.step.name}{" (done)" if self.is_completed else ""}'
+
+
 class GenerationStep(Step):
     """A step which signifies that output of it will be an object, specifically some form of FurnitureComponent"""
-    def __init__(self, name, **kwargs):
-        self.name = name
-        self.step_type = 'generation'
-        super().__init__(self.name, self.step_type, **kwargs)
+    step_type = 'generation'
 
 
 class AlterationStep(Step):
     """A step which signifies that output of it will change an existing object, specifically a FurnitureComponent"""
-    def __init__(self, name, **kwargs):
-        self.name = name
-        self.step_type = 'alteration'
-        super().__init__(self.name, self.step_type, **kwargs)
+    step_type = 'alteration'
 
 
 class AssemblyStep(Step):
     """A step which signifies that FurnitureComponents will be combined into a new object,
     specifically a CompletedWoodObject, like a Bed or a Chair"""
-    def __init__(self, name, **kwargs):
-        self.name = name
-        self.step_type = 'assembly'
-        super().__init__(self.name, self.step_type, **kwargs)
+    step_type = 'assembly'
 
 
 class CuttingStep(GenerationStep):
     """The ripping of a board into narrower sections or the cutting of boards into shorter sections.
     Also applies to using the scroll saw to cut out intricate shapes"""
-    def __init__(self):
-        self.name = 'Cutting'
-        self.time_to_complete = 3
-        super().__init__(self.name)
+    name = 'Cutting'
+    time_to_complete = 3
+    produces = 'Board'
 
 
 class DrillingStep(AlterationStep):
     """Drilling holes in things to prepare them for fastening together"""
-    def __init__(self):
-        self.name = 'Drilling'
-        self.time_to_complete = 2
-        super.__init__(self.name)
+    name = 'Drilling'
+    time_to_complete = 2
 
 
 class FasteningStep(AssemblyStep):
     """The screwing or nailing of two pieces of wood together. Separate and distinct from Gluing, but can be used in
     combination"""
-    def __init__(self):
-        self.name = 'Fastening'
-        self.time_to_complete = 3
-        super().__init__(self.name)
+    name = 'Fastening'
+    time_to_complete = 3
 
 
 class GluingStep(AssemblyStep):
     """Attaching one piece of wood to another by chemical means. Can be used in conjunction with Gluing or used
     separately"""
-    def __init__(self):
-        self.name = 'Gluing'
-        self.time_to_complete = 3
-        self.time_to_dry = 3
-        super().__init__(self.name)
+    WAITING_MESSAGE = 'Waiting for glue to dry and set up...'
+    SET_MESSAGE = 'Glue is dry!'
+    name = 'Gluing'
+    time_to_complete = 3
+    time_to_dry = 3
 
-    def perform(self):
-        super().perform()
-        print('Waiting for glue to dry and set up...')
-        for i in range(1, self.time_to_dry+1):
-            print(i, end='...')
-            time.sleep(1)
-        print('\nGlue is dry!')
+    @property
+    def passive_time(self):
+        return self.time_to_dry
 
 
 class JointingStep(AlterationStep):
     """Smoothing out and making parallel the two narrow sides of a board.
     Useful when making desks, table, cutting boards, drawers, and sofas"""
-    def __init__(self):
-        self.name = 'Jointing'
-        self.time_to_complete = 4
-        super().__init__(self.name)
+    name = 'Jointing'
+    time_to_complete = 4
 
 
 class PaddingStep(AlterationStep):
     """Used in the Sofa and Chair and Bed to make things comfortable"""
-    def __init__(self):
-        self.name = 'Padding'
-        self.time_to_complete = 5
-        super().__init__(self.name)
+    name = 'Padding'
+    time_to_complete = 5
 
 
 class PlaningStep(AlterationStep):
     """Smoothing out and making parallel the two broad sides of a board.
     Useful when making desks, tables, cutting boards
     """
-    def __init__(self):
-        self.name = 'Planing'
-        self.time_to_complete = 4
-        super().__init__(self.name)
+    name = 'Planing'
+    time_to_complete = 4
 
 
 class RoutingStep(AlterationStep):
     """Rounding over corners and making inlays and stuff"""
-    def __init__(self):
-        self.name = 'Routing'
-        self.time_to_complete = 3
-        super().__init__(self.name)
+    name = 'Routing'
+    time_to_complete = 3
 
 
 class SandingStep(AlterationStep):
     """Removing rough edges and making the exposed, viewable faces presentable. Used by most 'finished' goods"""
-    def __init__(self):
-        self.name = 'Sanding'
-        self.time_to_complete = 3
-        super().__init__(self.name)
+    name = 'Sanding'
+    time_to_complete = 3
 
 
 class StainingStep(AlterationStep):
     """Prettifying the wood. Also protects it from the elements and from food stains and such like"""
-    def __init__(self):
-        self.name = 'Staining'
-        self.time_to_complete = 5
-        super().__init__(self.name)
+    WAITING_MESSAGE = 'Waiting for the stain to cure...'
+    SET_MESSAGE = 'Stain is cured!'
+    name = 'Staining'
+    time_to_complete = 5
+    time_to_cure = 4
+
+    @property
+    def passive_time(self):
+        return self.time_to_cure
 
 
 class TurningStep(GenerationStep):
     """Turning things like bed posts, chair legs, table legs, desk legs, and generally anything which is cylindrical"""
-    def __init__(self):
-        self.name = 'Turning'
-        self.time_to_complete = 7
-        super().__init__(self.name)
+    name = 'Turning'
+    time_to_complete = 7
+    produces = 'RoundLeg'
 
 
 class StepError(Exception):
@@ -182,8 +272,10 @@ class StepError(Exception):
 
 
 if __name__ == '__main__':
+    clock = clocks.VirtualClock()
     glueing = GluingStep()
-    glueing.perform()
+    glueing.perform(clock)
 
     staining = StainingStep()
-    staining.perform()
\ No newline at end of file
+    staining.perform(clock)
+    print(f'That took {clock.now()} seconds')
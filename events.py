@@ -0,0 +1,211 @@
+import sys
+from collections import deque, namedtuple
+
+# Every record is a namedtuple of plain names and numbers, so any sink can keep it, print it or write it out.
+# The time of a record isn't part of it, it's handed to the sinks alongside it.
+StepStarted = namedtuple('StepStarted', 'step step_type')
+StepInitiated = namedtuple('StepInitiated', 'step step_type')
+StepCompleted = namedtuple('StepCompleted', 'step step_type')
+StepSetting = namedtuple('StepSetting', 'step passive_time message')
+StepSet = namedtuple('StepSet', 'step message')
+ToolPreparing = namedtuple('ToolPreparing', 'tool action')
+ToolPrepared = namedtuple('ToolPrepared', 'tool action')
+ToolPoweringOn = namedtuple('ToolPoweringOn', 'tool')
+ToolPoweredOn = namedtuple('ToolPoweredOn', 'tool')
+ToolPoweringOff = namedtuple('ToolPoweringOff', 'tool')
+ToolPoweredOff = namedtuple('ToolPoweredOff', 'tool')
+ToolAlreadyOn = namedtuple('ToolAlreadyOn', 'tool')
+ToolIdleShutdown = namedtuple('ToolIdleShutdown', 'tool')
+ToolUseStarted = namedtuple('ToolUseStarted', 'tool step')
+ToolUseFinished = namedtuple('ToolUseFinished', 'tool step')
+PartProduced = namedtuple('PartProduced', 'part step worker')
+EquipmentBought = namedtuple('EquipmentBought', 'business equipment')
+SkillStarted = namedtuple('SkillStarted', 'skill item action')
+SkillFinished = namedtuple('SkillFinished', 'skill item result')
+
+
+class EventSink:
+    """Base class for everything which can receive records from an EventBus.
+        Defines the following methods:
+            write() -- receive a single <record> which happened at <time>
+            flush()
+            close()
+    """
+    def write(self, time, record):
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class NullSink(EventSink):
+    """Throws everything away. An EventBus with nothing but NullSinks doesn't even bother handing them records"""
+    def write(self, time, record):
+        pass
+
+
+class ConsoleSink(EventSink):
+    """Renders records as the lines of text the shop used to print as it went.
+        Defines the following attributes:
+            stream -- where the text goes. Defaults to stdout
+            show_time -- if True every line starts with the time it happened
+    """
+    RENDERERS = {
+        StepInitiated: lambda r: f'Initiating {r.step.lower()}....DONE',
+        StepCompleted: lambda r: f'{r.step} completed!',
+        StepSetting: lambda r: r.message,
+        StepSet: lambda r: r.message,
+        ToolPrepared: lambda r: f'{r.action}...DONE',
+        ToolPoweredOn: lambda r: f'Turning on {r.tool.title()}...DONE',
+        ToolPoweredOff: lambda r: f'Turning off {r.tool.title()}...DONE',
+        ToolAlreadyOn: lambda r: f'{r.tool.title()} is already on.',
+        ToolIdleShutdown: lambda r: f'{r.tool.title()} was idle for too long and switched itself off',
+        PartProduced: lambda r: f'{r.worker} made a {r.part.lower()}',
+        EquipmentBought: lambda r: f'{r.business} is now the proud owner of a {r.equipment}',
+        SkillStarted: lambda r: f'Now {r.action} {r.item}',
+        SkillFinished: lambda r: f'{r.item} is now {r.result}',
+    }
+
+    def __init__(self, stream=None, show_time=False):
+        self.stream = stream
+        self.show_time = show_time
+
+    def write(self, time, record):
+        render = self.RENDERERS.get(type(record))
+        if render is None:
+            return
+        line = render(record)
+        if self.show_time:
+            line = f'[{time:>10.1f}] {line}'
+        (self.stream or sys.stdout).write(line + '\n')
+
+
+class RingBufferSink(EventSink):
+    """Keeps the most recent <capacity> records in memory as (time, record) pairs, dropping the oldest"""
+    def __init__(self, capacity=10_000):
+        self.records = deque(maxlen=capacity)
+
+    def write(self, time, record):
+        self.records.append((time, record))
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+
+class JsonlFileSink(EventSink):
+    """Writes each record as a line of JSON to <path>, saving them up and writing <buffer_size> at a time.
+    Remember to close() it, or use it in a with block, so the last few make it to the file"""
+    def __init__(self, path, buffer_size=1000):
+        # json is only needed by this sink, so importing events doesn't pay for it
+        import json
+        self.__dumps = json.dumps
+        self.path = path
+        self.buffer_size = buffer_size
+        self.__buffer = []
+        self.__file = open(path, 'a', encoding='utf-8')
+
+    def write(self, time, record):
+        line = {'time': time, 'event': type(record).__name__}
+        line.update(record._asdict())
+        self.__buffer.append(self.__dumps(line))
+        if len(self.__buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.__buffer:
+            self.__file.write('\n'.join(self.__buffer) + '\n')
+            self.__buffer.clear()
+        self.__file.flush()
+
+    def close(self):
+        if not self.__file.closed:
+            self.flush()
+            self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EventBus:
+    """Hands every record published on it to each of its sinks.
+        Defines the following attributes:
+            __sinks
+            __enabled -- False when every sink is a NullSink, in which case publish() returns straight away
+
+        Defines the following properties:
+            enabled
+            sinks
+
+        Defines the following methods:
+            add_sink()
+            remove_sink()
+            publish()
+            close()
+    """
+    def __init__(self, *sinks):
+        self.__sinks = []
+        self.__enabled = False
+        for sink in sinks:
+            self.add_sink(sink)
+
+    @property
+    def enabled(self):
+        return self.__enabled
+
+    @property
+    def sinks(self):
+        return tuple(self.__sinks)
+
+    def add_sink(self, sink):
+        self.__sinks.append(sink)
+        self.__enabled = any(not isinstance(s, NullSink) for s in self.__sinks)
+
+    def remove_sink(self, sink):
+        self.__sinks.remove(sink)
+        self.__enabled = any(not isinstance(s, NullSink) for s in self.__sinks)
+
+    def publish(self, record, time):
+        """Hand <record>, which happened at <time>, to every sink"""
+        if not self.__enabled:
+            return
+        for sink in self.__sinks:
+            sink.write(time, record)
+
+    def close(self):
+        for sink in self.__sinks:
+            sink.close()
+
+
+_default_event_bus = EventBus(ConsoleSink())
+
+
+def get_event_bus():
+    """Return the EventBus used by anything which wasn't handed one of its own. It prints to the console"""
+    return _default_event_bus
+
+
+def set_event_bus(bus):
+    """Replace the default EventBus, e.g. with EventBus(NullSink()) to run silently.
+    Returns the bus which was replaced so it can be put back afterwards"""
+    global _default_event_bus
+    previous = _default_event_bus
+    _default_event_bus = bus
+    return previous
+
+
+if __name__ == '__main__':
+    ring = RingBufferSink(capacity=3)
+    bus = EventBus(ConsoleSink(show_time=True), ring)
+    for t, record in enumerate([ToolPoweredOn('lathe'), StepStarted('Turning', 'generation'),
+                                StepCompleted('Turning', 'generation'), ToolPoweredOff('lathe')]):
+        bus.publish(record, t)
+    print(list(ring))
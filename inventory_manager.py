@@ -1,4 +1,230 @@
+from collections import Counter, OrderedDict, namedtuple
 
+# the processing a FurnitureComponent can have been through, in the order they make up its state
+PROCESSING_STATES = ('is_planed', 'is_jointed', 'is_sanded', 'is_routed')
 
+# a part a blueprint calls for which has to have been through some processing. Any state left as None doesn't matter,
+# so PartSpec(Board, is_planed=True) is any planed Board whether it's been sanded or not.
+# Plain FurnitureComponent classes, like the ones in Blueprint.req_parts, are taken to mean one of those in any state
+PartSpec = namedtuple('PartSpec', ('part_type',) + PROCESSING_STATES, defaults=(None,) * len(PROCESSING_STATES))
 
+# parts set aside for a job. Hand it back to commit() once they've been used or release() if they weren't
+Reservation = namedtuple('Reservation', 'ticket job parts')
 
+
+def part_state(part):
+    """Return the processing state of <part> as a tuple of flags in the order of PROCESSING_STATES"""
+    return tuple(bool(getattr(part, flag)) for flag in PROCESSING_STATES)
+
+
+class InventoryManager:
+    """
+    The parts store of a Business, shared by all of its Workers.
+    Every FurnitureComponent is filed in a bin for its type and processing state, so finding out how many planed
+    Boards there are, or whether a blueprint's req_parts are all on hand, only has to look at a handful of bins
+    however many parts are in stock.
+    Parts claimed by an in-progress job are reserved: they stay out of every count until the job commits them,
+    which takes them away for good, or releases them back onto the shelves.
+        Defines the following attributes:
+            __bins -- (type, state): OrderedDict of id: part for everything available, oldest first
+            __bin_of -- id: (type, state) for every available part
+            __type_counts -- how many of each type are available, in any state
+            __states_of_type -- the states there are bins for, for each type
+            __reservations -- ticket: Reservation for everything currently set aside
+            __next_ticket
+
+        Defines the following properties:
+            reserved_count
+
+        Defines the following methods:
+            add()
+            add_parts()
+            remove()
+            update()
+            count()
+            satisfies()
+            missing()
+            reserve()
+            commit()
+            release()
+            _bins_matching()
+            _allocate()
+            _take()
+    """
+    def __init__(self, parts=()):
+        self.__bins = {}
+        self.__bin_of = {}
+        self.__type_counts = Counter()
+        self.__states_of_type = {}
+        self.__reservations = {}
+        self.__next_ticket = 0
+        self.add_parts(parts)
+
+    def __len__(self):
+        return len(self.__bin_of)
+
+    def __contains__(self, part):
+        return id(part) in self.__bin_of
+
+    def __iter__(self):
+        for parts in list(self.__bins.values()):
+            yield from parts.values()
+
+    @property
+    def reserved_count(self):
+        return sum(len(reservation.parts) for reservation in self.__reservations.values())
+
+    def add(self, part):
+        """Put <part> on the shelves, filed by its type and its processing state right now"""
+        if id(part) in self.__bin_of:
+            return
+        key = (type(part), part_state(part))
+        self.__bins.setdefault(key, OrderedDict())[id(part)] = part
+        self.__bin_of[id(part)] = key
+        self.__type_counts[key[0]] += 1
+        self.__states_of_type.setdefault(key[0], set()).add(key[1])
+
+    def add_parts(self, parts):
+        for part in parts:
+            self.add(part)
+
+    def remove(self, part):
+        """Take <part> off the shelves for good and return it"""
+        key = self.__bin_of.pop(id(part), None)
+        if key is None:
+            raise UnknownPartError(part)
+        del self.__bins[key][id(part)]
+        self.__type_counts[key[0]] -= 1
+        return part
+
+    def update(self, part):
+        """File <part> again after it's been planed, sanded and so on, so it's counted in its new state"""
+        self.remove(part)
+        self.add(part)
+
+    def _bins_matching(self, spec):
+        """Return the keys of every bin holding parts which fit <spec>"""
+        if not isinstance(spec, PartSpec):
+            spec = PartSpec(spec)
+        wanted = spec[1:]
+        keys = []
+        for state in self.__states_of_type.get(spec.part_type, ()):
+            if all(want is None or want == have for want, have in zip(wanted, state)):
+                keys.append((spec.part_type, state))
+        return keys
+
+    def count(self, part_type, **state):
+        """Return how many of <part_type> are available, e.g. count(Board, is_planed=True).
+        Reserved parts aren't counted"""
+        if not state:
+            return self.__type_counts[part_type]
+        unknown = set(state) - set(PROCESSING_STATES)
+        if unknown:
+            raise InvalidPartSpecError(f'{", ".join(sorted(unknown))} is not a processing state')
+        return sum(len(self.__bins[key]) for key in self._bins_matching(PartSpec(part_type, **state)))
+
+    def _allocate(self, req_parts):
+        """Work out which bins to take each of <req_parts> from without taking the same part twice.
+        Returns (taken, missing): how many to take from each bin and how many of each requirement can't be met.
+        The pickiest requirements go first so they aren't left with nothing by the ones which take anything"""
+        wanted = Counter(req_parts)
+        taken = Counter()
+        missing = Counter()
+        pickiness = lambda spec: -sum(s is not None for s in spec[1:]) if isinstance(spec, PartSpec) else 0
+        for spec in sorted(wanted, key=pickiness):
+            needed = wanted[spec]
+            for key in self._bins_matching(spec):
+                take = min(needed, len(self.__bins[key]) - taken[key])
+                if take > 0:
+                    taken[key] += take
+                    needed -= take
+                if not needed:
+                    break
+            if needed:
+                missing[spec] = needed
+        return taken, missing
+
+    def satisfies(self, req_parts):
+        """Returns true if every one of <req_parts>, e.g. a Blueprint's req_parts, is available at once"""
+        return not self._allocate(req_parts)[1]
+
+    def missing(self, req_parts):
+        """Return a Counter of how many of each of <req_parts> aren't available"""
+        return self._allocate(req_parts)[1]
+
+    def _take(self, taken):
+        """Take the oldest parts out of each bin, as many as <taken> says"""
+        parts = []
+        for key, number in taken.items():
+            bin_ = self.__bins[key]
+            for i in range(number):
+                part_id, part = bin_.popitem(last=False)
+                del self.__bin_of[part_id]
+                parts.append(part)
+            self.__type_counts[key[0]] -= number
+        return parts
+
+    def reserve(self, req_parts, job=None):
+        """Set aside every one of <req_parts> for <job> so nobody else can use them, and return the Reservation.
+        Either all of them are reserved or, if any aren't available, none are"""
+        taken, missing = self._allocate(req_parts)
+        if missing:
+            raise InsufficientPartsError(missing)
+        reservation = Reservation(self.__next_ticket, job, tuple(self._take(taken)))
+        self.__next_ticket += 1
+        self.__reservations[reservation.ticket] = reservation
+        return reservation
+
+    def commit(self, reservation):
+        """The job is using the parts in <reservation>, so they're gone for good. Returns them"""
+        if self.__reservations.pop(reservation.ticket, None) is None:
+            raise InvalidReservationError(reservation.ticket)
+        return reservation.parts
+
+    def release(self, reservation):
+        """The job doesn't need the parts in <reservation> after all, so put them back on the shelves"""
+        if self.__reservations.pop(reservation.ticket, None) is None:
+            raise InvalidReservationError(reservation.ticket)
+        self.add_parts(reservation.parts)
+
+
+class UnknownPartError(Exception):
+    def __init__(self, part):
+        super().__init__(f'There is no {getattr(part, "name", part)} in the inventory')
+
+
+class InsufficientPartsError(Exception):
+    """Raised when the parts asked for aren't all available. <missing> counts how many of each are short"""
+    def __init__(self, missing):
+        self.missing = missing
+        wanted = ', '.join(f'{number} x {getattr(spec, "__name__", spec)}' for spec, number in missing.items())
+        super().__init__(f'The inventory is short of {wanted}')
+
+
+class InvalidReservationError(Exception):
+    def __init__(self, ticket):
+        super().__init__(f'Reservation {ticket} has already been committed or released')
+
+
+class InvalidPartSpecError(Exception):
+    pass
+
+
+if __name__ == '__main__':
+    from blueprints import WoodObjectEncyclopedia
+    from wood_objects import Board, RoundLeg
+
+    inventory = InventoryManager(Board() for i in range(6))
+    inventory.add_parts(RoundLeg() for i in range(4))
+    for board in list(inventory)[:2]:
+        board.set_planed()
+        inventory.update(board)
+    print(f'{inventory.count(Board)} boards, {inventory.count(Board, is_planed=True)} of them planed')
+
+    chair = WoodObjectEncyclopedia.get_blueprint('chair')
+    print('Enough for a chair?', inventory.satisfies(chair.req_parts))
+    reservation = inventory.reserve(chair.req_parts + (PartSpec(Board, is_planed=True),), job='chair')
+    print(f'Reserved {len(reservation.parts)} parts, {inventory.count(Board)} boards left')
+    print('Enough for another?', inventory.satisfies(chair.req_parts), inventory.missing(chair.req_parts))
+    inventory.release(reservation)
+    print(f'Released them, {inventory.count(Board)} boards left')
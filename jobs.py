@@ -0,0 +1,63 @@
+from itertools import count
+
+_job_ids = count(1)
+
+
+def reserve_job_ids(highest):
+    """Make sure every new Job's job_id is above <highest>, e.g. after jobs have been read back from a checkpoint"""
+    global _job_ids
+    next_id = next(_job_ids)
+    _job_ids = count(max(next_id, highest + 1))
+
+
+class Job:
+    """
+    One craft of one Blueprint, from the first step to the last. Blueprints and their Steps are shared by every craft
+    of the same thing, so everything which belongs to a single craft, like which steps are done and the parts made
+    so far, lives in its Job instead. Jobs are small enough to have thousands of them on the go at once.
+    A Job which is interrupted is left in its worker's partial_jobs, and picks up from the first step not yet done.
+        Defines the following attributes:
+            job_id
+            blueprint
+            records -- a StepRecord for each of the blueprint's steps, in the same order
+            parts -- the parts made for the job so far
+            started_at -- when work on it first started, according to the clock of whoever worked on it
+            finished_at -- when it was finished, or None if it hasn't been
+
+        Defines the following properties:
+            is_finished
+            completed_count
+
+        Defines the following methods:
+            remaining()
+            show_remaining_steps()
+    """
+    __slots__ = ('job_id', 'blueprint', 'records', 'parts', 'started_at', 'finished_at')
+
+    def __init__(self, blueprint, job_id=None):
+        self.job_id = next(_job_ids) if job_id is None else job_id
+        self.blueprint = blueprint
+        self.records = blueprint.new_records()
+        self.parts = []
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def is_finished(self):
+        return self.finished_at is not None
+
+    @property
+    def completed_count(self):
+        return sum(1 for record in self.records if record.is_completed)
+
+    def remaining(self, step_type=None):
+        """Return the StepRecords not yet completed, or just those of <step_type>, e.g. 'generation'"""
+        return [record for record in self.records
+                if not record.is_completed and (step_type is None or record.step.step_type == step_type)]
+
+    def show_remaining_steps(self):
+        self.blueprint.show_remaining_steps(self.records)
+
+    def __repr__(self):
+        return f'Job({self.job_id}, {self.blueprint.name}, {self.completed_count}/{len(self.records)} steps done)'
+
@@ -0,0 +1,158 @@
+from collections import Counter, namedtuple
+from blueprints import WoodObjectEncyclopedia
+from jobs import Job
+from sequencing import GreedyPolicy, ToolRun, sessions
+from worker import InvalidBusinessError, MissingToolError
+
+# a line of the order book: <quantity> of <item>, made with the keyword arguments <kwargs> for its blueprint,
+# e.g. Order('table', 3, {'num_legs': 5}). Plain (item, quantity, kwargs) tuples work just as well
+Order = namedtuple('Order', 'item quantity kwargs', defaults=(1, None))
+
+# how the batched plan for an order book compares with crafting every unit on its own. A setup is every time a tool
+# is taken up for a run, which for a powered tool means powering it up and down again
+BatchingReport = namedtuple('BatchingReport', 'units runs setups makespan unbatched_setups unbatched_makespan '
+                                              'setup_reduction makespan_reduction')
+
+
+class OrderBatcher:
+    """
+    Works through a whole order book at once instead of one craft at a time. Every unit ordered gets a Job, each
+    Job's steps are split into runs on the tool which does them, and then runs on the same tool are pulled together
+    across jobs, so ten chairs turn all 40 legs in one go on the lathe, then sand all ten, then glue all ten.
+    A job's steps are still done in the order its blueprint gives them, so nothing is sanded before it's turned or
+    fastened before it's glued. Which runs go first is up to a SequencingPolicy, a GreedyPolicy unless it's given
+    another, and runs on the same tool which end up next to each other are done in one session.
+    Unlike Worker.craft(), which only makes the parts, every step of every blueprint is performed.
+        Defines the following attributes:
+            worker -- who does the work. They have to be employed, as the tools are their business's
+            policy -- the SequencingPolicy which orders the runs
+
+        Defines the following methods:
+            expand()
+            plan()
+            plan_unbatched()
+            estimate()
+            compare()
+            run()
+            _tool_runs()
+    """
+    def __init__(self, worker, policy=None):
+        if not worker.business:
+            raise InvalidBusinessError(f'{worker.name} is not employed by any business')
+        self.worker = worker
+        self.policy = policy or GreedyPolicy()
+
+    @staticmethod
+    def expand(orders):
+        """Return a Job for every unit in <orders>, in the order they were ordered"""
+        jobs = []
+        for order in orders:
+            item, quantity, kwargs = Order(*order)
+            blueprint = WoodObjectEncyclopedia.get_blueprint(item, **(kwargs or {}))
+            jobs.extend(Job(blueprint) for i in range(quantity))
+        return jobs
+
+    def _tool_runs(self, job):
+        """Split the steps <job> still has to do into ToolRuns, one for each stretch of steps on the same tool"""
+        runs = []
+        for tool, records in self.worker.business.tool_runs(job.remaining()):
+            if tool is None:
+                raise MissingToolError(records[0].step.name)
+            runs.append(ToolRun(tool, tuple((job, record) for record in records)))
+        return runs
+
+    def plan_unbatched(self, jobs):
+        """Return the ToolRuns for doing <jobs> one after another, each from start to finish like Worker.craft()
+        would, so nothing is shared between them"""
+        return [run for job in jobs for run in self._tool_runs(job)]
+
+    def plan(self, jobs):
+        """Return the ToolRuns for doing <jobs> in the order our policy puts them in, one for each session"""
+        return sessions(self.policy.sequence([self._tool_runs(job) for job in jobs]))
+
+    @staticmethod
+    def estimate(plan):
+        """Return how long working through <plan> takes, from ShopTool.time_to_use_batch(), without doing it"""
+        return sum(run.tool.time_to_use_batch([record.step for job, record in run.work]) for run in plan)
+
+    def compare(self, orders):
+        """Plan <orders> both ways and return a BatchingReport, without performing anything"""
+        jobs = self.expand(orders)
+        plan = self.plan(jobs)
+        return self.__report(jobs, plan, self.estimate(plan), self.plan_unbatched(jobs))
+
+    def run(self, orders):
+        """Make everything in <orders> following the batched plan. Every Job is kept in the worker's partial_jobs
+        until it's finished, so an interruption can be picked up with Worker.resume_jobs().
+        Returns a BatchingReport whose makespan is how long it actually took according to the worker's clock.
+        The unbatched makespan is still an estimate, as nothing is crafted twice"""
+        jobs = self.expand(orders)
+        plan = self.plan(jobs)
+        unbatched = self.plan_unbatched(jobs)
+        worker = self.worker
+        start = worker.clock.now()
+        for job in jobs:
+            worker.start_job(job)
+
+        remaining = Counter(job.job_id for run in plan for job, record in run.work)
+        for run in plan:
+            worker.use_tool(run.tool, [record.step for job, record in run.work], self.__step_done(run))
+            for job, record in run.work:
+                remaining[job.job_id] -= 1
+                if not remaining[job.job_id]:
+                    worker.finish_job(job)
+        # the jobs were all worked on at once, so the time is only worked once
+        return self.__report(jobs, plan, worker.log_work(start), unbatched)
+
+    def __step_done(self, run):
+        """Return the callback for Worker.use_tool() which hands each step of <run> on to the worker's own callback
+        for the job it belongs to, so it's recorded just as it would be in a craft"""
+        by_job = {}
+        callbacks = []
+        for job, record in run.work:
+            if job.job_id not in by_job:
+                records = []
+                by_job[job.job_id] = (self.worker.step_done(job, records), records)
+            job_done, records = by_job[job.job_id]
+            callbacks.append((job_done, len(records)))
+            records.append(record)
+
+        def done(i, part):
+            job_done, position = callbacks[i]
+            job_done(position, part)
+        return done
+
+    def __report(self, jobs, plan, makespan, unbatched):
+        setups = Counter(run.tool.name for run in plan)
+        unbatched_setups = Counter(run.tool.name for run in unbatched)
+        unbatched_makespan = self.estimate(unbatched)
+        return BatchingReport(
+            len(jobs), plan, setups, makespan, unbatched_setups, unbatched_makespan,
+            1 - sum(setups.values()) / sum(unbatched_setups.values()) if unbatched_setups else 0,
+            1 - makespan / unbatched_makespan if unbatched_makespan else 0
+        )
+
+
+if __name__ == '__main__':
+    import business
+    import clocks
+    import events
+    from worker import Worker
+
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    for model in ('lathe', 'sander', 'work bench', 'planer', 'jointer', 'table saw'):
+        shop.order_equipment(model)
+    worker = Worker('Miles Head')
+    shop.hire_worker(worker)
+
+    batcher = OrderBatcher(worker)
+    orders = [('chair', 10), Order('table', 2, {'num_legs': 5}), ('desk', 3)]
+    report = batcher.run(orders)
+    print(f'{report.units} units in {len(report.runs)} runs:')
+    for run in report.runs:
+        steps = ', '.join(sorted({record.step.name for job, record in run.work}))
+        print(f'    {run.tool.name:<10} {len(run.work):>3} steps: {steps}')
+    print(f'Setups {sum(report.unbatched_setups.values())} -> {sum(report.setups.values())} '
+          f'({report.setup_reduction:.0%} fewer), makespan {report.unbatched_makespan:.1f} -> {report.makespan:.1f} '
+          f'seconds ({report.makespan_reduction:.0%} shorter)')
+    print(f'{len(worker.partial_jobs)} jobs left unfinished')
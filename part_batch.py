@@ -0,0 +1,292 @@
+from array import array
+import crafting_steps as cs
+from wood_objects import PLANED, JOINTED, ROUTED, SANDED
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# the flag an AlterationStep leaves on every part it's applied to
+STEP_FLAGS = {
+    cs.PlaningStep: PLANED,
+    cs.JointingStep: JOINTED,
+    cs.RoutingStep: ROUTED,
+    cs.SandingStep: SANDED,
+}
+
+# the keyword each flag goes by in queries, matching the WoodObject properties
+STATE_FLAGS = {
+    'is_planed': PLANED,
+    'is_jointed': JOINTED,
+    'is_routed': ROUTED,
+    'is_sanded': SANDED,
+}
+
+DIMENSIONS = ('length', 'width', 'thickness')
+
+# every column of a PartBatch and the array typecode it's stored as
+COLUMNS = dict(types='B', flags='B', **{name: 'd' for name in DIMENSIONS})
+
+
+class PartBatch:
+    """
+    A stack of FurnitureComponents stored column by column instead of object by object: one column for the type of
+    every part, one for its flags and one for each of its dimensions. Planing or sanding the whole stack, or asking
+    how many boards are jointed but not sanded, is a single operation on a column rather than a Python call per part.
+    The columns are NumPy arrays when NumPy is installed and array.arrays otherwise. Without NumPy the column
+    operations are done on the raw bytes of the arrays, which is still far quicker than going part by part.
+    A NumPy array can't grow in place, so parts added to a NumPy batch wait in array.arrays until a column is next
+    looked at and are then added to it all at once, rather than copying the whole column for every part.
+    A mask picks out some of the parts. It's a NumPy array of bools, or bytes of 0s and 1s without NumPy,
+    and two of them can be combined with combine_masks().
+        Defines the following attributes:
+            backend -- 'numpy' or 'array'
+            part_types -- every kind of part in the batch. The type column holds positions in this list
+            __columns -- column name: the column
+            __pending -- column name: an array.array of the values added to it since it was last looked at, for
+                         the NumPy backend
+
+        Defines the following properties:
+            types
+            flags -- PLANED, JOINTED, ROUTED and SANDED or-ed together for each part
+            length
+            width
+            thickness
+
+        Defines the following methods:
+            from_parts()
+            to_parts()
+            append()
+            extend()
+            mask()
+            count()
+            set_flags()
+            clear_flags()
+            apply_step()
+            combine_masks()
+            _type_code()
+            _column()
+            _byte_mask()
+    """
+    def __init__(self, backend=None):
+        if backend is None:
+            backend = 'numpy' if np is not None else 'array'
+        if backend == 'numpy' and np is None:
+            raise InvalidBackendError('NumPy is not installed')
+        if backend not in ('numpy', 'array'):
+            raise InvalidBackendError(f'{backend} is not a PartBatch backend')
+        self.backend = backend
+        self.part_types = []
+        self.__columns = {name: self._column(typecode) for name, typecode in COLUMNS.items()}
+        self.__pending = {name: array(typecode) for name, typecode in COLUMNS.items()}
+
+    def _column_property(name):
+        return property(lambda self: self.__flushed(name),
+                        lambda self, column: self.__columns.__setitem__(name, column))
+
+    types = _column_property('types')
+    flags = _column_property('flags')
+    length = _column_property('length')
+    width = _column_property('width')
+    thickness = _column_property('thickness')
+    del _column_property
+
+    def __flushed(self, name):
+        """Return the column <name> with anything still waiting to go on the end of it added"""
+        pending = self.__pending[name]
+        if pending:
+            column = self.__columns[name]
+            self.__columns[name] = np.concatenate([column, np.frombuffer(pending, dtype=column.dtype)])
+            self.__pending[name] = array(pending.typecode)
+        return self.__columns[name]
+
+    def __len__(self):
+        return len(self.__columns['flags']) + len(self.__pending['flags'])
+
+    def _column(self, typecode, values=()):
+        if self.backend == 'numpy':
+            return np.array(values, dtype=np.uint8 if typecode == 'B' else np.float64)
+        return array(typecode, values)
+
+    def _type_code(self, part_type):
+        """Return the position of <part_type> in part_types, adding it if it's new"""
+        try:
+            return self.part_types.index(part_type)
+        except ValueError:
+            if len(self.part_types) == 256:
+                raise InvalidBackendError('A PartBatch can hold at most 256 kinds of part')
+            self.part_types.append(part_type)
+            return len(self.part_types) - 1
+
+    @classmethod
+    def from_parts(cls, parts, backend=None):
+        """Make a batch out of the FurnitureComponents <parts>, keeping their flags and any dimensions they have"""
+        batch = cls(backend)
+        batch.extend(parts)
+        return batch
+
+    def extend(self, parts):
+        types, flags = array('B'), array('B')
+        dimensions = {name: array('d') for name in DIMENSIONS}
+        for part in parts:
+            types.append(self._type_code(type(part)))
+            flags.append(part._flags)
+            for name in DIMENSIONS:
+                dimensions[name].append(getattr(part, name, 0) or 0)
+        self.__concatenate('types', types)
+        self.__concatenate('flags', flags)
+        for name in DIMENSIONS:
+            self.__concatenate(name, dimensions[name])
+
+    def append(self, part_type, flags=0, length=0, width=0, thickness=0):
+        """Add a single part of <part_type>, e.g. Board, without making the object for it"""
+        self.__concatenate('types', array('B', [self._type_code(part_type)]))
+        self.__concatenate('flags', array('B', [flags]))
+        for name, value in zip(DIMENSIONS, (length, width, thickness)):
+            self.__concatenate(name, array('d', [value]))
+
+    def __concatenate(self, name, values):
+        if self.backend == 'numpy':
+            self.__pending[name].extend(values)
+        else:
+            self.__columns[name].extend(values)
+
+    def to_parts(self, mask=None):
+        """Make a FurnitureComponent for every part in the batch, or just those picked out by <mask>.
+        Parts with slots have nowhere to keep their dimensions, so any of them which has one set can't be made
+        without losing it"""
+        parts = []
+        for i in range(len(self)):
+            if mask is not None and not mask[i]:
+                continue
+            part = self.part_types[self.types[i]]()
+            part._flags = int(self.flags[i])
+            for name in DIMENSIONS:
+                value = float(getattr(self, name)[i])
+                if not value:
+                    continue
+                if not hasattr(part, '__dict__'):
+                    raise LostDimensionError(f'A {part.name} has no {name}, so the {name} of part {i} would be lost')
+                setattr(part, name, value)
+            parts.append(part)
+        return parts
+
+    @staticmethod
+    def _state_bits(state):
+        """Turn keywords like is_jointed=True, is_sanded=False into the flags which have to be set and those which
+        have to be clear"""
+        on = off = 0
+        for name, wanted in state.items():
+            flag = STATE_FLAGS.get(name)
+            if flag is None:
+                raise InvalidQueryError(f'{name} is not a processing state')
+            if wanted:
+                on |= flag
+            else:
+                off |= flag
+        return on, off
+
+    @staticmethod
+    def _byte_mask(column, matches):
+        """Without NumPy: return bytes holding a 1 for every byte of <column> for which <matches> is true"""
+        table = bytes(1 if matches(value) else 0 for value in range(256))
+        return column.tobytes().translate(table)
+
+    def mask(self, part_type=None, **state):
+        """Return a mask of the parts of <part_type>, or every type, in the given state,
+        e.g. mask(Board, is_jointed=True, is_sanded=False)"""
+        on, off = self._state_bits(state)
+        care = on | off
+        code = None
+        if part_type is not None:
+            if part_type not in self.part_types:
+                return np.zeros(len(self), bool) if self.backend == 'numpy' else bytes(len(self))
+            code = self.part_types.index(part_type)
+
+        if self.backend == 'numpy':
+            mask = (self.flags & care) == on
+            if code is not None:
+                mask &= self.types == code
+            return mask
+
+        mask = self._byte_mask(self.flags, lambda value: value & care == on)
+        if code is not None:
+            mask = self.combine_masks(mask, self._byte_mask(self.types, lambda value: value == code))
+        return mask
+
+    def combine_masks(self, first, second, how='and'):
+        """Return a mask of the parts in both <first> and <second>, or in either if <how> is 'or'"""
+        if self.backend == 'numpy':
+            return first & second if how == 'and' else first | second
+        a, b = int.from_bytes(first, 'little'), int.from_bytes(second, 'little')
+        return (a & b if how == 'and' else a | b).to_bytes(len(first), 'little')
+
+    def count(self, part_type=None, **state):
+        """Return how many parts of <part_type>, or of every type, are in the given state,
+        e.g. count(Board, is_jointed=True, is_sanded=False)"""
+        mask = self.mask(part_type, **state)
+        if self.backend == 'numpy':
+            return int(np.count_nonzero(mask))
+        return bytes(mask).count(1)
+
+    def set_flags(self, flags, mask=None):
+        """Set <flags> on every part, or just those picked out by <mask>"""
+        if self.backend == 'numpy':
+            if mask is None:
+                self.flags |= flags
+            else:
+                self.flags[mask] |= flags
+        elif mask is None:
+            table = bytes(value | flags for value in range(256))
+            self.flags = array('B', self.flags.tobytes().translate(table))
+        else:
+            # spread the flags over the parts in the mask then or them onto the column all at once
+            to_set = bytes(mask).translate(bytes([0, flags]) + bytes(254))
+            self.flags = array('B', self.combine_masks(self.flags.tobytes(), to_set, how='or'))
+
+    def clear_flags(self, flags, mask=None):
+        """Clear <flags> on every part, or just those picked out by <mask>"""
+        if self.backend == 'numpy':
+            if mask is None:
+                self.flags &= ~flags & 0xFF
+            else:
+                self.flags[mask] &= ~flags & 0xFF
+        elif mask is None:
+            table = bytes(value & ~flags for value in range(256))
+            self.flags = array('B', self.flags.tobytes().translate(table))
+        else:
+            # everything outside the mask keeps all its flags
+            keep = bytes(mask).translate(bytes([0xFF, ~flags & 0xFF]) + bytes(254))
+            self.flags = array('B', self.combine_masks(self.flags.tobytes(), keep))
+
+    def apply_step(self, step, mask=None):
+        """Do the AlterationStep <step>, e.g. a PlaningStep, to every part, or just those picked out by <mask>"""
+        flags = STEP_FLAGS.get(type(step))
+        if flags is None:
+            raise InvalidQueryError(f'{step.name} does not change the state of a part')
+        self.set_flags(flags, mask)
+
+
+class InvalidBackendError(Exception):
+    pass
+
+
+class InvalidQueryError(Exception):
+    pass
+
+
+class LostDimensionError(Exception):
+    pass
+
+
+if __name__ == '__main__':
+    from wood_objects import Board, RoundLeg
+
+    batch = PartBatch.from_parts([Board() for i in range(6)] + [RoundLeg() for i in range(4)])
+    batch.apply_step(cs.JointingStep(), batch.mask(Board))
+    batch.apply_step(cs.SandingStep(), batch.mask(RoundLeg))
+    print(f'Using {batch.backend}: {len(batch)} parts, {batch.count(Board, is_jointed=True, is_sanded=False)} '
+          f'boards jointed but not sanded, {batch.count(is_sanded=True)} parts sanded')
+    batch.clear_flags(JOINTED, batch.mask(Board))
+    print([(part.name, part.is_jointed, part.is_sanded) for part in batch.to_parts(batch.mask(is_jointed=False))])
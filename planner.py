@@ -0,0 +1,97 @@
+from collections import namedtuple
+
+# step times can be fractions of a second, so anything with less slack than this is on the critical path
+SLACK_TOLERANCE = 1e-9
+
+# when a single step can start and finish at the earliest, the latest it can start without holding everything up,
+# and how much slack that leaves it
+StepTiming = namedtuple('StepTiming', 'step earliest_start earliest_finish latest_start slack')
+
+# the full plan for a blueprint. <duration> is the critical path, the shortest the build can possibly take with as
+# many hands and tools as it needs. <serial_duration> is how long it takes doing one step after another
+Plan = namedtuple('Plan', 'blueprint timings critical_path duration serial_duration')
+
+
+def step_duration(step):
+    """The default way of timing a step for planning, which is how long Step.perform() takes"""
+    return step.duration
+
+
+def topological_order(blueprint):
+    """Return the positions of blueprint.steps ordered so each step comes after everything it depends on"""
+    waiting_on = [len(deps) for deps in blueprint.dependencies]
+    dependents = [[] for step in blueprint.steps]
+    for i, deps in enumerate(blueprint.dependencies):
+        for d in deps:
+            dependents[d].append(i)
+
+    ready = [i for i, count in enumerate(waiting_on) if count == 0]
+    order = []
+    while ready:
+        i = ready.pop(0)
+        order.append(i)
+        for j in dependents[i]:
+            waiting_on[j] -= 1
+            if waiting_on[j] == 0:
+                ready.append(j)
+
+    if len(order) != len(blueprint.steps):
+        raise PlanningError(f'The steps of the {blueprint.name} depend on each other in a circle')
+    return order
+
+
+def plan_blueprint(blueprint, duration=step_duration):
+    """Work out the earliest schedule for every step in <blueprint> and its critical path.
+    <duration> is called with each step and should return how long it takes, e.g. to include the tool's setup_time"""
+    steps = blueprint.steps
+    times = [duration(step) for step in steps]
+    order = topological_order(blueprint)
+
+    earliest_start = [0] * len(steps)
+    for i in order:
+        deps = blueprint.dependencies[i]
+        earliest_start[i] = max((earliest_start[d] + times[d] for d in deps), default=0)
+    earliest_finish = [start + time for start, time in zip(earliest_start, times)]
+    total = max(earliest_finish, default=0)
+
+    dependents = [[] for step in steps]
+    for i, deps in enumerate(blueprint.dependencies):
+        for d in deps:
+            dependents[d].append(i)
+
+    latest_finish = [total] * len(steps)
+    for i in reversed(order):
+        latest_finish[i] = min((latest_finish[j] - times[j] for j in dependents[i]), default=total)
+    latest_start = [finish - time for finish, time in zip(latest_finish, times)]
+
+    timings = tuple(
+        StepTiming(step, earliest_start[i], earliest_finish[i], latest_start[i], latest_start[i] - earliest_start[i])
+        for i, step in enumerate(steps)
+    )
+
+    # follow the steps with no slack from the start of the build to the end of it
+    critical_path = []
+    current = next((i for i in order
+                    if timings[i].slack < SLACK_TOLERANCE and not blueprint.dependencies[i]), None)
+    while current is not None:
+        critical_path.append(steps[current])
+        current = next((j for j in dependents[current] if timings[j].slack < SLACK_TOLERANCE
+                        and abs(timings[j].earliest_start - earliest_finish[current]) < SLACK_TOLERANCE), None)
+
+    return Plan(blueprint, timings, tuple(critical_path), total, sum(times))
+
+
+class PlanningError(Exception):
+    """Raised when a blueprint's steps can't be put in any order"""
+    pass
+
+
+if __name__ == '__main__':
+    from blueprints import WoodObjectEncyclopedia
+
+    for item in ['chair', 'table', 'desk', 'cutting board']:
+        plan = plan_blueprint(WoodObjectEncyclopedia.get_blueprint(item))
+        print(f'{item}: {plan.duration} seconds at best, {plan.serial_duration} one step at a time')
+        print('    critical path:', ' -> '.join(step.name for step in plan.critical_path))
+        for timing in plan.timings:
+            print(f'    {timing.step.name:<10} starts at {timing.earliest_start:>3}, slack {timing.slack}')
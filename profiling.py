@@ -0,0 +1,278 @@
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+import events
+
+# the upper bounds, in seconds, of the buckets of every Histogram unless it's given its own
+DEFAULT_BUCKETS = (.05, .1, .25, .5, 1, 2.5, 5, 10, 25, 50, 100)
+
+# the percentiles reported for every Histogram
+PERCENTILES = (50, 95, 99)
+
+# every phase the Profiler times: the record which starts it, the record which ends it and what it's called.
+# Tool phases are timed per tool and step phases per step
+TOOL_PHASES = {
+    events.ToolUseStarted: (events.ToolUseFinished, 'use'),
+    events.ToolPreparing: (events.ToolPrepared, 'loading'),
+    events.ToolPoweringOn: (events.ToolPoweredOn, 'power_on'),
+    events.ToolPoweringOff: (events.ToolPoweredOff, 'power_off'),
+}
+STEP_PHASES = {
+    events.StepStarted: (events.StepInitiated, 'initiation'),
+    events.StepInitiated: (events.StepCompleted, 'work'),
+    events.StepSetting: (events.StepSet, 'setting'),
+}
+
+# the phase each record ends: record type: (record type which started it, phase, tool phase or not)
+PHASE_ENDS = {end: (start, phase, True) for start, (end, phase) in TOOL_PHASES.items()}
+PHASE_ENDS.update({end: (start, phase, False) for start, (end, phase) in STEP_PHASES.items()})
+
+# the records which are only counted
+COUNTED = {
+    events.ToolUseFinished: 'tool_uses',
+    events.ToolAlreadyOn: 'tool_already_on',
+    events.ToolIdleShutdown: 'tool_idle_shutdowns',
+    events.StepCompleted: 'steps_completed',
+    events.PartProduced: 'parts_produced',
+}
+
+
+class Histogram:
+    """
+    How long something took, every time it happened. The buckets count every observation since the histogram was
+    made, for exporting, while the percentiles are worked out from the most recent <keep> of them.
+        Defines the following attributes:
+            buckets -- the upper bound of each bucket
+            bucket_counts -- how many observations fell in each bucket, not cumulative. The last is everything over
+                             the highest bound
+            count
+            total
+            maximum
+            __recent
+
+        Defines the following methods:
+            observe()
+            percentile()
+            snapshot()
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS, keep=10_000):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+        self.__recent = deque(maxlen=keep)
+
+    def observe(self, value):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+        self.__recent.append(value)
+
+    def percentile(self, percent):
+        """Return the smallest recent observation which at least <percent>% of them are no bigger than"""
+        return _nearest_rank(sorted(self.__recent), percent)
+
+    def snapshot(self):
+        ordered = sorted(self.__recent)
+        summary = {'count': self.count, 'sum': self.total, 'max': self.maximum,
+                   'mean': self.total / self.count if self.count else 0}
+        for percent in PERCENTILES:
+            summary[f'p{percent}'] = _nearest_rank(ordered, percent)
+        return summary
+
+
+def _nearest_rank(ordered, percent):
+    if not ordered:
+        return 0
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+
+class Profiler(events.EventSink):
+    """
+    Times every phase of ShopTool.use() and Step.perform() from the records they publish, so it's easy to see
+    where the time of a craft goes: loading the work piece, powering the tool up and down, initiating the step,
+    the work itself or waiting for glue to dry.
+    It's opt-in: nothing is timed until a Profiler is added to an EventBus, e.g. with profile(), and an EventBus
+    without one costs nothing extra. Times are those of the clock the records were published with, so on a
+    VirtualClock they are simulated seconds.
+    Tools are told apart by their label, so each lathe of a pool gets its own histograms and utilisation.
+    Phases of the same tool or step which overlap are paired up first come first served.
+        Defines the following attributes:
+            tool_phases -- (tool label, phase): Histogram
+            step_phases -- (step, step_type, phase): Histogram
+            counters -- (counter, name): how many times it happened, e.g. ('tool_uses', 'lathe')
+            tool_busy -- tool label: the total time it spent in use
+            first_seen -- the time of the first record received
+            last_seen -- the time of the latest record received
+            buckets
+            __started -- (record type, name): start times of the phases still going
+            __step_types -- step: its step type, as StepSetting doesn't say
+
+        Defines the following properties:
+            window
+
+        Defines the following methods:
+            write()
+            utilisation()
+            snapshot()
+            to_prometheus()
+            reset()
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.reset()
+
+    def reset(self):
+        """Forget everything measured so far"""
+        self.tool_phases = {}
+        self.step_phases = {}
+        self.counters = Counter()
+        self.tool_busy = Counter()
+        self.first_seen = None
+        self.last_seen = None
+        self.__started = {}
+        self.__step_types = {}
+
+    @property
+    def window(self):
+        """The time between the first record received and the latest"""
+        if self.first_seen is None:
+            return 0
+        return self.last_seen - self.first_seen
+
+    def write(self, time, record):
+        if self.first_seen is None:
+            self.first_seen = time
+        self.last_seen = time
+        kind = type(record)
+
+        counter = COUNTED.get(kind)
+        if counter is not None:
+            self.counters[counter, getattr(record, 'tool', None) or record.step] += 1
+        if kind is events.StepStarted:
+            self.__step_types[record.step] = record.step_type
+
+        # a record can end one phase and start the next, like StepInitiated
+        self.__end_phase(kind, record, time)
+        if kind in TOOL_PHASES:
+            self.__started.setdefault((kind, record.tool), deque()).append(time)
+        elif kind in STEP_PHASES:
+            self.__started.setdefault((kind, record.step), deque()).append(time)
+
+    def __end_phase(self, kind, record, time):
+        ends = PHASE_ENDS.get(kind)
+        if ends is None:
+            return
+        start_kind, phase, is_tool = ends
+        name = record.tool if is_tool else record.step
+        started = self.__started.get((start_kind, name))
+        if not started:
+            # it started before the Profiler was listening
+            return
+        elapsed = time - started.popleft()
+        if is_tool:
+            histograms, key = self.tool_phases, (name, phase)
+            if phase == 'use':
+                self.tool_busy[name] += elapsed
+        else:
+            histograms, key = self.step_phases, (name, self.__step_types.get(name), phase)
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.buckets)
+        histogram.observe(elapsed)
+
+    def utilisation(self):
+        """Return tool: the share of the time the Profiler has been watching that the tool was in use"""
+        window = self.window
+        return {tool: busy / window if window else 0 for tool, busy in self.tool_busy.items()}
+
+    def snapshot(self):
+        """Return everything measured so far as a dict of plain values, e.g. to dump as JSON"""
+        return {
+            'window': self.window,
+            'tools': {f'{tool}/{phase}': histogram.snapshot()
+                      for (tool, phase), histogram in sorted(self.tool_phases.items())},
+            'steps': {f'{step}/{phase}': dict(histogram.snapshot(), step_type=step_type)
+                      for (step, step_type, phase), histogram in sorted(self.step_phases.items(),
+                                                                        key=lambda item: item[0][::2])},
+            'counters': {f'{counter}/{name}': number for (counter, name), number in sorted(self.counters.items())},
+            'utilisation': self.utilisation(),
+        }
+
+    def to_prometheus(self, prefix='woodshop'):
+        """Return everything measured so far in the Prometheus text exposition format"""
+        lines = []
+        for metric, histograms, label_names, about in (
+                ('tool_phase_seconds', self.tool_phases, ('tool', 'phase'), 'Time spent in each phase of using a tool'),
+                ('step_phase_seconds', self.step_phases, ('step', 'step_type', 'phase'),
+                 'Time spent in each phase of performing a step')):
+            name = f'{prefix}_{metric}'
+            lines += [f'# HELP {name} {about}', f'# TYPE {name} histogram']
+            for key, histogram in sorted(histograms.items(), key=lambda item: tuple(map(str, item[0]))):
+                labels = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(label_names, key))
+                cumulative = 0
+                for bound, number in zip(histogram.buckets + ('+Inf',), histogram.bucket_counts):
+                    cumulative += number
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.total}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+        name = f'{prefix}_events_total'
+        lines += [f'# HELP {name} How many times each thing happened', f'# TYPE {name} counter']
+        for (counter, subject), number in sorted(self.counters.items()):
+            lines.append(f'{name}{{event="{counter}",subject="{_escape(subject)}"}} {number}')
+
+        name = f'{prefix}_tool_utilisation_ratio'
+        lines += [f'# HELP {name} Share of the profiled time each tool was in use', f'# TYPE {name} gauge']
+        for tool, share in sorted(self.utilisation().items()):
+            lines.append(f'{name}{{tool="{_escape(tool)}"}} {share}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+@contextmanager
+def profile(bus=None, profiler=None):
+    """Profile everything published on <bus>, or the default EventBus, inside the with block:
+
+        with profile() as profiler:
+            worker.craft('chair')
+        print(profiler.to_prometheus())
+    """
+    bus = bus or events.get_event_bus()
+    profiler = profiler or Profiler()
+    bus.add_sink(profiler)
+    try:
+        yield profiler
+    finally:
+        bus.remove_sink(profiler)
+
+
+if __name__ == '__main__':
+    import business
+    import clocks
+    from worker import Worker
+
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    for model in shop.catalog.models():
+        shop.order_equipment(model)
+    worker = Worker('Miles Head')
+    shop.hire_worker(worker)
+    worker.learn_blueprint('chair')
+    worker.learn_blueprint('table')
+
+    with profile(shop.events) as profiler:
+        for item in ('chair', 'table') * 5:
+            worker.craft(item)
+
+    snapshot = profiler.snapshot()
+    for phase, summary in snapshot['tools'].items():
+        print(f'{phase:<24} x{summary["count"]:<3} p50 {summary["p50"]:.2f} p95 {summary["p95"]:.2f} '
+              f'p99 {summary["p99"]:.2f} total {summary["sum"]:.1f}')
+    print({tool: round(share, 3) for tool, share in snapshot['utilisation'].items()})
+    print(profiler.to_prometheus()[:600])
@@ -0,0 +1,245 @@
+import heapq
+from collections import Counter, deque, namedtuple
+import clocks
+from blueprints import WoodObjectEncyclopedia
+
+# one entry in the finished schedule: which step of which order was done by whom, on what, and when
+ScheduledStep = namedtuple('ScheduledStep', 'order item step worker tool start end')
+
+# what run() hands back once every order is finished
+ScheduleReport = namedtuple('ScheduleReport', 'makespan orders_completed worker_utilisation tool_utilisation schedule')
+
+
+class _OrderProgress:
+    """Bookkeeping for a single order while the scheduler works through it.
+    Steps of one order are done one after another, but different orders can be worked on at the same time"""
+    def __init__(self, number, blueprint):
+        self.number = number
+        self.blueprint = blueprint
+        self.steps = list(blueprint.steps)
+        self.next_step = 0
+        self.in_progress = False
+        self.ready_at = 0
+        self.finished_at = None
+
+    @property
+    def is_finished(self):
+        return self.next_step >= len(self.steps)
+
+    @property
+    def current_step(self):
+        return self.steps[self.next_step]
+
+
+class ShopScheduler:
+    """An event driven scheduler which runs a queue of craft orders across all the Workers of a Business at once.
+    Every ShopTool is an exclusive resource, so two workers can never be on the same Lathe at the same time.
+    The scheduler doesn't perform the steps, it works out how long they take from ShopTool.time_to_use()
+    and moves its clock from one finished step to the next.
+    While glue dries or stain cures the worker and the tool are let go to work on other orders, and the order
+    picks up again once its passive_time is up.
+    When more than one free tool can do a step, the business's tool_selection picks between them, going by how long
+    each has been in use so far in the schedule.
+        Defines the following attributes:
+            business
+            workers
+            equipment -- the pool of tools to schedule on. Defaults to everything the business owns
+            clock -- defaults to a fresh VirtualClock so a whole day of orders is simulated instantly
+            release_during_passive -- if False, workers stand around waiting for glue to dry like they used to
+            orders
+            __tool_busy -- id(tool): how long it has been in use so far in the schedule
+            __tools_in_use -- the ids of the tools which are in use at this point of the schedule. The tools' own
+                              is_being_used is left alone, as nobody is really using them
+
+        Defines the following methods:
+            add_order()
+            add_orders()
+            run()
+            _tools_for()
+            _select_tool()
+            _dispatch()
+            _finish()
+    """
+    def __init__(self, business, equipment=None, clock=None, release_during_passive=True):
+        self.business = business
+        self.workers = list(business.workers)
+        if equipment is None:
+            equipment = business.tools()
+        self.equipment = list(equipment)
+        self.clock = clock or clocks.VirtualClock()
+        self.release_during_passive = release_during_passive
+        self.orders = []
+        self.__events = []
+        self.__event_count = 0
+        self.__tools_by_step = {}
+        self.__tool_busy = Counter()
+        self.__tools_in_use = set()
+        self.__started = []
+        self.__unstarted = {}
+
+    def add_order(self, order, **kwargs):
+        """Queue up an order. <order> can be a Blueprint or the name of an item in the WoodObjectEncyclopedia"""
+        if isinstance(order, str):
+            order = WoodObjectEncyclopedia.get_blueprint(order, **kwargs)
+        progress = _OrderProgress(len(self.orders), order)
+        self.orders.append(progress)
+        self.__unstarted.setdefault(id(order), deque()).append(progress)
+
+    def add_orders(self, orders):
+        for order in orders:
+            self.add_order(order)
+
+    def _tools_for(self, step):
+        """Return every tool in the pool which knows how to perform <step>.
+        The pool doesn't change during a run, so the answer for each kind of step is only worked out once"""
+        tools = self.__tools_by_step.get(type(step))
+        if tools is None:
+            tools = [tool for tool in self.equipment if tool.accepts(step)]
+            self.__tools_by_step[type(step)] = tools
+        return tools
+
+    def _select_tool(self, step):
+        """Return the free tool the business's tool_selection picks for <step>, or None if none of them are free"""
+        free = [tool for tool in self._tools_for(step) if id(tool) not in self.__tools_in_use]
+        return self.business.tool_selection.select(free, step, lambda tool: self.__tool_busy[id(tool)])
+
+    def _push_event(self, moment, worker, tool, order, ready_at):
+        """Remember that at <moment> <worker> and <tool> will be free again, and <order> can move on at <ready_at>.
+        An event with no worker or tool is just the order's glue being dry"""
+        heapq.heappush(self.__events, (moment, self.__event_count, worker, tool, order, ready_at))
+        self.__event_count += 1
+
+    def _dispatch(self, now, idle_workers, schedule):
+        """Hand the next step of the oldest waiting order to each idle worker, as long as a tool for it is free.
+        Orders which haven't been started yet are queued up by blueprint. They're all alike, so if the oldest one
+        can't start none of the others can either, and only the oldest of each kind ever needs looking at.
+        That keeps each dispatch down to the orders on the go, however long the order book is"""
+        candidates = [(order.number, order, None) for order in self.__started
+                      if not order.in_progress and order.ready_at <= now]
+        candidates.extend((queue[0].number, queue[0], queue) for queue in self.__unstarted.values() if queue)
+        heapq.heapify(candidates)
+
+        while candidates and idle_workers:
+            number, order, queue = heapq.heappop(candidates)
+            step = order.current_step
+            tool = self._select_tool(step)
+            if tool is None:
+                continue
+            if queue is not None:
+                queue.popleft()
+                self.__started.append(order)
+                if queue:
+                    heapq.heappush(candidates, (queue[0].number, queue[0], queue))
+
+            worker = idle_workers.pop(0)
+            worker.active_job = order.blueprint
+            worker.current_tool = tool
+            self.__tools_in_use.add(id(tool))
+            order.in_progress = True
+
+            ready_at = now + tool.time_to_use(step)
+            if self.release_during_passive:
+                end = ready_at - step.passive_time
+            else:
+                end = ready_at
+            self.__tool_busy[id(tool)] += end - now
+            schedule.append(ScheduledStep(order.number, order.blueprint.name, step, worker, tool, now, end))
+            self._push_event(end, worker, tool, order, ready_at)
+
+    def run(self):
+        """Work through every queued order and return a ScheduleReport"""
+        if not self.workers:
+            raise SchedulingError(f'{self.business.name} has nobody to do the work')
+
+        for order in self.orders:
+            for step in order.steps:
+                if not self._tools_for(step):
+                    raise SchedulingError(f'Nothing in {self.business.name} can perform {step.name} '
+                                          f'for the {order.blueprint.name}')
+
+        start = self.clock.now()
+        idle_workers = list(self.workers)
+        schedule = []
+        self._dispatch(start, idle_workers, schedule)
+
+        while self.__events:
+            moment, _, worker, tool, order, ready_at = heapq.heappop(self.__events)
+            self.clock.sleep(moment - self.clock.now())
+
+            if worker is not None:
+                self.__tools_in_use.discard(id(tool))
+                worker.current_tool = None
+                worker.active_job = None
+                idle_workers.append(worker)
+                order.in_progress = False
+                order.next_step += 1
+                order.ready_at = ready_at
+                if ready_at > moment:
+                    # come back to the order once it has finished setting up
+                    self._push_event(ready_at, None, None, order, ready_at)
+                elif order.is_finished:
+                    self._finish(order, moment - start)
+            elif order.is_finished:
+                self._finish(order, moment - start)
+
+            # everything that finishes at the same moment frees up before anything new is handed out
+            if self.__events and self.__events[0][0] == moment:
+                continue
+            self._dispatch(moment, idle_workers, schedule)
+
+        makespan = self.clock.now() - start
+        return ScheduleReport(
+            makespan,
+            sum(1 for order in self.orders if order.is_finished),
+            self._utilisation(schedule, 'worker', makespan),
+            self._utilisation(schedule, 'tool', makespan),
+            schedule
+        )
+
+    def _finish(self, order, finished_at):
+        order.finished_at = finished_at
+        self.__started.remove(order)
+
+    def _utilisation(self, schedule, resource, makespan):
+        """Return the fraction of the makespan each worker or tool spent busy, keyed by its name.
+        Tools which share a name are told apart by their position in the pool, e.g. 'lathe #2'"""
+        pool = self.workers if resource == 'worker' else self.equipment
+        busy = {id(r): 0 for r in pool}
+        for entry in schedule:
+            busy[id(getattr(entry, resource))] += entry.end - entry.start
+
+        totals = Counter(r.name for r in pool)
+        seen = Counter()
+        utilisation = {}
+        for r in pool:
+            name = r.name
+            if totals[name] > 1:
+                seen[name] += 1
+                name = f'{name} #{seen[name]}'
+            utilisation[name] = busy[id(r)] / makespan if makespan else 0
+        return utilisation
+
+
+class SchedulingError(Exception):
+    """Raised when a queue of orders can never be finished with the workers and tools on hand"""
+    pass
+
+
+if __name__ == '__main__':
+    import business
+    import shop_tools
+    from worker import Worker
+
+    ws = business.WoodShop()
+    for tool in [shop_tools.Lathe(), shop_tools.WorkBench()]:
+        ws.buy_equipment(tool)
+
+    for name in ['Miles Head', 'Ann Vil']:
+        ws.hire_worker(Worker(name))
+
+    scheduler = ShopScheduler(ws, equipment=list(ws.tools()) + [shop_tools.Lathe()])
+    scheduler.add_orders(['chair', 'chair', 'chair'])
+    report = scheduler.run()
+    print(f'Finished {report.orders_completed} orders in {report.makespan:.1f} seconds')
+    print('Workers:', report.worker_utilisation)
+    print('Tools:', report.tool_utilisation)
@@ -0,0 +1,199 @@
+from collections import Counter, namedtuple
+
+# a stint on one tool: the steps of one or more jobs done back to back in a single use_batch().
+# <work> is a tuple of (job, StepRecord) pairs in the order they're done
+ToolRun = namedtuple('ToolRun', 'tool work')
+
+
+def sessions(plan):
+    """Merge every stretch of ToolRuns in <plan> on the same tool into one, as they're done in a single session"""
+    merged = []
+    for run in plan:
+        if merged and merged[-1].tool is run.tool:
+            merged[-1] = ToolRun(run.tool, merged[-1].work + run.work)
+        else:
+            merged.append(run)
+    return merged
+
+
+def plan_cost(plan):
+    """Return how long working through <plan> takes, from ShopTool.time_to_use_batch(), without doing it"""
+    return sum(run.tool.time_to_use_batch([record.step for job, record in run.work]) for run in sessions(plan))
+
+
+def changeovers(plan):
+    """Return a Counter of how many times each tool is taken up to start a new session in <plan>"""
+    return Counter(run.tool.name for run in sessions(plan))
+
+
+class SequencingPolicy:
+    """
+    Decides the order the runs of many jobs are done in. Whatever carries out the work, like an OrderBatcher, hands
+    sequence() a list with the ToolRuns of each job, in the order the job needs them done, and gets back every one
+    of them in a single list. A job's runs must stay in their order, but runs of different jobs can go in any order,
+    and runs on the same tool which end up next to each other are done in one session.
+        Defines the following methods:
+            sequence()
+    """
+    def sequence(self, pending):
+        raise NotImplementedError
+
+
+class FifoPolicy(SequencingPolicy):
+    """First come, first served: every job from start to finish before the next one, like crafting them one at a
+    time"""
+    def sequence(self, pending):
+        return [run for runs in pending for run in runs]
+
+
+class GreedyPolicy(SequencingPolicy):
+    """
+    Each time round, takes the tool with the most to gain from going next and does every job which is waiting on it
+    in one session. What a tool gains is its changeover_time for every run it saves starting up again, so powered
+    tools are batched up first. When that doesn't pick between them, the tool with the most steps waiting on it goes,
+    then the one the earliest job is waiting on.
+    """
+    def sequence(self, pending):
+        pending = [list(runs) for runs in pending]
+        plan = []
+        while True:
+            fronts = [runs for runs in pending if runs]
+            if not fronts:
+                return plan
+            waiting_runs = Counter()
+            waiting_steps = Counter()
+            for runs in fronts:
+                waiting_runs[runs[0].tool] += 1
+                waiting_steps[runs[0].tool] += len(runs[0].work)
+            # max() keeps the first of any tie, and the Counters are in order of the earliest job at each tool
+            tool = max(waiting_runs, key=lambda t: ((waiting_runs[t] - 1) * t.changeover_time, waiting_steps[t]))
+            for runs in fronts:
+                if runs[0].tool is tool:
+                    plan.append(runs.pop(0))
+
+
+class LocalSearchPolicy(SequencingPolicy):
+    """
+    Starts from the plan of another policy and improves it one move at a time. A move takes a single run, or a whole
+    session of runs on one tool, and puts it next to another run on the same tool, so long as that doesn't put any
+    job's runs out of order. Whenever a move cuts the plan_cost() it's kept, until no move helps or it has made
+    <max_passes> passes over the plan.
+    Moving runs about doesn't change how long their steps take, only which sessions they fall in, and every session
+    on a tool costs it the same on top of its steps. So a move is costed by the sessions it starts and ends at the
+    places it touches, however long the plan is.
+        Defines the following attributes:
+            start -- the policy whose plan is improved on. Defaults to a GreedyPolicy
+            max_passes
+            __overheads -- tool: what each session on it costs on top of its steps
+
+        Defines the following methods:
+            sequence()
+            _moves()
+            _overhead()
+            _move_cost()
+    """
+    def __init__(self, start=None, max_passes=5):
+        self.start = start or GreedyPolicy()
+        self.max_passes = max_passes
+        self.__overheads = {}
+
+    def sequence(self, pending):
+        plan = list(self.start.sequence(pending))
+        for i in range(self.max_passes):
+            improved = False
+            for position in range(len(plan)):
+                for start, end, rest, at in self._moves(plan, position):
+                    if self._move_cost(plan, start, end, rest, at) < -1e-9:
+                        plan = rest[:at] + plan[start:end] + rest[at:]
+                        improved = True
+                        break
+            if not improved:
+                break
+        return plan
+
+    def _overhead(self, run):
+        """Return what a session starting with <run> costs on top of the steps in it, from
+        ShopTool.time_to_use_batch(): whatever two steps in one session save on doing them in two"""
+        overhead = self.__overheads.get(run.tool)
+        if overhead is None:
+            step = run.work[0][1].step
+            overhead = 2 * run.tool.time_to_use_batch([step]) - run.tool.time_to_use_batch([step, step])
+            self.__overheads[run.tool] = overhead
+        return overhead
+
+    def __session_cost(self, before, run):
+        """What starting a session at <run>, if it does, costs when it comes straight after <before>"""
+        if run is None or (before is not None and before.tool is run.tool):
+            return 0
+        return self._overhead(run)
+
+    def _move_cost(self, plan, start, end, rest, at):
+        """Return how much moving plan[start:end] to position <at> of <rest>, the plan without them, changes
+        plan_cost() by. Only the sessions either side of the runs where they're taken from and put are affected"""
+        first, last = plan[start], plan[end - 1]
+        before = plan[start - 1] if start > 0 else None
+        after = plan[end] if end < len(plan) else None
+        new_before = rest[at - 1] if at > 0 else None
+        new_after = rest[at] if at < len(rest) else None
+        taken_out = (self.__session_cost(before, after)
+                     - self.__session_cost(before, first) - self.__session_cost(last, after))
+        put_in = (self.__session_cost(new_before, first) + self.__session_cost(last, new_after)
+                  - self.__session_cost(new_before, new_after))
+        return taken_out + put_in
+
+    @classmethod
+    def _moves(cls, plan, position):
+        """Yield every move of the run at <position> next to another run on the same tool, then the same for the
+        whole session it starts, if it starts one. Each move is (start, end, rest, at): plan[start:end] goes in at
+        position <at> of <rest>, which is the plan without them"""
+        yield from cls.__moves(plan, position, position + 1)
+        end = position + 1
+        while end < len(plan) and plan[end].tool is plan[position].tool:
+            end += 1
+        if end > position + 1 and (position == 0 or plan[position - 1].tool is not plan[position].tool):
+            yield from cls.__moves(plan, position, end)
+
+    @staticmethod
+    def __moves(plan, start, end):
+        """Yield every move of plan[start:end], which are all on one tool, next to another run on that tool,
+        without moving any of them past the runs of their own jobs before and after them"""
+        block = plan[start:end]
+        tool = block[0].tool
+        jobs = {id(job) for run in block for job, record in run.work}
+        rest = plan[:start] + plan[end:]
+        earliest = 0
+        latest = len(rest)
+        for i in range(start - 1, -1, -1):
+            if any(id(job) in jobs for job, record in rest[i].work):
+                earliest = i + 1
+                break
+        for i in range(start, len(rest)):
+            if any(id(job) in jobs for job, record in rest[i].work):
+                latest = i
+                break
+        for i in range(earliest, latest + 1):
+            if i == start:
+                continue
+            if (i > 0 and rest[i - 1].tool is tool) or (i < len(rest) and rest[i].tool is tool):
+                yield start, end, rest, i
+
+
+if __name__ == '__main__':
+    import business
+    import clocks
+    import events
+    from order_batcher import OrderBatcher
+    from worker import Worker
+
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    for model in ('lathe', 'sander', 'work bench', 'planer', 'jointer', 'table saw', 'padder'):
+        shop.order_equipment(model)
+    worker = Worker('Miles Head')
+    shop.hire_worker(worker)
+    orders = [('cushioned chair', 3), ('desk', 2), ('table', 2), ('bed', 2), ('cutting board', 3), ('chair', 2)]
+
+    for policy in (FifoPolicy(), GreedyPolicy(), LocalSearchPolicy()):
+        batcher = OrderBatcher(worker, policy)
+        plan = batcher.plan(batcher.expand(orders))
+        print(f'{type(policy).__name__:<18} {sum(changeovers(plan).values()):>3} sessions, '
+              f'{plan_cost(plan):.1f} seconds')
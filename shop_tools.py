@@ -1,5 +1,8 @@
-import time
+from collections import namedtuple
+from contextlib import asynccontextmanager, contextmanager
+import clocks
 import crafting_steps as cs
+import events
 
 TURN_ON_TIME = 3
 TURN_OFF_TIME = 3
@@ -19,36 +22,91 @@ class ShopTool:
         foot_print
         needed_power
         weight
+        label -- what the tool is called in the records it publishes. Its name, unless it's one of a pool of tools
+                 of the same name, when its number in the pool is added, e.g. 'lathe #2'
         is_repaired
-        is_being_used
         is_cleaned
         is_on
+        times_claimed -- how many times somebody has taken the tool up
         __loading_time
         __loading_step
+        __busy_since -- when whoever is using the tool took it up, or None if nobody is
+        __busy_time -- how long the tool was in use before that
+        __clock
+        __accepted_types -- acceptable_steps as a frozenset, built the first time accepts() is called
+        __claim -- an asyncio.Lock, made the first time claim_async() is called
+        __events
 
     Defines the following properties:
+        is_being_used -- set it True when taking the tool up and False when putting it down, and the time in
+                         between, according to the tool's clock, is added to its busy_time
+        busy_time -- how long the tool has been in use altogether, including right now if it's in use
         loading_time -- the number of steps it takes to load a piece of wood into the tool
         loading_step -- the time each step takes to complete.
+        clock -- the Clock the tool waits on. Falls back to the default clock if it was never given one
+        events -- the EventBus the tool reports on. Falls back to the default bus if it was never given one
+        setup_time -- the time use() spends on top of performing the step itself
+        changeover_time -- what starting a new batch of steps on the tool costs on top of the steps themselves
 
 
     Defines the following methods:
         _is_step_acceptable()
         _initialize_tool()
-        use() -- this is overridden by each subclass
+        _use() -- this is overridden by each subclass
+        _uses()
+        accepts()
+        claim_async()
+        time_to_use()
+        time_to_use_batch()
+        use()
+        use_async()
+        use_batch()
+        use_batch_async()
     """
+    # how many times use() loads, clamps, feeds or secures the work piece before performing the step
+    LOADS_PER_USE = 0
+    # the kinds of Step the tool can perform. The same for every tool of a kind, so it's set on the class
+    acceptable_steps = ()
+
     def __init__(self, name, **kwargs):
         self.name = name
+        self.label = name
         self.brand = kwargs.get('brand')
         self.price = kwargs.get('price')
         self.foot_print = kwargs.get('foot_print')
         self.needed_power = kwargs.get('needed_power')
         self.weight = kwargs.get('weight')
         self.is_repaired = True
-        self.is_being_used = False
         self.is_cleaned = True
         self.is_on = False
+        self.times_claimed = 0
         self.__loading_time = LOADING_TIME
         self.__loading_step = LOADING_STEP
+        self.__busy_since = None
+        self.__busy_time = 0
+        self.__clock = kwargs.get('clock')
+        self.__accepted_types = None
+        self.__claim = None
+        self.__events = kwargs.get('events')
+
+    @property
+    def is_being_used(self):
+        return self.__busy_since is not None
+
+    @is_being_used.setter
+    def is_being_used(self, in_use):
+        if in_use and self.__busy_since is None:
+            self.__busy_since = self.clock.now()
+            self.times_claimed += 1
+        elif not in_use and self.__busy_since is not None:
+            self.__busy_time += self.clock.elapsed_since(self.__busy_since)
+            self.__busy_since = None
+
+    @property
+    def busy_time(self):
+        if self.__busy_since is None:
+            return self.__busy_time
+        return self.__busy_time + self.clock.elapsed_since(self.__busy_since)
 
     @property
     def loading_time(self):
@@ -58,62 +116,260 @@ class ShopTool:
     def loading_step(self):
         return self.__loading_step
 
+    @property
+    def clock(self):
+        return self.__clock or clocks.get_default_clock()
+
+    @clock.setter
+    def clock(self, clock):
+        self.__clock = clock
+
+    @property
+    def events(self):
+        return self.__events or events.get_event_bus()
+
+    @events.setter
+    def events(self, bus):
+        self.__events = bus
+
+    def claim_async(self):
+        """Return the asyncio.Lock that async workers take turns on, e.g. async with tool.claim_async()"""
+        if self.__claim is None:
+            import asyncio
+            self.__claim = asyncio.Lock()
+        return self.__claim
+
+    @property
+    def setup_time(self):
+        return self.LOADS_PER_USE * self.loading_time * self.loading_step
+
+    @property
+    def changeover_time(self):
+        return 0
+
+    def time_to_use(self, step):
+        """Return how long use() takes to perform <step>, without actually performing it"""
+        return self.setup_time + step.duration
+
+    def time_to_use_batch(self, steps):
+        """Return how long use_batch() takes to perform all of <steps>, without actually performing them"""
+        return sum(self.time_to_use(step) for step in steps)
+
+    def accepts(self, step):
+        """Returns true if <step> is in [acceptable_steps]. Unlike _is_step_acceptable() it never raises"""
+        if self.__accepted_types is None:
+            self.__accepted_types = frozenset(self.acceptable_steps)
+        if type(step) in self.__accepted_types:
+            return True
+        # <step> might still be a subclass of one of them
+        return any((isinstance(step, Step) for Step in self.acceptable_steps))
+
     def _is_step_acceptable(self, step):
         """Returns true if <step> is in [acceptable_steps]."""
-        if any((isinstance(step, Step) for Step in self.acceptable_steps)):
+        if self.accepts(step):
             return True
         else:
             raise InvalidStepError(f"The {self.name.title()} doesn't know how to perform {step.name}")
 
     def _initilize_tool(self, init_string, total_init_time, init_step):
-        """Display the initialization routine for the tool.
+        """Describe the initialization routine for the tool, yielding its wait and records for the clock to run.
         <init_string> <total_init_time> and <init_step> are all defined by the calling subclass
         <init_string> is the string which will be displayed
         <total_init_time> is the number of steps it takes to initialize the tool
         <init_step> is the time each step takes to complete"""
-        print(init_string, end='')
-        for i in range(total_init_time):
-            print('.', end='')
-            time.sleep(init_step)
-        print('DONE')
+        yield events.ToolPreparing(self.label, init_string)
+        yield total_init_time * init_step
+        yield events.ToolPrepared(self.label, init_string)
+
+    def _use(self, step=None):
+        """Describe using the tool to perform <step> as a generator of waits, see Step.waits().
+        Each subclass overrides this with what it actually does"""
+        return
+        yield
+
+    def _uses(self, step):
+        """_use() wrapped in records of when the tool was taken up and put down again, so anything listening,
+        like a Profiler, can tell how long each use took from start to finish"""
+        yield events.ToolUseStarted(self.label, step.name)
+        result = yield from self._use(step)
+        yield events.ToolUseFinished(self.label, step.name)
+        return result
 
-    def use(self):
-        pass
+    def use(self, step):
+        """Perform <step> with the tool, waiting on our clock as we go. Returns the part it made, if any"""
+        return self.clock.run(self._uses(step), self.events)
+
+    async def use_async(self, step):
+        """Just like use() but awaits our clock rather than sleeping, so it doesn't block the event loop"""
+        return await self.clock.run_async(self._uses(step), self.events)
+
+    def use_batch(self, steps, done=None):
+        """Perform each of <steps> in turn and return a list of whatever use() returned for each of them.
+        <done>, if given, is called with the position of each step in <steps> and what use() returned for it
+        as soon as the step is finished, e.g. to record a job's progress"""
+        results = []
+        for i, step in enumerate(steps):
+            results.append(self.use(step))
+            if done is not None:
+                done(i, results[-1])
+        return results
+
+    async def use_batch_async(self, steps, done=None):
+        results = []
+        for i, step in enumerate(steps):
+            results.append(await self.use_async(step))
+            if done is not None:
+                done(i, results[-1])
+        return results
 
 
 class PoweredShopTool(ShopTool):
     """The super class for all ShopTools which need electricity to work.
+    Defines the following attributes:
+        idle_timeout -- if the tool sits on and unused for longer than this it switches itself off.
+                        None means it stays on until it is told otherwise
+        __session_depth
+        __last_used -- when the last use which left the tool on finished
+
+    Defines the following properties:
+        in_session
+        changeover_time
+
     Defines the following methods:
         turn_on()
         turn_off()
+        session()
+        session_async()
+        use_batch()
+        use_batch_async()
+        time_to_use_batch()
+        _check_idle()
+        _powering_on()
+        _powering_off()
+        _use()
+        _uses()
     """
+    # most tools are switched off again as soon as use() is done with them
+    TURNS_OFF_AFTER_USE = True
+
     def __init__(self, name, **kwargs):
         super().__init__(name, **kwargs)
+        self.idle_timeout = kwargs.get('idle_timeout')
+        self.__session_depth = 0
+        self.__last_used = None
+
+    @property
+    def in_session(self):
+        return self.__session_depth > 0
+
+    @contextmanager
+    def session(self):
+        """Keep the tool powered for everything done inside the with block, so a run of steps pays for turning
+        the tool on and off once rather than once per step. Sessions can be nested; the outermost one turns it off,
+        unless the tool has an idle_timeout, in which case it's left on until it has sat unused for that long"""
+        self.__session_depth += 1
+        try:
+            yield self
+        finally:
+            self.__session_depth -= 1
+            if not self.in_session and self.is_on and self.idle_timeout is None:
+                self.turn_off()
+
+    @asynccontextmanager
+    async def session_async(self):
+        """Just like session() but for use with async with, so turning off at the end doesn't block"""
+        self.__session_depth += 1
+        try:
+            yield self
+        finally:
+            self.__session_depth -= 1
+            if not self.in_session and self.is_on and self.idle_timeout is None:
+                await self.clock.run_async(self._powering_off(), self.events)
+
+    def use_batch(self, steps, done=None):
+        """Perform all of <steps> in one session so the tool is only powered up and down once"""
+        with self.session():
+            return super().use_batch(steps, done)
+
+    async def use_batch_async(self, steps, done=None):
+        async with self.session_async():
+            return await super().use_batch_async(steps, done)
+
+    def time_to_use_batch(self, steps):
+        """use_batch() powers the tool up and down once for all of <steps> rather than once for each of them"""
+        steps = list(steps)
+        if not steps:
+            return 0
+        powering = 0 if self.is_on else TURN_ON_TIME * TURN_ON_STEP
+        if not self.in_session and self.idle_timeout is None:
+            powering += TURN_OFF_TIME * TURN_OFF_STEP
+        return powering + sum(super(PoweredShopTool, self).setup_time + step.duration for step in steps)
+
+    def _check_idle(self):
+        """Switch the tool off if it has been sitting on for longer than its idle_timeout since it was last used.
+        It happens in the background while nobody is around, so nobody's clock is charged for it.
+        Returns true if the tool had to switch itself off"""
+        if not self.is_on or self.idle_timeout is None or self.__last_used is None:
+            return False
+        if self.clock.elapsed_since(self.__last_used) > self.idle_timeout:
+            self.is_on = False
+            return True
+        return False
+
+    @property
+    def setup_time(self):
+        setup_time = super().setup_time
+        if not self.is_on:
+            setup_time += TURN_ON_TIME * TURN_ON_STEP
+        if self.TURNS_OFF_AFTER_USE:
+            setup_time += TURN_OFF_TIME * TURN_OFF_STEP
+        return setup_time
+
+    @property
+    def changeover_time(self):
+        """Every batch powers the tool up and down once"""
+        return TURN_ON_TIME * TURN_ON_STEP + TURN_OFF_TIME * TURN_OFF_STEP
+
+    def _powering_on(self):
+        """The waits for turning the tool on"""
+        yield events.ToolPoweringOn(self.label)
+        yield TURN_ON_TIME * TURN_ON_STEP
+        self.is_on = True
+        yield events.ToolPoweredOn(self.label)
+
+    def _powering_off(self):
+        """The waits for turning the tool off. While a session is open the tool is kept on instead"""
+        if self.in_session:
+            return
+        yield events.ToolPoweringOff(self.label)
+        yield TURN_OFF_TIME * TURN_OFF_STEP
+        self.is_on = False
+        yield events.ToolPoweredOff(self.label)
 
     def turn_on(self):
         """Turn on the tool if it is not already on"""
-        print(f'Turning on {self.name.title()}', end='')
-        for i in range(TURN_ON_TIME):
-            print('.', end='')
-            time.sleep(TURN_ON_STEP)
-        print('DONE')
-        self.is_on = True
+        self.clock.run(self._powering_on(), self.events)
 
     def turn_off(self):
-        """Turn off the tool"""
-        print(f'Turning off {self.name.title()}', end='')
-        for i in range(TURN_OFF_TIME):
-            print('.', end='')
-            time.sleep(TURN_OFF_STEP)
-        self.is_on = False
-        print('DONE')
+        """Turn off the tool. While a session is open the tool is kept on and turned off when the session ends"""
+        self.clock.run(self._powering_off(), self.events)
 
-    def use(self):
+    def _use(self, step=None):
         """Check for on-ness. If it is on, Do nothing. If it isn't, turn it on"""
+        if self._check_idle():
+            yield events.ToolIdleShutdown(self.label)
         if not self.is_on:
-            self.turn_on()
+            yield from self._powering_on()
         else:
-            print(f'{self.name.title()} is already on.')
+            yield events.ToolAlreadyOn(self.label)
+
+    def _uses(self, step):
+        """Remember when every use which leaves the tool on finishes, so _check_idle() can tell how long it's been
+        sitting idle since"""
+        result = yield from super()._uses(step)
+        if self.is_on:
+            self.__last_used = self.clock.now()
+        return result
 
 
 class BandSaw(PoweredShopTool):
@@ -123,26 +379,27 @@ class BandSaw(PoweredShopTool):
         acceptable_steps
 
     Defines the following methods:
-        use()
+        _use()
         cut_wood()
     """
+    acceptable_steps = (cs.CuttingStep,)
 
     def __init__(self, **kwargs):
         self.name = 'band saw'
         self.max_piece_height = kwargs.get('max_piece_height')
-        self.acceptable_steps = [cs.CuttingStep]
         super().__init__(self.name, **kwargs)
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            super().use()
-            self.cut_wood(step)
-            super().turn_off()
+            yield from super()._use()
+            part = yield from self.cut_wood(step)
+            yield from self._powering_off()
+            return part
 
     def cut_wood(self, step):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        step.perform()
+        This method merely yields the waits of performing whatever <step> is passed to it, and returns what it produced"""
+        return (yield from step.waits())
 
 
 class DrillPress(PoweredShopTool):
@@ -158,15 +415,17 @@ class DrillPress(PoweredShopTool):
             loading_step
 
         Defines the following methods:
-            use()
+            _use()
             secure_workpiece()
             drill()
     """
+    LOADS_PER_USE = 1
+    acceptable_steps = (cs.DrillingStep,)
+
     def __init__(self, **kwargs):
         self.name = 'drill press'
         super().__init__(self.name, **kwargs)
         self.max_piece_height = kwargs.get('max_piece_height')
-        self.acceptable_steps = [cs.DrillingStep]
         self.__loading_time = 2
         self.__loading_step = .1
 
@@ -180,19 +439,21 @@ class DrillPress(PoweredShopTool):
 
     def drill(self, step):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        step.perform()
+        This method merely yields the waits of performing whatever <step> is passed to it, and returns what it produced"""
+        return (yield from step.waits())
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            self.secure_workpiece()
-            super().use()
-            super().turn_off()
+            yield from self.secure_workpiece()
+            yield from super()._use()
+            part = yield from self.drill(step)
+            yield from self._powering_off()
+            return part
 
     def secure_workpiece(self):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        super()._initilize_tool('Securing work piece', self.loading_time, self.loading_step)
+        This method merely yields the waits of getting the work piece ready"""
+        yield from super()._initilize_tool('Securing work piece', self.loading_time, self.loading_step)
 
 
 class DustCollector(PoweredShopTool):
@@ -200,9 +461,10 @@ class DustCollector(PoweredShopTool):
     then the sawdust generated by that tool will go into the DustCollector instead onto the floor.
     Will be important when it comes time for the Worker to clean up
     """
+    acceptable_steps = ()
+
     def __init__(self, **kwargs):
         self.name = 'dust collector'
-        self.acceptable_steps = []
         super().__init__(self.name, **kwargs)
 
 
@@ -213,32 +475,35 @@ class Jointer(PoweredShopTool):
             acceptable_steps
 
         Defines the following methods:
-            use()
+            _use()
             load_workpiece()
             joint_wood()
     """
+    LOADS_PER_USE = 1
+    acceptable_steps = (cs.JointingStep,)
+
     def __init__(self, **kwargs):
         self.name = 'jointer'
-        self.acceptable_steps = [cs.JointingStep]
         self.max_piece_width = kwargs.get('max_piece_width')
         super().__init__(self.name, **kwargs)
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            self.load_work_piece()
-            super().use()
-            self.joint_wood(step)
-            super().turn_off()
+            yield from self.load_workpiece()
+            yield from super()._use()
+            part = yield from self.joint_wood(step)
+            yield from self._powering_off()
+            return part
 
     def joint_wood(self, step):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        step.perform()
+        This method merely yields the waits of performing whatever <step> is passed to it, and returns what it produced"""
+        return (yield from step.waits())
 
     def load_workpiece(self):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        super()._initilize_tool('Loading work piece', self.loading_time, self.loading_step)
+        This method merely yields the waits of getting the work piece ready"""
+        yield from super()._initilize_tool('Loading work piece', self.loading_time, self.loading_step)
 
 
 class Lathe(PoweredShopTool):
@@ -256,16 +521,18 @@ class Lathe(PoweredShopTool):
             loading_step
 
         Defines the following methods:
-            use()
+            _use()
             turn_wood()
             load_workpiece()
     """
+    LOADS_PER_USE = 1
+    acceptable_steps = (cs.TurningStep,)
+
     def __init__(self, **kwargs):
         self.name = 'lathe'
         self.max_piece_length = kwargs.get('max_piece_length')
         self.max_speed = kwargs.get('max_speed')
         self.min_speed = kwargs.get('min_speed')
-        self.acceptable_steps = [cs.TurningStep]
         super().__init__(self.name, **kwargs)
         self.__loading_time = 4
         self.__loading_step = .1
@@ -278,22 +545,23 @@ class Lathe(PoweredShopTool):
     def loading_step(self):
         return self.__loading_step
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            self.load_work_piece()
-            super().use()
-            self.turn_wood(step)
-            super().turn_off()
+            yield from self.load_workpiece()
+            yield from super()._use()
+            part = yield from self.turn_wood(step)
+            yield from self._powering_off()
+            return part
 
     def turn_wood(self, step):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        step.perform()
+        This method merely yields the waits of performing whatever <step> is passed to it, and returns what it produced"""
+        return (yield from step.waits())
 
     def load_workpiece(self):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        super()._initilize_tool('Loading work piece', self.loading_time, self.loading_step)
+        This method merely yields the waits of getting the work piece ready"""
+        yield from super()._initilize_tool('Loading work piece', self.loading_time, self.loading_step)
 
 
 class Padder(PoweredShopTool):
@@ -303,25 +571,30 @@ class Padder(PoweredShopTool):
             acceptable_steps
 
         Defines the following methods:
-            use()
+            _use()
             add_padding()
     """
+    LOADS_PER_USE = 2
+    TURNS_OFF_AFTER_USE = False
+    acceptable_steps = (cs.PaddingStep,)
+
     def __init__(self, **kwargs):
         self.name = 'padder'
-        self.acceptable_steps = [cs.PaddingStep]
         super().__init__(self.name, **kwargs)
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            super().use()
-            self.add_padding(step)
+            yield from super()._use()
+            part = yield from self.add_padding(step)
+            return part
 
     def add_padding(self, step):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        super()._initilize_tool('Affixing part', self.loading_time, self.loading_step)
-        super()._initilize_tool('Loading padding', self.loading_time, self.loading_step)
-        step.perform()
+        This method merely yields the waits of getting the work piece ready and then performing <step>, and returns what it
+        produced"""
+        yield from super()._initilize_tool('Affixing part', self.loading_time, self.loading_step)
+        yield from super()._initilize_tool('Loading padding', self.loading_time, self.loading_step)
+        return (yield from step.waits())
 
 
 class Planer(PoweredShopTool):
@@ -331,24 +604,29 @@ class Planer(PoweredShopTool):
             acceptable_steps
 
         Defines the following methods:
-            use()
+            _use()
             plane_wood()
     """
+    LOADS_PER_USE = 1
+    TURNS_OFF_AFTER_USE = False
+    acceptable_steps = (cs.PlaningStep,)
+
     def __init__(self, **kwargs):
         self.name = 'planer'
-        self.acceptable_steps = [cs.PlaningStep]
         super().__init__(self.name, **kwargs)
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            super().use()
-            self.plane_wood(step)
+            yield from super()._use()
+            part = yield from self.plane_wood(step)
+            return part
 
     def plane_wood(self, step):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        super()._initilize_tool('Feeding board', self.loading_time, self.loading_sep)
-        step.perform()
+        This method merely yields the waits of getting the work piece ready and then performing <step>, and returns what it
+        produced"""
+        yield from super()._initilize_tool('Feeding board', self.loading_time, self.loading_step)
+        return (yield from step.waits())
 
 
 class Router(PoweredShopTool):
@@ -358,24 +636,26 @@ class Router(PoweredShopTool):
             acceptable_steps
 
         Defines the following methods:
-            use()
+            _use()
             route_wood()
     """
+    acceptable_steps = (cs.RoutingStep,)
+
     def __init__(self, **kwargs):
         self.name = 'router'
-        self.acceptable_steps = [cs.RoutingStep]
         super().__init__(self.name, **kwargs)
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            super().use()
-            self.route_wood(step)
-            super().turn_off()
+            yield from super()._use()
+            part = yield from self.route_wood(step)
+            yield from self._powering_off()
+            return part
 
     def route_wood(self, step):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        step.perform()
+        This method merely yields the waits of performing whatever <step> is passed to it, and returns what it produced"""
+        return (yield from step.waits())
 
 
 class Sander(PoweredShopTool):
@@ -385,24 +665,26 @@ class Sander(PoweredShopTool):
             acceptable_steps
 
         Defines the following methods:
-            use()
+            _use()
             sand_wood()
     """
+    acceptable_steps = (cs.SandingStep,)
+
     def __init__(self, **kwargs):
         self.name = 'sander'
-        self.acceptable_steps = [cs.SandingStep]
         super().__init__(self.name, **kwargs)
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            super().use()
-            self.sand_wood(step)
-            super().turn_off()
+            yield from super()._use()
+            part = yield from self.sand_wood(step)
+            yield from self._powering_off()
+            return part
 
     def sand_wood(self, step):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        step.perform()
+        This method merely yields the waits of performing whatever <step> is passed to it, and returns what it produced"""
+        return (yield from step.waits())
 
 
 class ScrollSaw(PoweredShopTool):
@@ -412,24 +694,26 @@ class ScrollSaw(PoweredShopTool):
             acceptable_steps
 
         Defines the following methods:
-            use()
+            _use()
             cut_wood()
     """
+    acceptable_steps = (cs.CuttingStep,)
+
     def __init__(self, **kwargs):
         self.name = 'scroll saw'
-        self.acceptable_steps = [cs.CuttingStep]
         super().__init__(self.name, **kwargs)
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            super().use()
-            self.cut_wood(step)
-            super().turn_off()
+            yield from super()._use()
+            part = yield from self.cut_wood(step)
+            yield from self._powering_off()
+            return part
 
     def cut_wood(self, step):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        step.perform()
+        This method merely yields the waits of performing whatever <step> is passed to it, and returns what it produced"""
+        return (yield from step.waits())
 
 
 class TableSaw(PoweredShopTool):
@@ -439,24 +723,26 @@ class TableSaw(PoweredShopTool):
             acceptable_steps
 
         Defines the following methods:
-            use()
+            _use()
             cut_wood()
     """
+    acceptable_steps = (cs.CuttingStep,)
+
     def __init__(self, **kwargs):
         self.name = 'table saw'
-        self.acceptable_steps = [cs.CuttingStep]
         super().__init__(self.name, **kwargs)
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            super().use()
-            self.cut_wood(step)
-            super().turn_off()
+            yield from super()._use()
+            part = yield from self.cut_wood(step)
+            yield from self._powering_off()
+            return part
 
     def cut_wood(self, step):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        step.perform()
+        This method merely yields the waits of performing whatever <step> is passed to it, and returns what it produced"""
+        return (yield from step.waits())
 
 
 class WorkBench(ShopTool):
@@ -466,24 +752,27 @@ class WorkBench(ShopTool):
             acceptable_steps
 
         Defines the following methods:
-            use()
+            _use()
             clamp_piece()
     """
+    LOADS_PER_USE = 1
+    acceptable_steps = (cs.GluingStep, cs.SandingStep, cs.FasteningStep)
+
     def __init__(self, **kwargs):
         self.name = 'work bench'
-        self.acceptable_steps = [cs.GluingStep, cs.SandingStep, cs.FasteningStep]
         super().__init__(self.name, **kwargs)
 
-    def use(self, step):
+    def _use(self, step):
         if self._is_step_acceptable(step):
-            self.clamp_piece()
-            super().use()
-            step.perform()
+            yield from self.clamp_piece()
+            yield from super()._use()
+            part = yield from step.waits()
+            return part
 
     def clamp_piece(self):
         """Not to be called directly. Call use() instead.
-        This method merely calls the perform() method for whatever <step> is passed to it"""
-        super()._initilize_tool('Clamping workpiece in place', self.loading_time, self.loading_step)
+        This method merely yields the waits of getting the work piece ready"""
+        yield from super()._initilize_tool('Clamping workpiece in place', self.loading_time, self.loading_step)
 
 
 class InvalidStepError(Exception):
@@ -491,12 +780,134 @@ class InvalidStepError(Exception):
     pass
 
 
-# thinking this might function similar to the WoodObjectEncyclopedia, in that it would be our Factory for creating
-# shop tools
+# everything the ShopCatalog needs to make a tool. <options> are the keyword arguments for its class, as a sorted
+# tuple of (name, value) pairs so the spec can't be changed once it's been read
+ToolSpec = namedtuple('ToolSpec', 'model tool_class options')
+
+# the keyword arguments a listing in the ShopCatalog may give its tool
+SPEC_FIELDS = frozenset(('brand', 'price', 'foot_print', 'needed_power', 'weight', 'idle_timeout', 'max_piece_height',
+                         'max_piece_width', 'max_piece_length', 'max_speed', 'min_speed'))
+
+
 class ShopCatalog:
-    def __init__(self):
-        pass
+    """
+    Works much like the WoodObjectEncyclopedia, but for tools: a factory which knows every model of ShopTool on offer
+    and makes them to order. Each listing is plain data, the name of its ShopTool class and its specs, and is only
+    turned into a ToolSpec the first time it's asked for. After that making another one, or a hundred, is just
+    calling the class.
+        Defines the following attributes:
+            LISTINGS -- model: {'tool': ShopTool class name, spec: value} for everything on offer by default
+            __listings
+            __specs -- the ToolSpecs read from __listings so far
+            __capabilities -- Step class: the ShopTool classes which can perform it, built when first needed
 
+        Defines the following methods:
+            add_listing()
+            models()
+            get_spec()
+            build()
+            capabilities()
+            tools_for()
+            models_for()
+    """
+    LISTINGS = {
+        'band saw': {'tool': 'BandSaw', 'brand': 'Laguna', 'price': 1800, 'needed_power': 1500, 'max_piece_height': 12},
+        'drill press': {'tool': 'DrillPress', 'brand': 'Jet', 'price': 650, 'needed_power': 750,
+                        'max_piece_height': 16},
+        'dust collector': {'tool': 'DustCollector', 'brand': 'Jet', 'price': 450, 'needed_power': 1100},
+        'jointer': {'tool': 'Jointer', 'brand': 'Powermatic', 'price': 2600, 'needed_power': 1500,
+                    'max_piece_width': 8},
+        'lathe': {'tool': 'Lathe', 'brand': 'Nova', 'price': 1900, 'needed_power': 1500, 'max_piece_length': 40,
+                  'max_speed': 3500, 'min_speed': 100},
+        'padder': {'tool': 'Padder', 'brand': 'Juki', 'price': 900, 'needed_power': 400},
+        'planer': {'tool': 'Planer', 'brand': 'DeWalt', 'price': 650, 'needed_power': 1800, 'max_piece_height': 6},
+        'router': {'tool': 'Router', 'brand': 'Bosch', 'price': 250, 'needed_power': 1300},
+        'sander': {'tool': 'Sander', 'brand': 'Festool', 'price': 500, 'needed_power': 400},
+        'scroll saw': {'tool': 'ScrollSaw', 'brand': 'Dremel', 'price': 200, 'needed_power': 150},
+        'table saw': {'tool': 'TableSaw', 'brand': 'SawStop', 'price': 3200, 'needed_power': 2200},
+        'work bench': {'tool': 'WorkBench', 'brand': 'Sjobergs', 'price': 800, 'needed_power': 0},
+    }
+
+    def __init__(self, listings=None):
+        self.__listings = dict(self.LISTINGS)
+        self.__specs = {}
+        self.__capabilities = None
+        for model, listing in (listings or {}).items():
+            self.add_listing(model, **listing)
+
+    def add_listing(self, model, tool, **specs):
+        """Offer <model>, a <tool> class name like 'Lathe', with <specs> such as brand and price, or replace it"""
+        self.__listings[model] = dict(specs, tool=tool)
+        self.__specs.pop(model, None)
+        self.__capabilities = None
+
+    def models(self):
+        return tuple(self.__listings)
+
+    def get_spec(self, model):
+        """Return the ToolSpec for <model>, reading its listing the first time it's asked for"""
+        spec = self.__specs.get(model)
+        if spec is not None:
+            return spec
+        listing = self.__listings.get(model)
+        if listing is None:
+            raise UnknownModelError(model)
+
+        options = dict(listing)
+        tool_class = globals().get(options.pop('tool', None))
+        if not isinstance(tool_class, type) or not issubclass(tool_class, ShopTool):
+            raise InvalidToolSpecError(f'The listing for {model} is not for a ShopTool')
+        unknown = set(options) - SPEC_FIELDS
+        if unknown:
+            raise InvalidToolSpecError(f'The listing for {model} has unknown specs: {", ".join(sorted(unknown))}')
+        spec = ToolSpec(model, tool_class, tuple(sorted(options.items())))
+        self.__specs[model] = spec
+        return spec
+
+    def build(self, model, quantity=1, **overrides):
+        """Make <quantity> identical tools of <model>. Any <overrides>, like clock or events, are passed to each one
+        on top of its specs"""
+        spec = self.get_spec(model)
+        kwargs = dict(spec.options)
+        kwargs.update(overrides)
+        tool_class = spec.tool_class
+        return [tool_class(**kwargs) for i in range(quantity)]
+
+    def capabilities(self):
+        """Return a dict of each kind of Step and the ShopTool classes in the catalog which can perform it"""
+        if self.__capabilities is None:
+            capabilities = {}
+            for model in self.__listings:
+                tool_class = self.get_spec(model).tool_class
+                for step_class in tool_class.acceptable_steps:
+                    tools = capabilities.setdefault(step_class, [])
+                    if tool_class not in tools:
+                        tools.append(tool_class)
+            self.__capabilities = {step_class: tuple(tools) for step_class, tools in capabilities.items()}
+        return self.__capabilities
+
+    def tools_for(self, step):
+        """Return the ShopTool classes which can perform <step>, a Step or a kind of Step"""
+        step_class = step if isinstance(step, type) else type(step)
+        capabilities = self.capabilities()
+        for cls in step_class.__mro__:
+            if cls in capabilities:
+                return capabilities[cls]
+        return ()
+
+    def models_for(self, step):
+        """Return the models in the catalog which can perform <step>"""
+        tools = self.tools_for(step)
+        return tuple(model for model in self.__listings if self.get_spec(model).tool_class in tools)
+
+
+class UnknownModelError(KeyError):
+    def __init__(self, model):
+        super().__init__(f'There is no {model} in the catalog')
+
+
+class InvalidToolSpecError(Exception):
+    pass
 
 
 if __name__ == '__main__':
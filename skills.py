@@ -1,3 +1,7 @@
+import clocks
+import events
+
+
 class Skill:
     def __init__(self, name):
         self.name = name
@@ -5,6 +9,9 @@ class Skill:
     def utilize(self):
         pass
 
+    def _report(self, record):
+        events.get_event_bus().publish(record, clocks.get_default_clock().now())
+
 
 class Clean(Skill):
     def __init__(self):
@@ -14,8 +21,8 @@ class Clean(Skill):
         self.clean(item)
 
     def clean(self, item):
-        print(f'Now cleaning {item}')
-        print(f'{item} is now clean')
+        self._report(events.SkillStarted(self.name, str(item), 'cleaning'))
+        self._report(events.SkillFinished(self.name, str(item), 'clean'))
 
 
 class Repair(Skill):
@@ -26,5 +33,5 @@ class Repair(Skill):
         self.repair(broken_item)
 
     def repair(self, item):
-        print(f'Now repairing {item}')
-        print(f'{item} is now repaired')
+        self._report(events.SkillStarted(self.name, str(item), 'repairing'))
+        self._report(events.SkillFinished(self.name, str(item), 'repaired'))
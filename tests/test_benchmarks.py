@@ -0,0 +1,17 @@
+from benchmarks import compare, is_timing
+
+
+def test_simulated_time_is_not_a_timing():
+    assert is_timing('chair_us_per_craft')
+    assert is_timing('1_process_us_per_order')
+    assert not is_timing('chair_simulated_seconds')
+    assert not is_timing('simulated_seconds_per_craft')
+    assert not is_timing('apply_speedup')
+
+
+def test_only_real_timings_regress():
+    baseline = {'craft': {'chair_us_per_craft': 10, 'chair_simulated_seconds': 100}}
+    results = {'craft': {'chair_us_per_craft': 10, 'chair_simulated_seconds': 200}}
+    assert compare(results, baseline) == []
+    results['craft']['chair_us_per_craft'] = 20
+    assert [regression.measurement for regression in compare(results, baseline)] == ['chair_us_per_craft']
@@ -0,0 +1,159 @@
+from itertools import count
+import pytest
+import business
+import clocks
+import events
+import jobs
+import shop_tools
+from checkpoints import CheckpointLog
+from wood_objects import RoundLeg
+from worker import Worker
+
+
+class PowerCut(Exception):
+    pass
+
+
+class FlakyLathe(shop_tools.Lathe):
+    """A lathe which loses power after turning <uses_left> legs"""
+    def __init__(self, uses_left, **kwargs):
+        super().__init__(**kwargs)
+        self.uses_left = uses_left
+
+    def use(self, step):
+        if not self.uses_left:
+            raise PowerCut('The power went out!')
+        self.uses_left -= 1
+        return super().use(step)
+
+
+def make_shop(lathe, log):
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    shop.buy_equipment(lathe)
+    worker = Worker('Miles Head', checkpoint=log)
+    shop.hire_worker(worker)
+    worker.learn_blueprint('chair')
+    return worker
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'checkpoints.jsonl')
+
+
+@pytest.fixture
+def new_process(monkeypatch):
+    """Start job ids from 1 again, like they do in a fresh process"""
+    return lambda: monkeypatch.setattr(jobs, '_job_ids', count(1))
+
+
+def test_job_ids_carry_on_from_the_log(path, new_process):
+    new_process()
+    with CheckpointLog(path) as log:
+        make_shop(shop_tools.Lathe(), log).craft('chair')
+
+    new_process()
+    with CheckpointLog(path) as log:
+        worker = make_shop(FlakyLathe(2), log)
+        with pytest.raises(PowerCut):
+            worker.craft('chair')
+        (job,) = worker.partial_jobs.values()
+        assert job.job_id > 1
+
+
+def test_compact_keeps_unfinished_job_after_restart(path, new_process):
+    new_process()
+    with CheckpointLog(path) as log:
+        make_shop(shop_tools.Lathe(), log).craft('chair')
+
+    new_process()
+    with CheckpointLog(path) as log:
+        with pytest.raises(PowerCut):
+            make_shop(FlakyLathe(2), log).craft('chair')
+        log.compact()
+
+    new_process()
+    with CheckpointLog(path) as log:
+        worker = make_shop(shop_tools.Lathe(), log)
+        (job,) = worker.restore_jobs()
+        assert job.completed_count == 2
+        worker.resume_jobs()
+        assert not worker.partial_jobs
+
+
+def test_compact_keeps_job_which_reused_a_finished_id(path):
+    # a log written before ids were carried on from it
+    lines = ['["S",1,"Miles Head","chair",null]', '["D",1,0]', '["F",1]',
+             '["S",1,"Miles Head","chair",null]', '["D",1,0]', '["D",1,1]']
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    with CheckpointLog(path) as log:
+        log.compact()
+        (job,) = log.partial_jobs('Miles Head')
+    assert job.completed_count == 2
+
+
+def test_restored_job_keeps_the_parts_it_made(path, new_process):
+    new_process()
+    with CheckpointLog(path) as log:
+        with pytest.raises(PowerCut):
+            make_shop(FlakyLathe(2), log).craft('chair')
+
+    new_process()
+    with CheckpointLog(path) as log:
+        worker = make_shop(shop_tools.Lathe(), log)
+        (job,) = worker.restore_jobs()
+        assert [part.name for part in job.parts] == ['Round leg', 'Round leg']
+
+
+class CountingLathe(shop_tools.Lathe):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.uses = 0
+
+    def use(self, step):
+        self.uses += 1
+        return super().use(step)
+
+
+def test_finished_job_has_every_step_done(path, new_process):
+    new_process()
+    with CheckpointLog(path) as log:
+        worker = make_shop(shop_tools.Lathe(), log)
+        job = jobs.Job(worker.known_blueprints['chair'])
+        worker.work_on(job)
+    assert all(record.is_completed for record in job.records)
+    assert job.is_finished
+
+
+def test_resume_does_not_redo_completed_steps(path, new_process):
+    new_process()
+    with CheckpointLog(path) as log:
+        with pytest.raises(PowerCut):
+            make_shop(FlakyLathe(2), log).craft('chair')
+
+    new_process()
+    with CheckpointLog(path) as log:
+        lathe = CountingLathe()
+        worker = make_shop(lathe, log)
+        (job,) = worker.restore_jobs()
+        worker.resume_jobs()
+        assert lathe.uses == 2
+        assert all(record.is_completed for record in job.records)
+        assert not log.partial_jobs('Miles Head')
+
+
+def test_restoring_twice_adds_the_parts_once(path, new_process):
+    new_process()
+    with CheckpointLog(path) as log:
+        with pytest.raises(PowerCut):
+            make_shop(FlakyLathe(2), log).craft('chair')
+
+    new_process()
+    with CheckpointLog(path) as log:
+        worker = make_shop(shop_tools.Lathe(), log)
+        assert len(worker.restore_jobs()) == 1
+        assert worker.restore_jobs() == []
+        worker.resume_jobs()
+        assert worker.inventory.count(RoundLeg) == 4
@@ -0,0 +1,23 @@
+import business
+import clocks
+import events
+from worker import Worker
+
+
+def test_a_craft_publishes_every_kind_of_record_it_goes_through():
+    sink = events.RingBufferSink()
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(sink))
+    shop.order_equipment('lathe')
+    worker = Worker('Miles Head')
+    shop.hire_worker(worker)
+    worker.learn_blueprint('chair')
+    worker.craft('chair')
+
+    kinds = [type(record) for time, record in sink]
+    assert set(kinds) >= {events.ToolUseStarted, events.ToolPoweringOn, events.ToolPoweredOn,
+                          events.StepStarted, events.StepInitiated, events.StepCompleted,
+                          events.ToolUseFinished, events.PartProduced}
+    produced = [record for time, record in sink if isinstance(record, events.PartProduced)]
+    assert produced == [events.PartProduced('Round leg', 'Turning', 'Miles Head')] * 4
+    # each part is produced once its tool has been put down
+    assert kinds.index(events.PartProduced) > kinds.index(events.ToolUseFinished)
@@ -0,0 +1,34 @@
+import business
+import clocks
+import events
+import shop_tools
+from inventory_manager import InventoryManager
+from wood_objects import Board, RoundLeg
+from worker import Worker
+
+
+def test_crafted_parts_go_into_the_business_inventory():
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    shop.buy_equipment(shop_tools.Lathe())
+    worker = Worker('Miles Head')
+    shop.hire_worker(worker)
+    worker.learn_blueprint('chair')
+    worker.craft('chair')
+    assert shop.inventory.count(RoundLeg) == 4
+    assert len(shop.inventory) == 4
+
+
+def test_reserve_takes_the_oldest_parts_first():
+    boards = [Board() for i in range(10)]
+    inventory = InventoryManager(boards)
+    for board in boards[:3]:
+        inventory.remove(board)
+
+    reservation = inventory.reserve([Board] * 4)
+    assert list(reservation.parts) == boards[3:7]
+    assert inventory.count(Board) == 3
+    assert all(board not in inventory for board in reservation.parts)
+
+    inventory.release(reservation)
+    assert inventory.count(Board) == 7
+    assert list(inventory.reserve([Board] * 3).parts) == boards[7:]
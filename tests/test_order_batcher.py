@@ -0,0 +1,19 @@
+import business
+import clocks
+import events
+from order_batcher import OrderBatcher
+from worker import Worker
+
+
+def test_time_worked_is_the_makespan_of_the_batch():
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    for model in ('lathe', 'sander', 'work bench', 'planer', 'jointer', 'table saw'):
+        shop.order_equipment(model)
+    worker = Worker('Miles Head')
+    shop.hire_worker(worker)
+
+    report = OrderBatcher(worker).run([('chair', 10), ('desk', 3)])
+    assert report.makespan == shop.clock.now() > 0
+    assert worker.time_worked == report.makespan
+    assert worker.last_craft_time == report.makespan
+    assert not worker.partial_jobs
@@ -0,0 +1,39 @@
+import pytest
+from part_batch import LostDimensionError, PartBatch
+from wood_objects import Board, RoundLeg, PLANED
+
+
+@pytest.fixture(params=['array', 'numpy'])
+def backend(request):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    return request.param
+
+
+def test_parts_come_back_in_the_state_they_went_in(backend):
+    parts = [Board(), RoundLeg(), Board()]
+    parts[0].set_planed()
+    back = PartBatch.from_parts(parts, backend).to_parts()
+    assert [type(part) for part in back] == [Board, RoundLeg, Board]
+    assert [part.is_planed for part in back] == [True, False, False]
+
+
+def test_to_parts_will_not_drop_dimensions(backend):
+    batch = PartBatch(backend)
+    batch.append(Board, PLANED)
+    batch.append(Board, length=2.5)
+    assert len(batch.to_parts(batch.mask(is_planed=True))) == 1
+    with pytest.raises(LostDimensionError):
+        batch.to_parts()
+
+
+def test_parts_appended_one_at_a_time_all_count(backend):
+    batch = PartBatch(backend)
+    for i in range(1000):
+        batch.append(Board, PLANED if i % 2 else 0)
+        if i == 499:
+            assert batch.count(Board, is_planed=True) == 250
+    batch.append(RoundLeg)
+    assert len(batch) == 1001
+    assert batch.count(Board, is_planed=True) == 500
+    assert batch.count(RoundLeg) == 1
@@ -0,0 +1,28 @@
+import asyncio
+import business
+import clocks
+import events
+from profiling import profile
+from worker import Worker
+
+
+def test_pooled_tools_are_profiled_one_by_one():
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    shop.order_equipment('lathe', 2)
+    for name in ('Miles Head', 'Ann Teak'):
+        worker = Worker(name)
+        shop.hire_worker(worker)
+        worker.learn_blueprint('chair')
+
+    async def craft_chairs():
+        await asyncio.gather(*(worker.craft_async('chair') for worker in shop.workers))
+
+    with profile(shop.events) as profiler:
+        asyncio.run(craft_chairs())
+
+    utilisation = profiler.utilisation()
+    assert set(utilisation) == {'lathe #1', 'lathe #2'}
+    assert all(0 < share <= 1 for share in utilisation.values())
+    # each lathe turned one chair's legs, so neither is counted twice
+    for lathe in shop.equipment['lathe']:
+        assert 0 < profiler.tool_busy[lathe.label] <= lathe.busy_time
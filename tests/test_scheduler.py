@@ -0,0 +1,57 @@
+import business
+import clocks
+import events
+from scheduler import ShopScheduler
+from tool_pool import SelectionStrategy
+from worker import Worker
+
+
+class LastToolStrategy(SelectionStrategy):
+    def select(self, tools, step, busy_time=None):
+        return tools[-1] if tools else None
+
+
+def make_shop(tool_selection=None, lathes=2, workers=1):
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()),
+                             tool_selection=tool_selection)
+    shop.order_equipment('lathe', lathes)
+    shop.order_equipment('work bench')
+    for i in range(workers):
+        shop.hire_worker(Worker(f'Worker {i}'))
+    return shop
+
+
+def test_dispatch_goes_through_the_business_tool_selection():
+    shop = make_shop(LastToolStrategy())
+    scheduler = ShopScheduler(shop)
+    scheduler.add_orders(['chair'] * 2)
+    report = scheduler.run()
+    lathes = {id(entry.tool) for entry in report.schedule if entry.tool.name == 'lathe'}
+    assert lathes == {id(shop.equipment['lathe'][-1])}
+
+
+def test_least_loaded_spreads_the_schedule_over_the_pool():
+    shop = make_shop()
+    scheduler = ShopScheduler(shop)
+    scheduler.add_orders(['chair'] * 2)
+    report = scheduler.run()
+    assert report.tool_utilisation['lathe #1'] == report.tool_utilisation['lathe #2'] > 0
+
+
+def test_scheduling_leaves_the_real_tools_alone():
+    shop = make_shop(lathes=1, workers=2)
+    lathe = shop.equipment['lathe'][0]
+    scheduler = ShopScheduler(shop)
+    scheduler.add_orders(['chair'] * 3)
+    scheduler.run()
+    assert lathe.busy_time == 0
+    assert not lathe.is_being_used
+
+    # somebody really is on the lathe, which the schedule has nothing to do with
+    lathe.is_being_used = True
+    try:
+        scheduler = ShopScheduler(shop)
+        scheduler.add_orders(['chair'])
+        assert scheduler.run().orders_completed == 1
+    finally:
+        lathe.is_being_used = False
@@ -0,0 +1,32 @@
+import business
+import clocks
+import events
+from order_batcher import OrderBatcher
+from sequencing import FifoPolicy, GreedyPolicy, LocalSearchPolicy, plan_cost
+from worker import Worker
+
+
+def pending_runs():
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    for model in ('lathe', 'sander', 'work bench', 'planer', 'jointer', 'table saw', 'padder'):
+        shop.order_equipment(model)
+    worker = Worker('Miles Head')
+    shop.hire_worker(worker)
+    batcher = OrderBatcher(worker)
+    orders = [('cushioned chair', 3), ('desk', 2), ('table', 2), ('bed', 2), ('cutting board', 3), ('chair', 2)]
+    return [batcher._tool_runs(job) for job in batcher.expand(orders)]
+
+
+def test_policies_keep_every_run_and_each_jobs_order():
+    pending = pending_runs()
+    for policy in (FifoPolicy(), GreedyPolicy(), LocalSearchPolicy()):
+        plan = policy.sequence(pending)
+        assert sorted(map(id, plan)) == sorted(id(run) for runs in pending for run in runs)
+        for runs in pending:
+            assert [run for run in plan if any(run is own for own in runs)] == runs
+
+
+def test_local_search_is_never_worse_than_its_start():
+    pending = pending_runs()
+    for start in (FifoPolicy(), GreedyPolicy()):
+        assert plan_cost(LocalSearchPolicy(start).sequence(pending)) <= plan_cost(start.sequence(pending))
@@ -0,0 +1,52 @@
+import clocks
+import crafting_steps as cs
+import events
+import shop_tools
+
+
+def make_tool(tool_class, **kwargs):
+    sink = events.RingBufferSink()
+    tool = tool_class(clock=clocks.VirtualClock(), events=events.EventBus(sink), **kwargs)
+    return tool, sink
+
+
+def kinds(sink):
+    return [type(record) for time, record in sink]
+
+
+def test_tool_left_on_switches_itself_off_after_idle_timeout():
+    planer, sink = make_tool(shop_tools.Planer, idle_timeout=1)
+    planer.use(cs.PlaningStep())
+    assert planer.is_on
+    planer.clock.sleep(1000)
+    planer.use(cs.PlaningStep())
+    assert kinds(sink).count(events.ToolIdleShutdown) == 1
+    assert kinds(sink).count(events.ToolPoweredOn) == 2
+
+
+def test_tool_used_again_within_idle_timeout_stays_on():
+    planer, sink = make_tool(shop_tools.Planer, idle_timeout=100)
+    planer.use(cs.PlaningStep())
+    planer.clock.sleep(50)
+    planer.use(cs.PlaningStep())
+    assert events.ToolIdleShutdown not in kinds(sink)
+    assert kinds(sink).count(events.ToolPoweredOn) == 1
+    assert events.ToolAlreadyOn in kinds(sink)
+
+
+def test_session_leaves_tool_with_idle_timeout_on():
+    lathe, sink = make_tool(shop_tools.Lathe, idle_timeout=5)
+    lathe.use_batch([cs.TurningStep()] * 2)
+    assert lathe.is_on
+    lathe.clock.sleep(10)
+    lathe.use_batch([cs.TurningStep()])
+    assert kinds(sink).count(events.ToolIdleShutdown) == 1
+    assert kinds(sink).count(events.ToolPoweredOn) == 2
+
+
+def test_session_turns_tool_without_idle_timeout_off_once():
+    lathe, sink = make_tool(shop_tools.Lathe)
+    lathe.use_batch([cs.TurningStep()] * 3)
+    assert not lathe.is_on
+    assert kinds(sink).count(events.ToolPoweredOn) == 1
+    assert kinds(sink).count(events.ToolPoweredOff) == 1
@@ -0,0 +1,38 @@
+import pytest
+from wood_objects import Board, Drawer, FurnitureComponent, InvalidNameError, RoundLeg, UnstoredItemError
+
+
+def test_drawer_hands_back_the_oldest_of_a_type_first():
+    drawer = Drawer(None)
+    boards = [Board() for i in range(5)]
+    drawer.store_items(boards)
+    drawer.store_item(RoundLeg())
+    assert drawer.retrieve_type(Board, 2) == boards[:2]
+    assert drawer.retrieve_item(boards[4]) is boards[4]
+    assert drawer.retrieve_type(Board, 2) == boards[2:4]
+    assert drawer.count_type(Board) == 0
+    assert len(drawer) == 1
+    with pytest.raises(UnstoredItemError):
+        drawer.retrieve_type(Board)
+
+
+def test_emptying_a_drawer_one_at_a_time_hands_back_every_item_oldest_first():
+    drawer = Drawer(None)
+    boards = [Board() for i in range(2_000)]
+    legs = [RoundLeg() for i in range(3)]
+    drawer.store_items(boards[:1_000])
+    drawer.store_items(legs)
+    drawer.store_items(boards[1_000:])
+    drained = [item for i in range(len(boards)) for item in drawer.retrieve_type(Board)]
+    assert drained == boards
+    assert drawer.count_type(Board) == 0
+    assert drawer.retrieve_type(RoundLeg, 3) == legs
+    assert drawer.count_type(RoundLeg) == 0
+    assert len(drawer) == 0
+
+
+def test_slotted_parts_only_take_their_own_name():
+    assert Board('Board').name == 'Board'
+    with pytest.raises(InvalidNameError):
+        FurnitureComponent('Custom part')
+    assert Drawer(None).name == 'Drawer'
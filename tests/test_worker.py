@@ -0,0 +1,22 @@
+import business
+import clocks
+import events
+from worker import Worker
+
+
+def test_employed_worker_times_crafts_on_the_business_clock():
+    shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()))
+    shop.order_equipment('lathe')
+    worker = Worker('Miles Head', clock=clocks.VirtualClock())
+    shop.hire_worker(worker)
+    worker.learn_blueprint('chair')
+
+    took = worker.craft('chair')
+    assert took == shop.clock.now() > 0
+    assert worker.time_worked == took
+
+
+def test_worker_keeps_its_own_clock_until_employed():
+    clock = clocks.VirtualClock()
+    worker = Worker('Miles Head', clock=clock)
+    assert worker.clock is clock
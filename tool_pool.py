@@ -0,0 +1,150 @@
+class ToolPool:
+    """
+    Every tool of one kind a Business owns, like all of its lathes. A Business keeps one for each tool name in its
+    equipment, so buying a second lathe adds to the pool rather than replacing the first.
+    Whether each tool is in use, and how long it has been altogether, is kept by the tool itself through
+    is_being_used and busy_time, so the pool only has to ask.
+    Once there's more than one tool in a pool each is labelled with its number, e.g. 'lathe #2', so the records they
+    publish can be told apart.
+        Defines the following attributes:
+            name
+            tools -- every tool in the pool, in the order they were bought
+
+        Defines the following methods:
+            add()
+            idle()
+            busy()
+            busy_times()
+            utilisation()
+    """
+    def __init__(self, name, tools=()):
+        self.name = name
+        self.tools = []
+        for tool in tools:
+            self.add(tool)
+
+    def add(self, tool):
+        if tool.name != self.name:
+            raise InvalidToolPoolError(f"A {tool.name} can't go in the pool of {self.name}s")
+        self.tools.append(tool)
+        if len(self.tools) > 1:
+            for number, mine in enumerate(self.tools, 1):
+                mine.label = f'{self.name} #{number}'
+
+    def idle(self):
+        """Return every tool in the pool nobody is using"""
+        return [tool for tool in self.tools if not tool.is_being_used]
+
+    def busy(self):
+        """Return every tool in the pool somebody is using"""
+        return [tool for tool in self.tools if tool.is_being_used]
+
+    def busy_times(self):
+        """Return how long each tool in the pool has been in use, in the order they were bought"""
+        return [tool.busy_time for tool in self.tools]
+
+    def utilisation(self, elapsed):
+        """Return the share of <elapsed> seconds each tool in the pool was in use, in the order they were bought"""
+        return [busy_time / elapsed if elapsed else 0 for busy_time in self.busy_times()]
+
+    def __iter__(self):
+        return iter(self.tools)
+
+    def __len__(self):
+        return len(self.tools)
+
+    def __getitem__(self, index):
+        return self.tools[index]
+
+    def __contains__(self, tool):
+        return any(tool is mine for mine in self.tools)
+
+    def __repr__(self):
+        return f'ToolPool({self.name}, {len(self.idle())}/{len(self)} idle)'
+
+
+class SelectionStrategy:
+    """
+    Picks which of the tools able to perform a step gets used for it, when a Business has more than one.
+    Every strategy picks a tool nobody is using if there is one.
+        Defines the following methods:
+            select() -- return one of <tools> for <step>, or None if there are no <tools>. <busy_time>, if given, is
+                        a function returning how long a tool has been in use, for when that isn't the tool's own
+                        busy_time, like in a ShopScheduler's simulation
+    """
+    def select(self, tools, step, busy_time=None):
+        raise NotImplementedError
+
+
+def _busy_time(tool):
+    return tool.busy_time
+
+
+class LeastLoadedStrategy(SelectionStrategy):
+    """Picks the tool which has been in use for the least time so far, so the work is spread out evenly"""
+    def select(self, tools, step, busy_time=None):
+        candidates = [tool for tool in tools if not tool.is_being_used] or tools
+        return min(candidates, key=busy_time or _busy_time, default=None)
+
+
+class RoundRobinStrategy(SelectionStrategy):
+    """
+    Takes the tools in turns: each pick starts looking from the tool after the one picked last time, among the same
+    tools, and takes the first one nobody is using.
+        Defines the following attributes:
+            __last -- for each set of tools picked from, the position of the one picked last
+    """
+    def __init__(self):
+        self.__last = {}
+
+    def select(self, tools, step, busy_time=None):
+        if not tools:
+            return None
+        key = tuple(id(tool) for tool in tools)
+        first = (self.__last.get(key, -1) + 1) % len(tools)
+        position = next((i % len(tools) for i in range(first, first + len(tools))
+                         if not tools[i % len(tools)].is_being_used), first)
+        self.__last[key] = position
+        return tools[position]
+
+
+class CheapestSetupStrategy(SelectionStrategy):
+    """Picks the tool with the least setup_time, like one which is already on, then the least used"""
+    def select(self, tools, step, busy_time=None):
+        busy_time = busy_time or _busy_time
+        candidates = [tool for tool in tools if not tool.is_being_used] or tools
+        return min(candidates, key=lambda tool: (tool.setup_time, busy_time(tool)), default=None)
+
+
+class InvalidToolPoolError(Exception):
+    pass
+
+
+if __name__ == '__main__':
+    import asyncio
+    import business
+    import clocks
+    import events
+    from worker import Worker
+
+    async def craft_chairs(shop, chairs):
+        """Have every worker in <shop> craft <chairs> chairs, all at the same time"""
+        async def keep_crafting(worker):
+            for i in range(chairs):
+                await worker.craft_async('chair')
+        await asyncio.gather(*(keep_crafting(worker) for worker in shop.workers))
+
+    for lathes in (1, 2):
+        for strategy in (LeastLoadedStrategy(), RoundRobinStrategy(), CheapestSetupStrategy()):
+            shop = business.WoodShop(clock=clocks.VirtualClock(), events=events.EventBus(events.NullSink()),
+                                     tool_selection=strategy)
+            shop.order_equipment('lathe', lathes)
+            for name in ('Miles Head', 'Ann Teak'):
+                worker = Worker(name)
+                shop.hire_worker(worker)
+                worker.learn_blueprint('chair')
+            asyncio.run(craft_chairs(shop, 10))
+            elapsed = shop.clock.now()
+            pool = shop.equipment['lathe']
+            print(f'{lathes} lathe(s), {type(strategy).__name__:<22} 20 chairs in {elapsed:6.1f} seconds, '
+                  f'{20 * 4 / elapsed:.3f} legs a second, lathes busy {[round(u, 2) for u in pool.utilisation(elapsed)]}')
@@ -1,75 +1,101 @@
+import sys
 from abc import ABC, abstractmethod
-from collections import namedtuple
-import crafting_steps as cs
-import shop_tools as st
+from collections import Counter, OrderedDict
+
+
+# each kind of processing a WoodObject can have been through is one bit of its flags
+PLANED = 1
+JOINTED = 2
+ROUTED = 4
+SANDED = 8
 
 
 class WoodObject(ABC):
     """
-    Base class for all WoodObjects
+    Base class for all WoodObjects. There can be millions of parts in a simulation, so a WoodObject keeps nothing
+    but its flags in a slot. Its name belongs to its class, and what's been done to it is one int.
         Defines the following attributes:
-            name
+            name -- set on the class, and interned so every Board shares one string. Only classes without
+                    slots, like the CompletedWoodObjects, can be given a name of their own
+            _flags -- PLANED, JOINTED, ROUTED and SANDED or-ed together
+
+        Defines the following properties:
             is_planed
             is_jointed
             is_routed
             is_sanded
 
-        Defines the following properties:
-
         Defines the following methods:
             set_planed()
             set_sanded()
             sed_jointed()
             set_routed()
     """
-    def __init__(self, name):
-        self.name = name
-        self.is_planed = False
-        self.is_jointed = False
-        self.is_routed = False
-        self.is_sanded = False
+    __slots__ = ('_flags',)
+    name = sys.intern('Wood object')
+
+    def __init__(self, name=None):
+        if name is not None and name != self.name:
+            if not hasattr(self, '__dict__'):
+                # slotted parts have nowhere to keep a name of their own
+                raise InvalidNameError(name, self.name)
+            self.name = name
+        self._flags = 0
+
+    def _flag_property(flag):
+        return property(lambda self: bool(self._flags & flag),
+                        lambda self, value: self._set_flag(flag, value))
+
+    is_planed = _flag_property(PLANED)
+    is_jointed = _flag_property(JOINTED)
+    is_routed = _flag_property(ROUTED)
+    is_sanded = _flag_property(SANDED)
+    del _flag_property
+
+    def _set_flag(self, flag, value=True):
+        if value:
+            self._flags |= flag
+        else:
+            self._flags &= ~flag
 
     def set_planed(self):
-        self.is_planed = True
+        self._flags |= PLANED
 
     def set_sanded(self):
-        self.is_sanded = True
+        self._flags |= SANDED
 
     def set_jointed(self):
-        self.is_jointed = True
+        self._flags |= JOINTED
 
     def set_routed(self):
-        self.is_routed = True
+        self._flags |= ROUTED
 
 
 class FurnitureComponent(WoodObject):
-    def __init__(self, name):
-        self.name = name
-        super().__init__(self.name)
+    __slots__ = ()
+    name = sys.intern('Furniture component')
 
 
 class RoundLeg(FurnitureComponent):
-    def __init__(self):
-        self.name = 'Round leg'
-        super().__init__(self.name)
+    __slots__ = ()
+    name = sys.intern('Round leg')
 
 
 class SquareLeg(FurnitureComponent):
-    def __init__(self):
-        self.name = 'Square leg'
-        super().__init__(self.name)
+    __slots__ = ()
+    name = sys.intern('Square leg')
 
 
 class Board(FurnitureComponent):
-    def __init__(self):
-        self.name = 'Board'
-        super().__init__(self.name)
+    __slots__ = ()
+    name = sys.intern('Board')
 
 
 class CompletedWoodObject(WoodObject):
     """
     A class which does a thing
         Defines the following attributes:
+            blueprint -- the Blueprint it was built from, if any
             req_parts
             __is_completed
 
@@ -78,10 +104,11 @@ class CompletedWoodObject(WoodObject):
 
         Defines the following methods:
     """
-    def __init__(self, name):
+    def __init__(self, name, blueprint=None):
         self.name = name
         super().__init__(self.name)
-        self.req_parts = []
+        self.blueprint = blueprint
+        self.req_parts = list(getattr(blueprint, 'req_parts', []))
         self.__is_completed = False
 
     @property
@@ -290,21 +317,34 @@ class Desk(CompletedWoodObject):
 
 class Drawer(CompletedWoodObject):
     """
-    A class which does a thing
+    A class which does a thing. Drawers get used as parts bins holding thousands of components, so every item is
+    filed under a ticket, in the order it was stored, and indexed both by the item itself and by its type.
+    Storing and retrieving a single item doesn't depend on how much else is in the drawer.
         Defines the following attributes:
             length
             width
             height
-            _stored_items
+            _stored_items -- ticket: item, oldest first
+            __tickets_by_key -- the tickets of everything stored under each key, oldest first, as an OrderedDict
+            __tickets_by_type -- the tickets of everything of each type, oldest first, as an OrderedDict
+            __next_ticket
 
         Defines the following properties:
 
         Defines the following methods:
             _set_defaults()
+            _key()
+            _remove()
+            _remove_oldest()
             __iter__()
-            __get_item__()
+            __getitem__()
+            __len__()
+            __contains__()
+            count()
+            count_type()
             retrieve_item()
             retrieve_items()
+            retrieve_type()
             store_item()
             store_items()
     """
@@ -314,18 +354,26 @@ class Drawer(CompletedWoodObject):
         self.length = kwargs.get('length')
         self.width = kwargs.get('width')
         self.height = kwargs.get('height')
-        self._stored_items = []
+        self._stored_items = {}
+        self.__tickets_by_key = {}
+        self.__tickets_by_type = {}
+        self.__next_ticket = 0
         self._set_defaults()
 
     def __getitem__(self, i):
-        try:
-            rtn_item = self._stored_items.pop(self._stored_items.index(i))
-            return rtn_item
-        except ValueError:
+        tickets = self.__tickets_by_key.get(self._key(i))
+        if not tickets:
             raise UnstoredItemError(i, self.name)
+        return self._remove_oldest(tickets)
 
     def __iter__(self):
-        return self._stored_items.__iter__()
+        return iter(self._stored_items.values())
+
+    def __len__(self):
+        return len(self._stored_items)
+
+    def __contains__(self, item):
+        return bool(self.__tickets_by_key.get(self._key(item)))
 
     def _set_defaults(self):
         if not self.length:
@@ -337,20 +385,72 @@ class Drawer(CompletedWoodObject):
         if not self.height:
             self.height = 1.2
 
+    @staticmethod
+    def _key(item):
+        """Items are filed under themselves, so equal items are interchangeable just like they were when the drawer
+        was a list. Anything which can't be hashed is filed under its identity instead"""
+        try:
+            hash(item)
+        except TypeError:
+            return 'unhashable', id(item)
+        return item
+
+    def _remove(self, ticket):
+        """Take the item filed under <ticket> out of the drawer and all of its indexes"""
+        item = self._stored_items.pop(ticket)
+        key = self._key(item)
+        by_key = self.__tickets_by_key[key]
+        by_key.pop(ticket, None)
+        if not by_key:
+            del self.__tickets_by_key[key]
+        by_type = self.__tickets_by_type[type(item)]
+        by_type.pop(ticket, None)
+        if not by_type:
+            del self.__tickets_by_type[type(item)]
+        return item
+
+    def _remove_oldest(self, tickets):
+        """Take the oldest item in <tickets>, one of our indexes, out of the drawer. Popping the front of an
+        OrderedDict doesn't slow down however much has been taken from it before, unlike skipping over the holes
+        left at the front of a plain dict"""
+        ticket, _ = tickets.popitem(last=False)
+        return self._remove(ticket)
+
+    def count(self, item):
+        """Return how many of <item> are in the drawer"""
+        return len(self.__tickets_by_key.get(self._key(item), ()))
+
+    def count_type(self, item_type):
+        """Return how many things of exactly <item_type>, e.g. Board, are in the drawer"""
+        return len(self.__tickets_by_type.get(item_type, ()))
+
     def retrieve_item(self, item):
         return self.__getitem__(item)
 
     def retrieve_items(self, items):
-        returned = []
-        for item in items:
-            try:
-                rtn_item = self._stored_items.pop(self._stored_items.index(item))
-                returned.append(rtn_item)
-            except ValueError:
-                raise UnstoredItemError(item, self.name)
+        """Take out every one of <items> and return them in the same order.
+        If any of them aren't in the drawer nothing is taken out at all"""
+        items = list(items)
+        wanted = Counter(self._key(item) for item in items)
+        for key, number in wanted.items():
+            if len(self.__tickets_by_key.get(key, ())) < number:
+                missing = next(item for item in items if self._key(item) == key)
+                raise UnstoredItemError(missing, self.name)
+        return [self.__getitem__(item) for item in items]
+
+    def retrieve_type(self, item_type, number=1):
+        """Take out the <number> oldest things of exactly <item_type>, e.g. four Boards, and return them"""
+        tickets = self.__tickets_by_type.get(item_type, ())
+        if len(tickets) < number:
+            raise UnstoredItemError(item_type.__name__, self.name)
+        return [self._remove_oldest(tickets) for i in range(number)]
 
     def store_item(self, item):
-        self._stored_items.append(item)
+        ticket = self.__next_ticket
+        self.__next_ticket += 1
+        self._stored_items[ticket] = item
+        self.__tickets_by_key.setdefault(self._key(item), OrderedDict())[ticket] = None
+        self.__tickets_by_type.setdefault(type(item), OrderedDict())[ticket] = None
 
     def store_items(self, items):
         for item in items:
@@ -458,6 +558,12 @@ class UnstoredItemError(Exception):
         super().__init__(f"There is no {item} in this {wood_object}")
 
 
+class InvalidNameError(Exception):
+    """Raised when a part which keeps its name on its class, like a Board, is given a different one"""
+    def __init__(self, name, class_name):
+        super().__init__(f"Every {class_name} is called {class_name!r}, it can't be called {name!r}")
+
+
 class InvalidLegNumber(Exception):
     """Raised by Chairs when the number of legs isn't to their liking"""
     def __init__(self, *args):
@@ -1,4 +1,8 @@
+import clocks
+import events
+from inventory_manager import InventoryManager
 from blueprints import WoodObjectEncyclopedia
+from jobs import Job
 
 
 class Worker:
@@ -12,27 +16,48 @@ class Worker:
             business
             active_job
             current_tool
-            partial_jobs
-            inventory
+            partial_jobs -- job_id: Job for every craft we've started and not finished, oldest first
+            time_worked -- the total time, according to our clock, spent crafting
+            last_craft_time -- how long the most recent craft() took
+            checkpoint -- a CheckpointLog to record the progress of every job in, or None
+            __clock
+            __events
+            __inventory -- the parts we keep to ourselves while we aren't employed
 
         Defines the following properties:
-
+            inventory -- our business's InventoryManager, shared with everyone we work with, or our own if we're
+                         not employed
+            clock -- our business's clock, as that's what its tools wait on, otherwise our own clock if we were
+                     given one, otherwise the default clock
+            events -- our own EventBus if we were given one, otherwise our business's, otherwise the default bus
 
         Defines the following methods:
             assign_to_business()
             make_item()
+            make_item_async()
             prepare_item()
             prepare_items()
             craft()
+            craft_async()
+            work_on()
+            work_on_async()
+            resume_jobs()
+            restore_jobs()
+            start_job()
+            pass_over()
+            finish_job()
+            log_work()
+            step_done()
             assemble()
             learn_blueprints()
             learn_skill()
             use_tool()
+            use_tool_async()
             show_known_blueprints()
             show_skills()
     """
 
-    def __init__(self, name):
+    def __init__(self, name, clock=None, bus=None, checkpoint=None):
         self.name = name
         self.known_blueprints = {}
         self.skills = []
@@ -40,26 +65,94 @@ class Worker:
         self.business = None
         self.active_job = None
         self.current_tool = None
-        self.partial_jobs = []
-        self.inventory = []
+        self.partial_jobs = {}
+        self.time_worked = 0
+        self.last_craft_time = 0
+        self.checkpoint = checkpoint
+        self.__clock = clock
+        self.__events = bus
+        self.__inventory = InventoryManager()
+
+    @property
+    def clock(self):
+        # once we're employed our business's tools do the waiting on its clock, so ours has to be the same one
+        if self.business:
+            return self.business.clock
+        return self.__clock or clocks.get_default_clock()
+
+    @clock.setter
+    def clock(self, clock):
+        self.__clock = clock
+
+    @property
+    def events(self):
+        if self.__events:
+            return self.__events
+        if self.business:
+            return self.business.events
+        return events.get_event_bus()
+
+    @events.setter
+    def events(self, bus):
+        self.__events = bus
+
+    @property
+    def inventory(self):
+        if self.business:
+            return self.business.inventory
+        return self.__inventory
 
     def assign_to_business(self, business):
         self.business = business
 
-    def make_item(self, using_blueprint):
+    def make_item(self, job):
         """Perform the necessary GenerationSteps necessary to create a Part. Step of crafting something.
-        This method returns a Furniture Component
-        """
+        <job> is the Job to make the parts for, or a Blueprint to make them for a new one.
+        Steps the job has already done are skipped. Returns the job"""
+        if not isinstance(job, Job):
+            job = Job(job)
+        for tool, run in self._generation_runs(job):
+            self.use_tool(tool, [record.step for record in run], self.step_done(job, run))
+        return job
+
+    async def make_item_async(self, job):
+        """Just like make_item() but awaits our tools rather than blocking"""
+        if not isinstance(job, Job):
+            job = Job(job)
+        for tool, run in self._generation_runs(job):
+            await self.use_tool_async(tool, [record.step for record in run], self.step_done(job, run))
+        return job
+
+    def step_done(self, job, run):
+        """Return the callback for use_tool() which records each step of <run>, StepRecords of <job>, as done as
+        soon as it is, and puts whatever part it made into our inventory"""
+        positions = {id(record): position for position, record in enumerate(job.records)}
+
+        def done(i, part):
+            record = run[i]
+            record.set_completed()
+            if self.checkpoint:
+                self.checkpoint.step_done(job, positions[id(record)])
+            if part is None:
+                return
+            job.parts.append(part)
+            self.inventory.add(part)
+            if self.checkpoint:
+                self.checkpoint.part_made(job, part)
+            if self.events.enabled:
+                self.events.publish(events.PartProduced(part.name, record.step.name, self.name), self.clock.now())
+        return done
+
+    def _generation_runs(self, job):
+        """Yield each run of the GenerationSteps <job> still has to do which need the same tool, along with the tool.
+        Runs, like the turning of each leg, are done in one go. The runs are lists of StepRecords"""
         if not self.business:
             raise InvalidBusinessError("I'm not employed by any business")
 
-        # necessary_tools = using_blueprint.req_tools
-        # steps = (filter(lambda s: s.step_type == 'generation', using_blueprint.steps))
-
-        for step in (filter(lambda s: s.step_type == 'generation', using_blueprint.steps)):
-            tool = self.business.lookup_tool_by_step(step)
-            part = tool.use(step)
-            self.inventory.append(part)
+        for tool, run in self.business.tool_runs(job.remaining('generation')):
+            if tool is None:
+                raise MissingToolError(run[0].step.name)
+            yield tool, run
 
     def prepare_item(self, item):
         """Perform the necessary AlterationSteps to make the Parts ready for assembly"""
@@ -71,29 +164,136 @@ class Worker:
             self.prepare_item(item)
 
     def craft(self, item: str):
-        """Do all the steps to fully create an completed piece of furniture"""
+        """Do all the steps to fully create an completed piece of furniture.
+        Returns how long it took according to our clock"""
+        blueprint = self.known_blueprints.get(item)
+        if not blueprint:
+            raise UnknownBlueprintError(item)
+        return self.work_on(Job(blueprint))
+
+    async def craft_async(self, item: str):
+        """Just like craft() but awaits our clock rather than sleeping, so lots of crafts can be in flight at once
+        on one event loop"""
         blueprint = self.known_blueprints.get(item)
-        if blueprint:
-            self.make_item(blueprint)
-        else:
+        if not blueprint:
             raise UnknownBlueprintError(item)
-        self.prepare_items(item)
-        self.assemble(item)
+        return await self.work_on_async(Job(blueprint))
+
+    def work_on(self, job):
+        """Carry on with <job> from wherever it got to until it's finished. If anything goes wrong along the way
+        the job is left in partial_jobs to be picked up again later.
+        Returns how long this stint of work took according to our clock"""
+        start = self.start_job(job)
+        self.make_item(job)
+        self.prepare_items(job.blueprint.name)
+        self.pass_over(job, 'alteration')
+        self.assemble(job.blueprint.name)
+        self.pass_over(job, 'assembly')
+        self.finish_job(job)
+        return self.log_work(start)
+
+    async def work_on_async(self, job):
+        """Just like work_on() but awaits our clock rather than sleeping"""
+        start = self.start_job(job)
+        await self.make_item_async(job)
+        self.prepare_items(job.blueprint.name)
+        self.pass_over(job, 'alteration')
+        self.assemble(job.blueprint.name)
+        self.pass_over(job, 'assembly')
+        self.finish_job(job)
+        return self.log_work(start)
+
+    def resume_jobs(self):
+        """Finish every job in partial_jobs, oldest first, without redoing the steps they've already done.
+        Returns how long it took according to our clock"""
+        start = self.clock.now()
+        for job in list(self.partial_jobs.values()):
+            self.work_on(job)
+        return self.clock.elapsed_since(start)
+
+    def restore_jobs(self, checkpoint=None):
+        """Read back every job we'd started and not finished from <checkpoint>, or our own CheckpointLog,
+        e.g. after a crash. They go into partial_jobs, and the parts they'd made back into our inventory,
+        ready for resume_jobs(). Jobs already in partial_jobs are left as they are, so restoring twice doesn't put
+        their parts in the inventory twice. Returns the jobs restored"""
+        checkpoint = checkpoint or self.checkpoint
+        jobs = [job for job in checkpoint.partial_jobs(self.name) if job.job_id not in self.partial_jobs]
+        for job in jobs:
+            self.partial_jobs[job.job_id] = job
+            self.inventory.add_parts(job.parts)
+        return jobs
+
+    def start_job(self, job):
+        """Put <job> in partial_jobs, and our CheckpointLog if it isn't already, until finish_job().
+        Returns the time it was started, according to our clock"""
+        start = self.clock.now()
+        if job.started_at is None:
+            job.started_at = start
+        if self.checkpoint and job.job_id not in self.partial_jobs:
+            self.checkpoint.job_started(job, self.name)
+        self.partial_jobs[job.job_id] = job
+        return start
+
+    def pass_over(self, job, step_type):
+        """Record every step of <step_type> <job> still has to do as done without performing it.
+        prepare_items() and assemble() don't perform anything yet, so this is how their steps get done"""
+        run = job.remaining(step_type)
+        done = self.step_done(job, run)
+        for i in range(len(run)):
+            done(i, None)
+
+    def finish_job(self, job):
+        """Take <job> out of partial_jobs now every step of it is done"""
+        remaining = job.remaining()
+        if remaining:
+            raise UnfinishedJobError(job, remaining)
+        job.finished_at = self.clock.now()
+        del self.partial_jobs[job.job_id]
+        if self.checkpoint:
+            self.checkpoint.job_finished(job)
+
+    def log_work(self, start):
+        """Add the time since <start> to time_worked as one stint of work, however many jobs were done in it.
+        Returns how long it was"""
+        self.last_craft_time = self.clock.elapsed_since(start)
+        self.time_worked += self.last_craft_time
+        return self.last_craft_time
 
     def assemble(self, item):
         """Look at our inventory and if we have the parts necessary for the required item
         perform the necessary AssemblySteps to build it."""
         pass
 
-    def learn_blueprint(self, blueprint):
-        new_blueprint = self.enc.get_blueprint(blueprint)
+    def learn_blueprint(self, blueprint, **kwargs):
+        new_blueprint = self.enc.get_blueprint(blueprint, **kwargs)
         self.known_blueprints.update({blueprint: new_blueprint})
 
     def learn_skill(self, skill):
         self.skills.append(skill)
 
-    def use_tool(self, tool_name):
-        pass
+    def use_tool(self, tool, steps, done=None):
+        """Claim <tool> for the length of <steps> so nobody else can grab it in the meantime.
+        Returns a list of whatever the tool produced for each step. <done> is passed on to ShopTool.use_batch()"""
+        if tool.is_being_used:
+            raise ToolInUseError(tool.name)
+        tool.is_being_used = True
+        self.current_tool = tool
+        try:
+            return tool.use_batch(steps, done)
+        finally:
+            tool.is_being_used = False
+            self.current_tool = None
+
+    async def use_tool_async(self, tool, steps, done=None):
+        """Just like use_tool() but if somebody else is on <tool> we wait our turn instead of giving up"""
+        async with tool.claim_async():
+            tool.is_being_used = True
+            self.current_tool = tool
+            try:
+                return await tool.use_batch_async(steps, done)
+            finally:
+                tool.is_being_used = False
+                self.current_tool = None
 
     def show_known_blueprints(self):
         print('These are the things what I know how to make')
@@ -111,6 +311,22 @@ class UnknownBlueprintError(Exception):
         super().__init__(f"I don't know how to craft a {blueprint}")
 
 
+class MissingToolError(Exception):
+    def __init__(self, step_name):
+        super().__init__(f"There's nothing in this shop I can use for {step_name.lower()}")
+
+
+class ToolInUseError(Exception):
+    def __init__(self, tool_name):
+        super().__init__(f'Somebody else is already using the {tool_name}')
+
+
+class UnfinishedJobError(Exception):
+    def __init__(self, job, remaining):
+        super().__init__(f'Job {job.job_id} for a {job.blueprint.name} still has {len(remaining)} steps to do, '
+                         f'starting with {remaining[0].step.name.lower()}')
+
+
 class InvalidBusinessError(Exception):
     def __init__(self, *args):
         super().__init__(*args)
@@ -125,12 +341,10 @@ if __name__ == '__main__':
     table_saw = shop_tools.TableSaw()
     tools = [lathe, planer, table_saw]
 
-    ws = business.WoodShop()
+    # swap in clocks.RealClock() to watch it happen in real time
+    ws = business.WoodShop(clock=clocks.VirtualClock())
     ws.set_name("Miles Head's")
 
-
-
-
     for tool in tools:
         ws.buy_equipment(tool)
 
@@ -141,7 +355,7 @@ if __name__ == '__main__':
 
     try:
         w.learn_blueprint('chair')
-        w.craft('chair')
+        print(f"\nThat chair took {w.craft('chair')} seconds")
     except UnknownBlueprintError as e:
         print(e)
 